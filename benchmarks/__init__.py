@@ -0,0 +1,36 @@
+"""
+基准测试。必须在导入任何 src 模块之前把配置目录指向临时目录：
+src.config 导入时会在配置目录读写 config.json，基准不能改动 (也不能依赖) 用户真实的配置。
+"""
+import atexit
+import os
+import shutil
+import tempfile
+
+if not os.getenv("GSS_CONFIG_DIR"):
+    _config_dir = tempfile.mkdtemp(prefix="gss_bench_config_")
+    os.environ["GSS_CONFIG_DIR"] = _config_dir
+    atexit.register(shutil.rmtree, _config_dir, True)
+
+
+def exit_on_failure(results):
+    """有场景失败时以非零状态退出，CI (和其他脚本) 据此判断是否回归"""
+    failed = [name for name, result in results.items() if not result.get("ok")]
+    if failed:
+        print(f"失败的场景: {', '.join(failed)}")
+        raise SystemExit(1)
+
+
+def override_config(values):
+    """
+    只在内存中覆盖部分配置字段 (不写入 config.json，也不通知订阅者)，返回校验错误列表。
+    基准用它驱动真实的 CaptureManager，运行时代码不需要这个入口。
+    """
+    from src.config import config
+    with config._lock:
+        merged = dict(config.default_config)
+        merged.update(config.data)
+        merged.update(values)
+        config.data = merged
+        config.snapshot, errors = config.validate(merged)
+    return errors
@@ -0,0 +1,49 @@
+"""
+截图后端抓帧耗时基准。
+
+用法 (在仓库根目录执行):
+    python -m benchmarks.bench_backends
+    python -m benchmarks.bench_backends --backends synthetic imagegrab --rounds 50
+"""
+import argparse
+import json
+
+from src.backends import BACKENDS, create_backend, benchmark_backend
+
+RESOLUTIONS = {
+    "1080p": (1920, 1080),
+    "1440p": (2560, 1440),
+    "4k": (3840, 2160),
+    "ultrawide": (3440, 1440),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="截图后端抓帧耗时基准")
+    parser.add_argument("--backends", nargs="+", default=["synthetic"], choices=sorted(BACKENDS))
+    parser.add_argument("--resolutions", nargs="+", default=list(RESOLUTIONS), choices=list(RESOLUTIONS))
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    results = []
+    for name in args.backends:
+        for label in args.resolutions:
+            width, height = RESOLUTIONS[label]
+            bbox = (0, 0, width, height)
+            try:
+                backend = create_backend(name)
+                for raw in (False, True):
+                    result = benchmark_backend(backend, bbox=bbox, rounds=args.rounds, raw=raw)
+                    result["resolution"] = label
+                    results.append(result)
+                    print(f"{name:<10} {label:<10} {'raw' if raw else 'image':<6} "
+                          f"p50 {result['p50_ms']:8.2f} ms | p95 {result['p95_ms']:8.2f} ms")
+            except Exception as e:
+                # 例如在 Linux 无显示环境下运行 imagegrab
+                print(f"{name:<10} {label:<10} 跳过: {e}")
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
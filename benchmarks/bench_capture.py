@@ -0,0 +1,332 @@
+"""
+截图全流程基准 (可在无显示器的 Linux/CI 上运行，不需要 Windows API 和网络)：
+用合成画面后端 + 假显示器布局驱动真实的 CaptureManager，从热键回调一直测到文件落盘。
+
+测试项 (每个分辨率):
+  single_shot   单张截图：热键回调返回耗时、从按键到文件写盘完成的耗时
+  throughput    连续触发热键 (流水线排满后热键线程被背压阻塞)：每秒落盘张数
+  memory        连拍期间的峰值 RSS 增量 ÷ 最大在途帧数 = 每个在途帧的内存占用
+  encoders      每种编码器的单帧耗时和体积
+另外在已有 1 万个文件的目录里测试文件名分配耗时。
+
+结果写入 JSON，可与另一次运行 (例如另一个提交) 的结果对比，任一指标变差超过阈值时返回非 0。
+
+用法 (在仓库根目录执行):
+    python -m benchmarks.bench_capture --output base.json
+    python -m benchmarks.bench_capture --output new.json --baseline base.json --threshold 0.15
+    python -m benchmarks.bench_capture --compare base.json new.json
+    python -m benchmarks.bench_capture --resolutions 1080p --shots 10 --encoders png_fast png
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from benchmarks import override_config
+from benchmarks.bench_backends import RESOLUTIONS
+from benchmarks.bench_filenames import populate, bench_allocator, summarize
+from src.backends import SyntheticBackend
+from src.encoders import EncoderRegistry, PRESETS
+from src.metrics import metrics
+from src.utils import MonitorTopology, FakeMonitorSource, set_topology
+
+# 指标名的后缀决定好坏方向：耗时/体积/内存越小越好，吞吐越大越好
+LOWER_IS_BETTER = ("_ms", "_us", "_mb", "_bytes")
+HIGHER_IS_BETTER = ("_per_s",)
+# 变化量小于该值 (对应单位) 时不算回归，避免微秒级抖动被误报
+NOISE_FLOOR = 0.05
+
+
+def _rss_bytes():
+    """当前进程常驻内存 (仅 Linux，取不到时返回 None)"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _Sampler:
+    """后台线程定时记录峰值 RSS 和流水线在途帧数"""
+
+    def __init__(self, pipeline, interval=0.002):
+        self.pipeline = pipeline
+        self.interval = interval
+        self.baseline = _rss_bytes()
+        self.peak_rss = self.baseline
+        self.peak_pending = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = _rss_bytes()
+            if rss is not None:
+                self.peak_rss = max(self.peak_rss, rss)
+            self.peak_pending = max(self.peak_pending, self.pipeline.pending())
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def _percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+def _create_manager(save_dir, resolution, encoder, depth, workers):
+    from src.capture import CaptureManager
+    errors = override_config({
+        "save_dir": save_dir,
+        "capture_backend": "synthetic",
+        "synthetic_resolution": list(resolution),
+        "synthetic_pattern": "scene",
+        "encoder": encoder,
+        "pipeline_depth": depth,
+        "pipeline_workers": workers,
+        "pipeline_policy": "block",
+        "show_notification": False,
+        "shadow_enabled": False,
+        "burst_hotkey": "",
+        "dedup_enabled": False,
+        "recompress_enabled": False,
+    })
+    if errors:
+        raise ValueError("; ".join(errors))
+    width, height = resolution
+    set_topology(MonitorTopology(FakeMonitorSource({1: (0, 0, width, height)})))
+    return CaptureManager(queue.Queue())
+
+
+def bench_resolution(label, resolution, args):
+    save_dir = tempfile.mkdtemp(prefix="gss_bench_")
+    try:
+        manager = _create_manager(save_dir, resolution, args.encoder, args.depth, args.workers)
+        manager.take_screenshot()  # 预热：编码器初始化、首次写盘
+        manager.flush()
+        metrics.enabled = True
+        metrics.reset()
+
+        # 单张截图：每次都等上一张写盘完成，测的是空闲状态下的端到端延迟
+        callback, end_to_end = [], []
+        for _ in range(args.shots):
+            t0 = time.perf_counter()
+            manager.take_screenshot()
+            t1 = time.perf_counter()
+            manager.flush()
+            callback.append(t1 - t0)
+            end_to_end.append(time.perf_counter() - t0)
+        stages = {stage: summary["p50_ms"] for stage, summary in metrics.snapshot()["stages"].items()
+                  if summary.get("count")}
+
+        # 连续触发：热键线程一直按，队列满时被背压阻塞
+        with _Sampler(manager.pipeline) as sampler:
+            t0 = time.perf_counter()
+            for _ in range(args.burst):
+                manager.take_screenshot()
+            manager.flush()
+            elapsed = time.perf_counter() - t0
+        metrics.enabled = False
+
+        result = {
+            "single_shot": {
+                "callback_p50_ms": _ms(_percentile(callback, 50)),
+                "callback_p95_ms": _ms(_percentile(callback, 95)),
+                "end_to_end_p50_ms": _ms(_percentile(end_to_end, 50)),
+                "end_to_end_p95_ms": _ms(_percentile(end_to_end, 95)),
+                "stages_p50": stages,
+            },
+            "throughput": {
+                "shots": args.burst,
+                "shots_per_s": round(args.burst / elapsed, 2),
+                "failed": manager.pipeline.stats()["failed"],
+            },
+        }
+        if sampler.baseline is not None:
+            in_flight = max(1, sampler.peak_pending)
+            result["memory"] = {
+                "peak_in_flight": sampler.peak_pending,
+                "peak_rss_delta_mb": round((sampler.peak_rss - sampler.baseline) / 1024 / 1024, 1),
+                "rss_per_in_flight_frame_mb": round((sampler.peak_rss - sampler.baseline) / in_flight / 1024 / 1024, 1),
+                "raw_frame_mb": round(resolution[0] * resolution[1] * 3 / 1024 / 1024, 1),
+            }
+        result["encoders"] = bench_encoders(resolution, args.encoders, args.frames)
+        return result
+    finally:
+        metrics.enabled = False
+        shutil.rmtree(save_dir, ignore_errors=True)
+
+
+def bench_encoders(resolution, names, frames):
+    backend = SyntheticBackend(resolution=resolution, pattern="scene")
+    images = [backend.grab() for _ in range(frames)]
+    registry = EncoderRegistry()
+    skipped = {}
+    for name in names:
+        try:
+            encoder = registry.get(name)
+            for image in images:
+                encoder.encode(image)
+        except Exception as e:
+            skipped[name] = str(e)
+    result = {name: {"encode_ms": summary["ms_per_frame"], "size_bytes": summary["bytes_per_frame"]}
+              for name, summary in registry.report().items() if summary["frames"]}
+    for name, reason in skipped.items():
+        result[name] = {"skipped": reason}
+    return result
+
+
+def bench_filenames(existing, allocations):
+    directory = tempfile.mkdtemp(prefix="gss_bench_")
+    try:
+        when = datetime.now()
+        populate(directory, existing, when)
+        samples, prime_time = bench_allocator(directory, allocations, when)
+        result = {"existing_files": existing, "prime_ms": _ms(prime_time)}
+        result.update(summarize(samples))
+        return result
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _environment():
+    info = {"python": platform.python_version(), "platform": platform.platform(),
+            "cpus": os.cpu_count(), "time": datetime.now().isoformat(timespec="seconds")}
+    try:
+        import PIL
+        info["pillow"] = PIL.__version__
+    except ImportError:
+        pass
+    try:
+        info["commit"] = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                        text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        pass
+    return info
+
+
+def flatten(data, prefix=""):
+    """把嵌套的结果展开为 {"1080p.single_shot.end_to_end_p50_ms": 12.3, ...}，只保留数值"""
+    result = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            result.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            result[name] = value
+    return result
+
+
+def compare(baseline, current, threshold):
+    """返回 (回归列表, 改善列表)，每项为 (指标名, 基准值, 当前值, 相对变化)"""
+    old, new = flatten(baseline["results"]), flatten(current["results"])
+    regressions, improvements = [], []
+    for name in sorted(old.keys() & new.keys()):
+        if name.endswith(LOWER_IS_BETTER):
+            sign = 1
+        elif name.endswith(HIGHER_IS_BETTER):
+            sign = -1
+        else:
+            continue
+        before, after = old[name], new[name]
+        if before <= 0 or abs(after - before) < NOISE_FLOOR:
+            continue
+        change = (after - before) / before
+        if change * sign > threshold:
+            regressions.append((name, before, after, change))
+        elif change * sign < -threshold:
+            improvements.append((name, before, after, change))
+    return regressions, improvements
+
+
+def report_comparison(baseline, current, threshold):
+    """打印对比结果，返回是否没有回归"""
+    regressions, improvements = compare(baseline, current, threshold)
+    commits = (baseline.get("environment", {}).get("commit"), current.get("environment", {}).get("commit"))
+    print(f"对比 {commits[0] or '基准'} -> {commits[1] or '当前'} (阈值 {threshold:.0%})")
+    old_settings, new_settings = baseline.get("settings", {}), current.get("settings", {})
+    differs = sorted(k for k in old_settings.keys() | new_settings.keys() if old_settings.get(k) != new_settings.get(k))
+    if differs:
+        print(f"  注意: 两次运行的参数不同 ({', '.join(differs)})，部分指标不可直接比较")
+    for title, items in (("回归", regressions), ("改善", improvements)):
+        for name, before, after, change in items:
+            print(f"  {title} {name}: {before} -> {after} ({change:+.1%})")
+    print(f"{'失败' if regressions else '通过'}  回归 {len(regressions)} 项，改善 {len(improvements)} 项")
+    return not regressions
+
+
+def _load(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="截图全流程基准")
+    parser.add_argument("--resolutions", nargs="+", default=list(RESOLUTIONS), choices=list(RESOLUTIONS))
+    parser.add_argument("--encoder", default="png", choices=list(PRESETS), help="端到端测试使用的编码器")
+    parser.add_argument("--encoders", nargs="+", default=list(PRESETS), choices=list(PRESETS))
+    parser.add_argument("--shots", type=int, default=20, help="单张截图的重复次数")
+    parser.add_argument("--burst", type=int, default=30, help="连续触发的截图张数")
+    parser.add_argument("--frames", type=int, default=2, help="每种编码器编码的帧数")
+    parser.add_argument("--depth", type=int, default=4, help="流水线队列深度")
+    parser.add_argument("--workers", type=int, default=2, help="流水线 worker 数")
+    parser.add_argument("--existing", type=int, default=10000, help="文件名分配测试中已有的文件数")
+    parser.add_argument("--allocations", type=int, default=500)
+    parser.add_argument("--verbose", action="store_true", help="输出程序自身的日志")
+    parser.add_argument("--output", help="结果 JSON 的保存路径")
+    parser.add_argument("--baseline", help="与该 JSON 对比，出现回归时返回 1")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="只对比两个已有的结果文件")
+    parser.add_argument("--threshold", type=float, default=0.15, help="判定回归的相对变化阈值")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(0 if report_comparison(_load(args.compare[0]), _load(args.compare[1]), args.threshold) else 1)
+
+    results = {}
+    for label in args.resolutions:
+        # 程序自身的日志 (每张截图一行) 默认不输出，只打印汇总
+        with contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO()):
+            results[label] = bench_resolution(label, RESOLUTIONS[label], args)
+        shot, throughput = results[label]["single_shot"], results[label]["throughput"]
+        print(f"{label:<10} 端到端 p50 {shot['end_to_end_p50_ms']:8.2f} ms | 回调 p50 {shot['callback_p50_ms']:7.2f} ms | "
+              f"吞吐 {throughput['shots_per_s']:6.2f} 张/秒 | "
+              f"在途帧 {results[label].get('memory', {}).get('rss_per_in_flight_frame_mb', '-')} MB/帧")
+    results["filenames"] = bench_filenames(args.existing, args.allocations)
+    print(f"filenames  {args.existing} 个已有文件，平均 {results['filenames']['mean_us']} µs/次")
+
+    data = {"environment": _environment(),
+            "settings": {k: v for k, v in vars(args).items() if k not in ("output", "baseline", "compare", "verbose")},
+            "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        print(f"结果已写入 {args.output}")
+    else:
+        print(json.dumps(data, indent=2, ensure_ascii=False))
+
+    if args.baseline and not report_comparison(_load(args.baseline), data, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
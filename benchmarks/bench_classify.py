@@ -0,0 +1,169 @@
+"""
+按游戏分类基准 (假进程表，可在 Linux 上运行)：
+
+  rules        规则匹配：精确进程名、通配符、空文件夹 (不分类)、fallback、非法字符
+  cache        同一窗口连续截图只查询一次进程名
+  invalidate   PID 被复用 (窗口句柄变化)、超过有效期、手动失效时重新查询
+  hot_path     每次热键的分类耗时：有缓存 vs 每次都查询 (模拟 OpenProcess + QueryFullProcessImageName)
+  capture      驱动真实的 CaptureManager，截图按游戏落到子文件夹 (需要 Pillow)
+
+用法 (在仓库根目录执行):
+    python -m benchmarks.bench_classify
+    python -m benchmarks.bench_classify --calls 20000 --lookup-us 80
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks import exit_on_failure, override_config
+from src.classify import GameClassifier, FakeProcessTable, ProcessNameCache
+
+RULES = {
+    "eldenring.exe": "Elden Ring",
+    "cs2.exe": "Counter-Strike 2",
+    "ffxiv*.exe": "FINAL FANTASY XIV",
+    "explorer.exe": "",
+    "bad.exe": 'A<B>:C?',
+}
+PROCESSES = {100: "eldenring.exe", 200: "ffxiv_dx11.exe", 300: "explorer.exe", 400: "Indie Game.exe",
+             500: "bad.exe", 600: "CS2.EXE"}
+
+
+class _SlowTable(FakeProcessTable):
+    """每次查询进程名都付出固定耗时"""
+
+    def __init__(self, delay, **kwargs):
+        super().__init__(**kwargs)
+        self.delay = delay
+
+    def process_name(self, pid):
+        deadline = time.perf_counter() + self.delay
+        while time.perf_counter() < deadline:
+            pass
+        return super().process_name(pid)
+
+
+def scenario_rules():
+    classifier = GameClassifier(RULES, table=FakeProcessTable(PROCESSES))
+    folders = {PROCESSES[pid]: classifier.match(PROCESSES[pid]) for pid in PROCESSES}
+    expected = {"eldenring.exe": "Elden Ring", "ffxiv_dx11.exe": "FINAL FANTASY XIV", "explorer.exe": "",
+                "Indie Game.exe": "Indie Game", "bad.exe": "A_B__C_", "CS2.EXE": "Counter-Strike 2"}
+    flat = GameClassifier(RULES, fallback="", table=FakeProcessTable(PROCESSES))
+    return {"ok": folders == expected and flat.match("Indie Game.exe") == "" and classifier.match("") == "",
+            "folders": folders}
+
+
+def scenario_cache():
+    table = FakeProcessTable(PROCESSES, foreground_pid=100)
+    classifier = GameClassifier(RULES, table=table)
+    results = {classifier.classify().folder for _ in range(100)}
+    table.switch(200)
+    results |= {classifier.classify().folder for _ in range(100)}
+    return {"ok": results == {"Elden Ring", "FINAL FANTASY XIV"} and table.lookups == 2, "lookups": table.lookups}
+
+
+def scenario_invalidate():
+    now = [0.0]
+    table = FakeProcessTable(PROCESSES, foreground_pid=100, window=1)
+    classifier = GameClassifier(RULES, cache=ProcessNameCache(table, ttl=60, clock=lambda: now[0]))
+    first = classifier.classify().folder
+    # 游戏退出后 PID 被另一个进程复用：窗口句柄不同，必须重新查询
+    table.processes[100] = "cs2.exe"
+    table.switch(100, window=2)
+    reused = classifier.classify().folder
+    now[0] += 61
+    classifier.classify()
+    expired = table.lookups
+    classifier.cache.invalidate(100)
+    classifier.classify()
+    return {"ok": first == "Elden Ring" and reused == "Counter-Strike 2" and expired == 3 and table.lookups == 4,
+            "lookups": table.lookups}
+
+
+def scenario_hot_path(calls, lookup_us):
+    delay = lookup_us / 1e6
+    cached = GameClassifier(RULES, table=_SlowTable(delay, processes=PROCESSES, foreground_pid=100))
+    uncached = GameClassifier(RULES, cache=ProcessNameCache(
+        _SlowTable(delay, processes=PROCESSES, foreground_pid=100), ttl=0))
+    result = {}
+    for name, classifier in (("cached", cached), ("uncached", uncached)):
+        t0 = time.perf_counter()
+        for _ in range(calls):
+            classifier.classify()
+        result[f"{name}_us"] = round((time.perf_counter() - t0) / calls * 1e6, 2)
+    result["ok"] = result["cached_us"] < result["uncached_us"]
+    return result
+
+
+def scenario_capture():
+    import queue
+    from src.capture import CaptureManager
+    from src.utils import MonitorTopology, FakeMonitorSource, set_topology
+
+    save_dir = tempfile.mkdtemp(prefix="gss_bench_")
+    try:
+        override_config({"save_dir": save_dir, "capture_backend": "synthetic", "synthetic_resolution": [640, 360],
+                        "encoder": "png_fast", "show_notification": False, "classify_enabled": True,
+                        "classify_rules": RULES, "library_enabled": True})
+        set_topology(MonitorTopology(FakeMonitorSource({1: (0, 0, 640, 360)})))
+        manager = CaptureManager(queue.Queue())
+        table = FakeProcessTable(PROCESSES, foreground_pid=100)
+        manager.classifier = GameClassifier(RULES, table=table)
+        for pid in (100, 100, 300, 400):
+            table.switch(pid)
+            manager.take_screenshot()
+        manager.flush()
+        layout = {}
+        for root, _, files in os.walk(save_dir):
+            images = [f for f in files if f.endswith(".png")]
+            if images:
+                layout[os.path.relpath(root, save_dir)] = len(images)
+        games = dict(manager.library.games()) if manager.library else {}
+        # 关闭分类后仍保存到根目录，但截图库照样记录前台进程 (走进程名缓存)
+        override_config({"classify_enabled": False})
+        before = table.lookups
+        table.switch(200)
+        manager.take_screenshot()
+        table.switch(200, window=table.window)
+        manager.take_screenshot()
+        manager.flush()
+        unclassified = dict(manager.library.games()) if manager.library else {}
+        root_images = len([f for f in os.listdir(save_dir) if f.endswith(".png")])
+        recorded = sum(unclassified.values()) - sum(games.values())
+        ok = (layout == {"Elden Ring": 2, ".": 1, "Indie Game": 1} and root_images == 3 and recorded == 2
+              and table.lookups - before == 1)
+        return {"ok": ok, "layout": layout, "library": games, "unclassified_library": unclassified}
+    finally:
+        shutil.rmtree(save_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按游戏分类基准")
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--lookup-us", type=float, default=50, help="模拟一次进程名查询的耗时 (微秒)")
+    args = parser.parse_args()
+
+    scenarios = {
+        "rules": scenario_rules,
+        "cache": scenario_cache,
+        "invalidate": scenario_invalidate,
+        "hot_path": lambda: scenario_hot_path(args.calls, args.lookup_us),
+        "capture": scenario_capture,
+    }
+    results = {}
+    for name, scenario in scenarios.items():
+        try:
+            results[name] = scenario()
+        except ImportError as e:
+            print(f"{name:<10} 跳过: {e}")
+            continue
+        print(f"{name:<10} {'通过' if results[name]['ok'] else '失败'}  {results[name]}")
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    exit_on_failure(results)
+
+
+if __name__ == "__main__":
+    main()
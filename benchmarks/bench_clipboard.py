@@ -0,0 +1,164 @@
+"""
+剪贴板发布基准 (内存剪贴板，可在 Linux 上运行，需要 Pillow)：
+
+  dib          CF_DIB 数据正确：BITMAPINFOHEADER、自下而上、BGRX 像素
+  png_reuse    PNG 格式直接复用已编码的字节 (bytes 为同一个对象；编码器返回的 memoryview 转为 bytes)；
+               没有 PNG 时只写 DIB
+  coalesce     剪贴板很慢时连续截图：中间的被合并，最终剪贴板里是最新一张
+  hot_path     worker 线程提交一次的耗时 vs 在 worker 线程里同步写剪贴板
+  capture      驱动真实的 CaptureManager：保存的 PNG 与剪贴板中的 PNG 完全一致
+
+用法 (在仓库根目录执行):
+    python -m benchmarks.bench_clipboard
+    python -m benchmarks.bench_clipboard --resolution 2560 1440 --delay-ms 30
+"""
+import argparse
+import json
+import shutil
+import struct
+import tempfile
+import time
+
+from benchmarks import exit_on_failure, override_config
+from src.clipboard import ClipboardSink, MemoryClipboard, make_dib, FORMAT_DIB, FORMAT_PNG
+
+
+def _image(size, color=(10, 20, 30)):
+    from PIL import Image
+    return Image.new("RGB", size, color)
+
+
+def scenario_dib():
+    from PIL import Image
+    image = Image.new("RGB", (3, 2), (0, 0, 0))
+    image.putpixel((0, 0), (255, 0, 0))  # 左上角红色
+    image.putpixel((2, 1), (0, 0, 255))  # 右下角蓝色
+    dib = make_dib(image)
+    header = struct.unpack("<IiiHHIIiiII", dib[:40])
+    pixels = dib[40:]
+    # 第一行是图像的最后一行：右下角在第 3 个像素，B G R X
+    ok = (header[:5] == (40, 3, 2, 1, 32) and len(pixels) == 3 * 2 * 4
+          and pixels[8:11] == b"\xff\x00\x00" and pixels[12:15] == b"\x00\x00\xff")
+    return {"ok": ok, "size": len(dib)}
+
+
+def scenario_png_reuse():
+    png = b"\x89PNG fake encoded bytes"
+    backend = MemoryClipboard()
+    sink = ClipboardSink(backend)
+    sink.submit(_image((64, 64)), png)
+    sink.flush()
+    both = sorted(backend.data)
+    reused = backend.data[FORMAT_PNG] is png
+    sink.submit(_image((64, 64)))
+    sink.flush()
+    dib_only = sorted(backend.data)
+    # PillowEncoder 返回 BytesIO.getbuffer()
+    sink.submit(_image((64, 64)), memoryview(bytearray(png)))
+    sink.flush()
+    view_ok = backend.data[FORMAT_PNG] == png and sink.failed == 0
+    sink.set_formats(["png", "bogus"])
+    sink.submit(_image((64, 64)), png)
+    sink.flush()
+    png_only = sorted(backend.data)
+    sink.close()
+    return {"ok": reused and view_ok and both == [FORMAT_DIB, FORMAT_PNG] and dib_only == [FORMAT_DIB]
+            and png_only == [FORMAT_PNG], "formats": [both, dib_only, png_only]}
+
+
+def scenario_coalesce(delay):
+    backend = MemoryClipboard(delay=delay)
+    sink = ClipboardSink(backend, formats=[FORMAT_PNG])
+    shots = 10
+    for i in range(shots):
+        sink.submit(_image((16, 16)), f"shot-{i}".encode())
+    sink.flush()
+    sink.close()
+    stats = sink.stats()
+    ok = (backend.data[FORMAT_PNG] == f"shot-{shots - 1}".encode()
+          and stats["published"] + stats["coalesced"] == shots and stats["published"] < shots)
+    return {"ok": ok, **stats}
+
+
+def scenario_hot_path(resolution, delay, rounds):
+    image = _image(resolution)
+    backend = MemoryClipboard(delay=delay)
+    sink = ClipboardSink(backend)
+    samples = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        sink.submit(image)
+        samples.append(time.perf_counter() - t0)
+        sink.flush()
+    sink.close()
+    # 对比：在 worker 线程里直接转换并写入剪贴板
+    sync = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        backend.set({FORMAT_DIB: make_dib(image)})
+        sync.append(time.perf_counter() - t0)
+    samples.sort()
+    sync.sort()
+    submit_us = samples[len(samples) // 2] * 1e6
+    sync_ms = sync[len(sync) // 2] * 1000
+    return {"ok": submit_us / 1000 < sync_ms, "submit_us": round(submit_us, 1), "sync_ms": round(sync_ms, 2),
+            "last_latency_ms": sink.stats()["last_latency_ms"]}
+
+
+def scenario_capture(resolution):
+    import glob
+    import os
+    import queue
+    from src.capture import CaptureManager
+    from src.utils import MonitorTopology, FakeMonitorSource, set_topology
+
+    save_dir = tempfile.mkdtemp(prefix="gss_bench_")
+    try:
+        override_config({"save_dir": save_dir, "capture_backend": "synthetic", "synthetic_resolution": list(resolution),
+                        "encoder": "png_fast", "show_notification": False})
+        set_topology(MonitorTopology(FakeMonitorSource({1: (0, 0) + tuple(resolution)})))
+        manager = CaptureManager(queue.Queue())
+        backend = MemoryClipboard()
+        manager.clipboard = ClipboardSink(backend)
+        manager.take_screenshot()
+        manager.flush()
+        saved = glob.glob(os.path.join(save_dir, "*.png"))
+        with open(saved[0], "rb") as f:
+            same = f.read() == backend.data.get(FORMAT_PNG)
+        dib_size = len(backend.data.get(FORMAT_DIB, b""))
+        ok = (len(saved) == 1 and same and manager.clipboard.failed == 0
+              and dib_size == 40 + resolution[0] * resolution[1] * 4)
+        return {"ok": ok, "png_identical": same, "dib_bytes": dib_size, **manager.clipboard.stats()}
+    finally:
+        shutil.rmtree(save_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="剪贴板发布基准")
+    parser.add_argument("--resolution", type=int, nargs=2, default=[1920, 1080])
+    parser.add_argument("--delay-ms", type=float, default=20, help="模拟一次写入剪贴板的耗时 (毫秒)")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    delay = args.delay_ms / 1000
+
+    scenarios = {
+        "dib": scenario_dib,
+        "png_reuse": scenario_png_reuse,
+        "coalesce": lambda: scenario_coalesce(delay),
+        "hot_path": lambda: scenario_hot_path(tuple(args.resolution), delay, args.rounds),
+        "capture": lambda: scenario_capture(tuple(args.resolution)),
+    }
+    results = {}
+    for name, scenario in scenarios.items():
+        try:
+            results[name] = scenario()
+        except ImportError as e:
+            print(f"{name:<10} 跳过: {e}")
+            continue
+        print(f"{name:<10} {'通过' if results[name]['ok'] else '失败'}  {results[name]}")
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    exit_on_failure(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+增量更新基准：构造模拟的新旧 EXE，验证 old + patch -> new 逐字节一致，并统计补丁体积。
+
+场景:
+  roundtrip  新版本在若干位置插入/修改/删除内容 (模拟改动了几个模块)，补丁应用结果必须与新文件一致
+  wrong_base 把补丁应用到另一个版本的 EXE 上，应拒绝且不留下输出文件
+  tampered   补丁数据被篡改，新文件校验失败，应拒绝且不留下输出文件
+
+用法 (在仓库根目录执行):
+    python -m benchmarks.bench_delta
+    python -m benchmarks.bench_delta --size 40 --edits 12
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from benchmarks import exit_on_failure
+from src.delta import make_patch, apply_patch, DeltaError, MAGIC, HEADER
+
+
+def make_versions(size, edits, seed=1):
+    """旧版本为随机内容；新版本在 edits 个随机位置做插入、替换或删除"""
+    rng = random.Random(seed)
+    old = rng.randbytes(size)
+    new = bytearray(old)
+    for _ in range(edits):
+        pos = rng.randrange(len(new))
+        kind = rng.choice(("insert", "replace", "delete"))
+        length = rng.randrange(256, 64 * 1024)
+        if kind == "insert":
+            new[pos:pos] = rng.randbytes(length)
+        elif kind == "replace":
+            new[pos:pos + length] = rng.randbytes(length)
+        else:
+            del new[pos:pos + length]
+    return old, bytes(new)
+
+
+def _write(directory, name, data):
+    path = os.path.join(directory, name)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def scenario_roundtrip(old, new, directory):
+    t0 = time.perf_counter()
+    patch, stats = make_patch(old, new)
+    make_seconds = time.perf_counter() - t0
+    old_path = _write(directory, "old.exe", old)
+    patch_path = _write(directory, "patch.delta", patch)
+    out_path = os.path.join(directory, "GameShadowSnap.new")
+    t0 = time.perf_counter()
+    apply_patch(old_path, patch_path, out_path)
+    apply_seconds = time.perf_counter() - t0
+    with open(out_path, "rb") as f:
+        identical = f.read() == new
+    return {"ok": identical, "patch_bytes": stats["patch_size"], "full_bytes": len(new),
+            "ratio": round(stats["patch_size"] / len(new), 4), "ops": stats["ops"],
+            "make_seconds": round(make_seconds, 2), "apply_seconds": round(apply_seconds, 3)}
+
+
+def _expect_rejected(old_path, patch_path, directory):
+    out_path = os.path.join(directory, "GameShadowSnap.new")
+    try:
+        apply_patch(old_path, patch_path, out_path)
+        return {"ok": False}
+    except DeltaError as e:
+        return {"ok": not os.path.exists(out_path), "error": str(e)}
+
+
+def scenario_wrong_base(old, new, directory):
+    patch, _ = make_patch(old, new)
+    other = bytearray(old)
+    other[len(other) // 2] ^= 0xFF
+    return _expect_rejected(_write(directory, "other.exe", bytes(other)),
+                            _write(directory, "patch.delta", patch), directory)
+
+
+def scenario_tampered(old, new, directory):
+    patch, _ = make_patch(old, new)
+    # 改动第一条指令的参数 (复制偏移或数据长度)：补丁结构仍可解析，但结果内容错误
+    tampered = bytearray(patch)
+    tampered[len(MAGIC) + HEADER.size + 1] ^= 0x01
+    return _expect_rejected(_write(directory, "old.exe", old),
+                            _write(directory, "patch.delta", bytes(tampered)), directory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="增量更新补丁基准")
+    parser.add_argument("--size", type=float, default=20, help="模拟 EXE 大小 (MB)")
+    parser.add_argument("--edits", type=int, default=8, help="新版本中的改动处数")
+    args = parser.parse_args()
+
+    old, new = make_versions(int(args.size * 1024 * 1024), args.edits)
+    results = {}
+    for name, scenario in (("roundtrip", scenario_roundtrip), ("wrong_base", scenario_wrong_base),
+                           ("tampered", scenario_tampered)):
+        directory = tempfile.mkdtemp(prefix="gss_bench_")
+        try:
+            results[name] = scenario(old, new, directory)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        print(f"{name:<10} {'通过' if results[name]['ok'] else '失败'}  {results[name]}")
+
+    print(json.dumps({"size_mb": args.size, "edits": args.edits, "results": results},
+                     indent=2, ensure_ascii=False))
+    exit_on_failure(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+更新下载基准：用本地模拟服务器注入断线和限速，验证断点续传与 SHA-256 校验，
+并对比旧的 "8 KB 分块、断线从零开始" 的下载方式需要传输的总字节数。
+
+场景:
+  drops    每个响应发送 --drop-every MB 后断线，下载器需多次续传
+  restart  第一次下载中途放弃 (模拟程序退出)，新实例从 .part 继续
+  changed  续传前服务器上的文件被替换，If-Range 失效后应从头下载新文件
+  corrupt  发布的摘要与文件不符，应拒绝并删除临时文件
+
+用法 (在仓库根目录执行):
+    python -m benchmarks.bench_download
+    python -m benchmarks.bench_download --size 50 --drop-every 8 --rate 20
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import requests
+
+from benchmarks import exit_on_failure
+from benchmarks.mock_update_server import MockUpdateServer
+from src.download import ResumableDownload, DownloadError, IntegrityError
+
+PATH = "/GameShadowSnap.zip"
+
+
+def _abort(delay):
+    """模拟程序在第一次断线后退出"""
+    raise DownloadError("模拟退出")
+
+
+def _download(server, directory, expected, sleep=lambda s: None):
+    dest = os.path.join(directory, "update_temp.zip")
+    downloader = ResumableDownload(server.url(PATH), dest, requests.get, expected_sha256=expected, sleep=sleep)
+    t0 = time.perf_counter()
+    downloader.run()
+    return downloader, time.perf_counter() - t0
+
+
+def scenario_drops(data, digest, directory, drop_every, rate):
+    server = MockUpdateServer({PATH: data}, drop_every=drop_every, rate=rate).start()
+    try:
+        downloader, elapsed = _download(server, directory, digest)
+        return {"ok": downloader.sha256 == digest, "seconds": round(elapsed, 2),
+                "reconnects": downloader.reconnects, "requests": len(server.requests),
+                "bytes_sent": server.bytes_sent, "final_chunk_kb": downloader.chunk_size // 1024,
+                # 旧实现每次断线都从 0 开始，在同样的断线间隔下永远下载不完
+                "legacy_completes": not drop_every or drop_every >= len(data)}
+    finally:
+        server.stop()
+
+
+def scenario_restart(data, digest, directory, drop_every):
+    server = MockUpdateServer({PATH: data}, drop_every=drop_every, max_drops=1).start()
+    try:
+        try:
+            _download(server, directory, digest, sleep=_abort)
+        except DownloadError:
+            pass  # 第一次运行在断线后立即退出，留下 .part
+        partial = os.path.getsize(os.path.join(directory, "update_temp.zip.part"))
+        downloader, elapsed = _download(server, directory, digest)
+        return {"ok": downloader.sha256 == digest, "resumed_from": downloader.resumed_from,
+                "partial_bytes": partial, "bytes_sent": server.bytes_sent,
+                # 旧实现重启后从 0 开始，已下载的部分白白浪费
+                "legacy_bytes": partial + len(data)}
+    finally:
+        server.stop()
+
+
+def scenario_changed(data, directory, drop_every):
+    new_data = data[::-1]
+    server = MockUpdateServer({PATH: data}, drop_every=drop_every, max_drops=1).start()
+    try:
+        try:
+            _download(server, directory, None, sleep=_abort)
+        except DownloadError:
+            pass
+        server.set_file(PATH, new_data)
+        downloader, _ = _download(server, directory, hashlib.sha256(new_data).hexdigest())
+        with open(os.path.join(directory, "update_temp.zip"), "rb") as f:
+            identical = f.read() == new_data
+        return {"ok": identical, "resumed_from": downloader.resumed_from}
+    finally:
+        server.stop()
+
+
+def scenario_corrupt(data, directory):
+    server = MockUpdateServer({PATH: data}).start()
+    try:
+        try:
+            _download(server, directory, "0" * 64)
+            return {"ok": False}
+        except IntegrityError:
+            leftovers = [name for name in os.listdir(directory) if name.startswith("update_temp")]
+            return {"ok": not leftovers, "leftovers": leftovers}
+    finally:
+        server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="断点续传下载基准")
+    parser.add_argument("--size", type=float, default=20, help="模拟发布文件大小 (MB)")
+    parser.add_argument("--drop-every", type=float, default=3, help="每个响应发送多少 MB 后断线")
+    parser.add_argument("--rate", type=float, default=0, help="限速 (MB/s，0 为不限速)")
+    args = parser.parse_args()
+
+    data = os.urandom(int(args.size * 1024 * 1024))
+    digest = hashlib.sha256(data).hexdigest()
+    drop_every = int(args.drop_every * 1024 * 1024)
+
+    results = {}
+    for name in ("drops", "restart", "changed", "corrupt"):
+        directory = tempfile.mkdtemp(prefix="gss_bench_")
+        try:
+            if name == "drops":
+                results[name] = scenario_drops(data, digest, directory, drop_every, args.rate * 1024 * 1024)
+            elif name == "restart":
+                results[name] = scenario_restart(data, digest, directory, drop_every)
+            elif name == "changed":
+                results[name] = scenario_changed(data, directory, drop_every)
+            else:
+                results[name] = scenario_corrupt(data, directory)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        print(f"{name:<8} {'通过' if results[name]['ok'] else '失败'}  {results[name]}")
+
+    print(json.dumps({"size_mb": args.size, "drop_every_mb": args.drop_every, "rate_mb_s": args.rate,
+                      "results": results}, indent=2, ensure_ascii=False))
+    exit_on_failure(results)
+
+
+if __name__ == "__main__":
+    main()
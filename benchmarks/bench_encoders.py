@@ -0,0 +1,47 @@
+"""
+编码器体积/耗时基准：用合成画面逐个测试所有可用的编码器。
+
+用法 (在仓库根目录执行):
+    python -m benchmarks.bench_encoders
+    python -m benchmarks.bench_encoders --resolution 3840 2160 --frames 5 --pattern noise
+"""
+import argparse
+import json
+
+from src.backends import SyntheticBackend
+from src.encoders import EncoderRegistry, PRESETS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="编码器体积/耗时基准")
+    parser.add_argument("--resolution", nargs=2, type=int, default=[3840, 2160])
+    parser.add_argument("--pattern", default="scene", choices=SyntheticBackend.PATTERNS)
+    parser.add_argument("--frames", type=int, default=3)
+    parser.add_argument("--encoders", nargs="+", default=list(PRESETS), choices=list(PRESETS))
+    args = parser.parse_args()
+
+    backend = SyntheticBackend(resolution=args.resolution, pattern=args.pattern)
+    frames = [backend.grab() for _ in range(args.frames)]
+    raw_size = len(frames[0].tobytes())
+
+    registry = EncoderRegistry()
+    for name in args.encoders:
+        try:
+            encoder = registry.get(name)
+        except Exception as e:
+            print(f"{name:<14} 跳过: {e}")
+            continue
+        for frame in frames:
+            encoder.encode(frame)
+
+    report = registry.report()
+    for name, summary in report.items():
+        ratio = summary["bytes_per_frame"] / raw_size
+        print(f"{name:<14} {summary['ms_per_frame']:9.2f} ms/帧 | "
+              f"{summary['bytes_per_frame'] / 1024 / 1024:8.2f} MB/帧 | 压缩比 {ratio:6.1%}")
+    print(json.dumps({"resolution": args.resolution, "pattern": args.pattern, "encoders": report},
+                     indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+文件名分配耗时基准：在已有 1 万个文件的目录里，同一秒内连续分配大量文件名，
+对比旧的 os.path.exists 逐个探测 (get_unique_filepath) 与 FilenameAllocator。
+
+用法 (在仓库根目录执行):
+    python -m benchmarks.bench_filenames
+    python -m benchmarks.bench_filenames --existing 10000 --allocations 500
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+from src.utils import FilenameAllocator, get_unique_filepath, write_temp_file
+
+
+def populate(directory, count, when):
+    """生成 count 个已有文件，其中一部分与待分配的名字处于同一秒 (制造冲突)"""
+    base = when.strftime("screenshot_%Y-%m-%d_%H-%M-%S")
+    for i in range(count):
+        name = f"{base}_{i}.png" if i < 100 else f"screenshot_old_{i}.png"
+        open(os.path.join(directory, name), "wb").close()
+
+
+def bench_legacy(directory, allocations, when):
+    base = when.strftime("screenshot_%Y-%m-%d_%H-%M-%S")
+    samples = []
+    for _ in range(allocations):
+        t0 = time.perf_counter()
+        filepath, _ = get_unique_filepath(directory, base, ".png")
+        open(filepath, "xb").close()
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def bench_allocator(directory, allocations, when):
+    allocator = FilenameAllocator()
+    t0 = time.perf_counter()
+    allocator.prime(directory)
+    prime_time = time.perf_counter() - t0
+    samples = []
+    for _ in range(allocations):
+        temp_path = write_temp_file(directory, b"")
+        t0 = time.perf_counter()
+        allocator.claim(temp_path, directory, ".png", when=when)
+        samples.append(time.perf_counter() - t0)
+    return samples, prime_time
+
+
+def summarize(samples):
+    quarter = max(1, len(samples) // 4)
+    return {
+        "first_quarter_us": round(sum(samples[:quarter]) / quarter * 1e6, 1),
+        "last_quarter_us": round(sum(samples[-quarter:]) / quarter * 1e6, 1),
+        "mean_us": round(sum(samples) / len(samples) * 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文件名分配耗时基准")
+    parser.add_argument("--existing", type=int, default=10000)
+    parser.add_argument("--allocations", type=int, default=500)
+    args = parser.parse_args()
+
+    when = datetime(2024, 1, 1, 12, 0, 0)
+    results = {}
+    for name in ("legacy", "allocator"):
+        directory = tempfile.mkdtemp(prefix="gss_bench_")
+        try:
+            populate(directory, args.existing, when)
+            if name == "legacy":
+                results[name] = summarize(bench_legacy(directory, args.allocations, when))
+            else:
+                samples, prime_time = bench_allocator(directory, args.allocations, when)
+                results[name] = summarize(samples)
+                results[name]["prime_ms"] = round(prime_time * 1000, 2)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    for name, summary in results.items():
+        print(f"{name:<10} 前 1/4: {summary['first_quarter_us']:9.1f} us | "
+              f"后 1/4: {summary['last_quarter_us']:9.1f} us | 平均: {summary['mean_us']:9.1f} us")
+    print(json.dumps({"existing": args.existing, "allocations": args.allocations, "results": results},
+                     indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+截图范围基准 (合成画面 + 假显示器/假前台窗口，可在 Linux 上运行)：
+
+几何计算 (不需要 Pillow):
+  window        窗口模式裁剪到前台窗口客户区
+  region        按进程名使用保存的区域 (相对客户区)，超出客户区的部分被裁掉
+  offscreen     窗口有一部分在屏幕外：只截显示器内的部分；完全在屏幕外或最小化时回退为整个显示器
+  stitch        多显示器拼接：画布为所有显示器的外接矩形，各块偏移正确
+  fallback      前台显示器句柄查不到 (显示器刚被拔掉) 时回退为主屏，没有主屏时为整个虚拟桌面
+
+抓帧 + 编码耗时 (对比整个显示器与裁剪后的窗口，以及串行与并行拼接):
+  crop_cost     带鱼屏上 1280x720 的窗口化游戏
+  stitch_cost   三台显示器拼接
+
+用法 (在仓库根目录执行):
+    python -m benchmarks.bench_geometry
+    python -m benchmarks.bench_geometry --rounds 10 --encoder png_fast
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import exit_on_failure
+from src.utils import (CapturePlan, GeometryProvider, FakeWindowSource, MonitorTopology, FakeMonitorSource)
+
+# 主屏带鱼屏 + 左侧竖屏 + 右侧 1080p (顶部不对齐，拼接画布上会有空隙)
+MONITORS = {1: (0, 0, 3440, 1440), 2: (-1080, -240, 0, 1680), 3: (3440, 360, 5360, 1440)}
+WINDOW = (400, 300, 1680, 1020)  # 1280x720 的窗口化游戏
+
+
+def _provider(rect, process="game.exe", foreground=1):
+    topology = MonitorTopology(FakeMonitorSource(MONITORS, foreground=foreground))
+    return GeometryProvider(topology, FakeWindowSource(rect, process))
+
+
+def scenario_window():
+    plan = _provider(WINDOW).plan("window")
+    return {"ok": plan.mode == "window" and plan.bounds == WINDOW and plan.size == (1280, 720),
+            "plan": repr(plan)}
+
+
+def scenario_region():
+    regions = {"Game.exe": [0, 620, 400, 800], "other.exe": [0, 0, 10, 10]}
+    plan = _provider(WINDOW).plan("window", regions)
+    # 区域下边界超出客户区 (720)，被裁到客户区内
+    expected = (WINDOW[0], WINDOW[1] + 620, WINDOW[0] + 400, WINDOW[3])
+    unmatched = _provider(WINDOW, process="notepad.exe").plan("window", regions)
+    return {"ok": plan.bounds == expected and unmatched.bounds == WINDOW, "plan": repr(plan)}
+
+
+def scenario_offscreen():
+    partial = _provider((3000, -100, 4000, 500)).plan("window")
+    gone = _provider((-5000, -5000, -4000, -4000)).plan("window")
+    minimized = _provider(None).plan("window")
+    ok = (partial.bounds == (3000, 0, 3440, 500)
+          and gone.mode == "monitor" and gone.bounds == MONITORS[1]
+          and minimized.mode == "monitor")
+    return {"ok": ok, "partial": partial.bounds, "offscreen": repr(gone)}
+
+
+def scenario_stitch():
+    plan = _provider(WINDOW).plan("all_monitors")
+    expected_offsets = {(0, 0), (1080, 240), (4520, 600)}
+    return {"ok": plan.bounds == (-1080, -240, 5360, 1680) and set(plan.offsets()) == expected_offsets,
+            "size": plan.size, "tiles": len(plan.tiles)}
+
+
+def scenario_fallback():
+    unknown = MonitorTopology(FakeMonitorSource(MONITORS, foreground=99)).current_bbox()
+    # 没有显示器包含原点时 (假布局)，回退为所有显示器的外接矩形
+    shifted = {1: (100, 0, 200, 100), 2: (200, 50, 300, 150)}
+    virtual = MonitorTopology(FakeMonitorSource(shifted, foreground=99)).current_bbox()
+    empty = MonitorTopology(FakeMonitorSource({}, foreground=99)).current_bbox()
+    ok = unknown == MONITORS[1] and virtual == (100, 0, 300, 150) and empty is not None
+    return {"ok": ok, "unknown": unknown, "virtual": virtual, "empty": empty}
+
+
+def _time(func, rounds):
+    samples = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return round(samples[len(samples) // 2] * 1000, 2)
+
+
+def scenario_crop_cost(rounds, encoder_name):
+    from src.backends import SyntheticBackend
+    from src.encoders import EncoderRegistry
+    backend = SyntheticBackend(resolution=(3440, 1440), animate=False)
+    encoder = EncoderRegistry().get(encoder_name)
+    result = {}
+    for mode in ("monitor", "window"):
+        plan = _provider(WINDOW).plan(mode)
+        backend.grab(plan.tiles[0])  # 预先渲染该尺寸
+        result[f"{mode}_pixels"] = plan.pixels
+        result[f"{mode}_grab_ms"] = _time(lambda: backend.grab(plan.tiles[0]), rounds)
+        image = backend.grab(plan.tiles[0])
+        result[f"{mode}_encode_ms"] = _time(lambda: encoder.encode(image), rounds)
+    result["pixel_ratio"] = round(result["window_pixels"] / result["monitor_pixels"], 3)
+    result["encode_ratio"] = round(result["window_encode_ms"] / max(0.01, result["monitor_encode_ms"]), 3)
+    result["ok"] = result["window_encode_ms"] < result["monitor_encode_ms"]
+    return result
+
+
+def scenario_stitch_cost(rounds):
+    from src.backends import SyntheticBackend, grab_plan
+    plan = _provider(WINDOW).plan("all_monitors")
+    backends = {tile: SyntheticBackend(resolution=(tile[2] - tile[0], tile[3] - tile[1]), animate=False)
+                for tile in plan.tiles}
+
+    def grab(tile):
+        # 模拟 GDI BitBlt：耗时与像素数成正比，期间释放 GIL
+        time.sleep((tile[2] - tile[0]) * (tile[3] - tile[1]) / 1e9 * 5)
+        return backends[tile].grab(tile)
+
+    stitched = grab_plan(plan, grab)
+    ok = stitched.size == plan.size
+    for tile, offset in zip(plan.tiles, plan.offsets()):
+        box = (offset[0], offset[1], offset[0] + tile[2] - tile[0], offset[1] + tile[3] - tile[1])
+        ok = ok and stitched.crop(box).tobytes() == backends[tile].grab(tile).tobytes()
+    with ThreadPoolExecutor(max_workers=len(plan.tiles)) as executor:
+        parallel = _time(lambda: grab_plan(plan, grab, executor), rounds)
+    serial = _time(lambda: grab_plan(plan, grab), rounds)
+    single = CapturePlan([MONITORS[1]])
+    return {"ok": ok, "serial_ms": serial, "parallel_ms": parallel,
+            "single_monitor_ms": _time(lambda: grab_plan(single, grab), rounds)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="截图范围 (窗口裁剪 / 多显示器拼接) 基准")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--encoder", default="png_fast")
+    args = parser.parse_args()
+
+    scenarios = {
+        "window": scenario_window,
+        "region": scenario_region,
+        "offscreen": scenario_offscreen,
+        "stitch": scenario_stitch,
+        "fallback": scenario_fallback,
+        "crop_cost": lambda: scenario_crop_cost(args.rounds, args.encoder),
+        "stitch_cost": lambda: scenario_stitch_cost(args.rounds),
+    }
+    results = {}
+    for name, scenario in scenarios.items():
+        try:
+            results[name] = scenario()
+        except ImportError as e:
+            print(f"{name:<11} 跳过: {e}")
+            continue
+        print(f"{name:<11} {'通过' if results[name]['ok'] else '失败'}  {results[name]}")
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    exit_on_failure(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+单实例命令转发基准 (Linux / macOS，用锁文件 + Unix 域套接字模拟 Windows 的 Mutex + 命名管道)。
+
+场景:
+  forward     已有实例在运行，第二个进程带 --capture 启动：转发命令后立即退出
+  takeover    不带命令再次启动：请求旧实例正常退出 (旧实例先完成收尾)，然后接管
+  unresponsive 旧实例卡死 (SIGSTOP)：连接超时后才强制结束并接管
+  shutdown    --shutdown：旧实例收尾退出，新进程不接管、直接退出
+
+每个实例都是独立的子进程 (本文件的 --child 模式)，收到的命令写入共享目录下的 events.log。
+forward_ms 为第二个进程从开始抢锁到转发完成的耗时，second_process_ms 另外包含 Python 解释器的启动时间。
+
+用法 (在仓库根目录执行):
+    python -m benchmarks.bench_instance
+"""
+import argparse
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import exit_on_failure
+from src.utils.instance import InstanceGuard, CONNECT_TIMEOUT
+
+NAME = "GssBench"
+# 模拟旧实例退出前等待在途截图写盘
+FLUSH_DELAY = 0.2
+
+
+def child(directory, command):
+    """一个最小的 "程序实例"：抢锁或转发命令，作为唯一实例时一直运行直到收到 shutdown"""
+    events = os.path.join(directory, "events.log")
+
+    def record(event, value=0.0):
+        with open(events, "a") as f:
+            f.write(f"{os.getpid()} {event} {value}\n")
+
+    t0 = time.perf_counter()
+    guard = InstanceGuard(NAME, directory)
+    if not guard.enforce(command):
+        record(f"exit-after-{command or 'none'}", (time.perf_counter() - t0) * 1000)
+        return
+    guard.serve()
+    record("running")
+
+    def shutdown():
+        time.sleep(FLUSH_DELAY)
+        record("shutdown")
+        os._exit(0)
+
+    guard.on("capture", lambda: record("capture"))
+    guard.on("shutdown", shutdown)
+    while True:
+        time.sleep(1)
+
+
+def _spawn(directory, command=None):
+    args = [sys.executable, "-m", "benchmarks.bench_instance", "--child", directory]
+    if command:
+        args += ["--command", command]
+    return subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _events(directory):
+    try:
+        with open(os.path.join(directory, "events.log")) as f:
+            return [line.split()[:2] for line in f]
+    except OSError:
+        return []
+
+
+def _event_value(directory, pid, event):
+    with open(os.path.join(directory, "events.log")) as f:
+        for line in f:
+            fields = line.split()
+            if fields[:2] == [str(pid), event]:
+                return round(float(fields[2]), 2)
+    return None
+
+
+def _wait_for(directory, pid, event, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if [str(pid), event] in _events(directory):
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def _start_first(directory):
+    first = _spawn(directory)
+    if not _wait_for(directory, first.pid, "running"):
+        raise RuntimeError("第一个实例启动失败")
+    return first
+
+
+def _timed(directory, command=None):
+    t0 = time.perf_counter()
+    proc = _spawn(directory, command)
+    return proc, t0
+
+
+def scenario_forward(directory):
+    first = _start_first(directory)
+    try:
+        second, t0 = _timed(directory, "capture")
+        second.wait(10)
+        elapsed = time.perf_counter() - t0
+        received = _wait_for(directory, first.pid, "capture", timeout=2)
+        return {"ok": received and second.returncode == 0 and first.poll() is None,
+                "forward_ms": _event_value(directory, second.pid, "exit-after-capture"),
+                "second_process_ms": round(elapsed * 1000, 1)}
+    finally:
+        first.kill()
+        first.wait()
+
+
+def scenario_takeover(directory):
+    first = _start_first(directory)
+    second, t0 = _timed(directory)
+    try:
+        running = _wait_for(directory, second.pid, "running")
+        elapsed = time.perf_counter() - t0
+        graceful = [str(first.pid), "shutdown"] in _events(directory)
+        first.wait(5)
+        return {"ok": running and graceful, "takeover_ms": round(elapsed * 1000, 1),
+                "old_flush_ms": FLUSH_DELAY * 1000, "graceful": graceful}
+    finally:
+        second.kill()
+        second.wait()
+
+
+def scenario_unresponsive(directory):
+    first = _start_first(directory)
+    os.kill(first.pid, signal.SIGSTOP)
+    second, t0 = _timed(directory)
+    try:
+        running = _wait_for(directory, second.pid, "running", timeout=CONNECT_TIMEOUT + 10)
+        elapsed = time.perf_counter() - t0
+        first.wait(5)
+        return {"ok": running and first.returncode == -signal.SIGKILL, "takeover_ms": round(elapsed * 1000, 1),
+                "connect_timeout_ms": CONNECT_TIMEOUT * 1000}
+    finally:
+        second.kill()
+        second.wait()
+
+
+def scenario_shutdown(directory):
+    first = _start_first(directory)
+    second, t0 = _timed(directory, "shutdown")
+    second.wait(10)
+    elapsed = time.perf_counter() - t0
+    first.wait(5)
+    events = _events(directory)
+    return {"ok": [str(first.pid), "shutdown"] in events and [str(second.pid), "exit-after-shutdown"] in events,
+            "second_process_ms": round(elapsed * 1000, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="单实例命令转发基准")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--command", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child, args.command)
+        return
+    if sys.platform == "win32":
+        print("该基准使用 Unix 域套接字和 SIGSTOP，仅支持 Linux / macOS")
+        return
+
+    results = {}
+    for name, scenario in (("forward", scenario_forward), ("takeover", scenario_takeover),
+                           ("unresponsive", scenario_unresponsive), ("shutdown", scenario_shutdown)):
+        directory = tempfile.mkdtemp(prefix="gss_bench_")
+        try:
+            results[name] = scenario(directory)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        print(f"{name:<13} {'通过' if results[name]['ok'] else '失败'}  {results[name]}")
+    # 旧实现：taskkill 强制结束 (在途截图丢失) + 固定等待 0.5 秒，且无法转发命令
+    print(json.dumps({"legacy_fixed_delay_ms": 500, "results": results}, indent=2, ensure_ascii=False))
+    exit_on_failure(results)
+
+
+if __name__ == "__main__":
+    main()
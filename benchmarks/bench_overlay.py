@@ -0,0 +1,74 @@
+"""
+提示窗队列基准：对比旧的 50 ms 轮询与事件唤醒两种方式
+  - 空闲期间 UI 线程被唤醒的次数
+  - 截图线程投递消息到提示窗可见的延迟
+
+需要图形界面 (Windows 桌面或带 DISPLAY 的 Linux)。
+用法 (在仓库根目录执行):
+    python -m benchmarks.bench_overlay
+    python -m benchmarks.bench_overlay --idle 10 --messages 50
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import tkinter as tk
+
+from src.ui.overlay import NotificationOverlay, OverlayQueue
+
+
+def run_mode(mode, idle_seconds, messages, spacing_ms):
+    root = tk.Tk()
+    gui_queue = OverlayQueue()
+    overlay = NotificationOverlay(root, gui_queue)
+    if mode == "poll":
+        overlay._poll()  # 旧行为：waker 为空，只靠 after(50) 轮询
+    else:
+        overlay.start()
+
+    result = {}
+
+    def producer():
+        # 先空闲一段时间，统计没有任何消息时的唤醒次数
+        time.sleep(idle_seconds)
+        result["idle_wakeups"] = overlay.wakeups
+        for i in range(messages):
+            time.sleep(random.uniform(spacing_ms[0], spacing_ms[1]) / 1000)
+            gui_queue.put(f"bench_{i:04d}.png")
+        time.sleep(0.5)
+        root.after(0, root.quit)
+
+    threading.Thread(target=producer, daemon=True).start()
+    root.mainloop()
+    stats = overlay.stats()
+    root.destroy()
+
+    result["idle_wakeups_per_s"] = round(result["idle_wakeups"] / idle_seconds, 2)
+    result.update({k: v for k, v in stats.items() if k.startswith("latency")})
+    result["toasts"] = stats["toasts"]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="提示窗队列唤醒/延迟基准")
+    parser.add_argument("--idle", type=float, default=5.0, help="空闲统计时长 (秒)")
+    parser.add_argument("--messages", type=int, default=30)
+    parser.add_argument("--min-spacing", type=float, default=80, help="消息最小间隔 (毫秒)")
+    parser.add_argument("--max-spacing", type=float, default=250, help="消息最大间隔 (毫秒)")
+    args = parser.parse_args()
+
+    results = {}
+    for mode in ("poll", "event"):
+        results[mode] = run_mode(mode, args.idle, args.messages, (args.min_spacing, args.max_spacing))
+
+    for mode, summary in results.items():
+        print(f"{mode:<6} 空闲唤醒: {summary['idle_wakeups_per_s']:6.2f} 次/秒 | "
+              f"延迟 平均 {summary.get('latency_avg_ms', 0):6.2f} ms, "
+              f"p95 {summary.get('latency_p95_ms', 0):6.2f} ms, 最大 {summary.get('latency_max_ms', 0):6.2f} ms")
+    print(json.dumps({"idle_seconds": args.idle, "messages": args.messages, "results": results},
+                     indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+流式安装基准：对比 "先下载 update_temp.zip 再用 zipfile 解压" 与 "边下载边解压到 GameShadowSnap.new"
+的峰值磁盘占用和文件读写量。更新包由本地模拟服务器提供。
+
+场景:
+  legacy      旧流程：zip 完整写盘 -> 重新打开读取 -> 写出 EXE
+  stream      新流程：EXE 条目边下载边解压，zip 只顺序写入 .part (不再重新读取)
+  drops       新流程 + 下载中途多次断线 (本次运行内续传，解压状态保留)
+  restart     新流程 + 第一次断线时进程退出，重启后把 .part 重新喂给解压器，再从断点续传
+  descriptor  zip 由不可 seek 的写入端生成 (大小写在数据描述符里)，仍可流式解压
+  spill       EXE 条目未压缩且带数据描述符，流中无法确定边界，回退为落盘后解压
+
+文件读写量取自 /proc/self/io 的 rchar/wchar (仅 Linux；Python 的 socket 收发走 send/recv，不计入其中)。
+
+用法 (在仓库根目录执行):
+    python -m benchmarks.bench_stream_install
+    python -m benchmarks.bench_stream_install --size 200 --drop-every 16
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+
+import requests
+
+from benchmarks import exit_on_failure
+from benchmarks.mock_update_server import MockUpdateServer
+from src.download import ResumableDownload
+from src.zipstream import ZipMemberStream
+
+PATH = "/GameShadowSnap.zip"
+EXE_NAME = "GameShadowSnap.exe"
+CONFIG = b'{"hotkey": "f12", "save_dir": "./screenshots"}'
+
+
+class _Unseekable:
+    """只能顺序写入的输出，zipfile 会改用数据描述符记录大小"""
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+
+    def write(self, data):
+        return self.buffer.write(data)
+
+    def flush(self):
+        pass
+
+
+def make_archive(exe, seekable=True, stored=False):
+    """结构与 CI 生成的更新包一致：EXE + 默认 config.json"""
+    target = io.BytesIO() if seekable else _Unseekable()
+    compression = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+    with zipfile.ZipFile(target, "w", compression, compresslevel=1) as zf:
+        zf.writestr(EXE_NAME, exe)
+        zf.writestr("config.json", CONFIG)
+    return target.getvalue() if seekable else target.buffer.getvalue()
+
+
+def make_exe(size):
+    """PyInstaller 的 EXE 大部分是已压缩的数据，这里用 3/4 随机 + 1/4 可压缩内容模拟"""
+    random_part = os.urandom(size * 3 // 4)
+    return random_part + bytes(range(256)) * ((size - len(random_part)) // 256)
+
+
+class DiskSampler:
+    """后台线程定时统计目录中文件总大小，记录峰值"""
+
+    def __init__(self, directory, interval=0.002):
+        self.directory = directory
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            total = 0
+            for name in os.listdir(self.directory):
+                try:
+                    total += os.path.getsize(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+            self.peak = max(self.peak, total)
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def _proc_io():
+    try:
+        with open("/proc/self/io", "r") as f:
+            fields = dict(line.split(": ") for line in f.read().splitlines())
+        return int(fields["rchar"]), int(fields["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def install_legacy(url, directory, digest):
+    temp_zip = os.path.join(directory, "update_temp.zip")
+    ResumableDownload(url, temp_zip, requests.get, expected_sha256=digest).run()
+    with zipfile.ZipFile(temp_zip, "r") as zf:
+        with zf.open(EXE_NAME) as source, open(os.path.join(directory, "GameShadowSnap.new"), "wb") as target:
+            shutil.copyfileobj(source, target)
+    os.remove(temp_zip)
+    return None
+
+
+def install_stream(url, directory, digest):
+    extractor = ZipMemberStream(EXE_NAME, os.path.join(directory, "GameShadowSnap.new"))
+    downloader = ResumableDownload(url, extractor.out_path, requests.get, expected_sha256=digest,
+                                   sleep=lambda s: None, sink=extractor)
+    downloader.run()
+    return {"reconnects": downloader.reconnects, "spilled_bytes": extractor.spilled_bytes}
+
+
+class _Killed(Exception):
+    """模拟下载过程中进程被结束"""
+
+
+def install_restart(url, directory, digest):
+    out_path = os.path.join(directory, "GameShadowSnap.new")
+
+    def crash(delay):
+        raise _Killed()
+
+    first = ZipMemberStream(EXE_NAME, out_path)
+    try:
+        ResumableDownload(url, out_path, requests.get, expected_sha256=digest, sleep=crash, sink=first).run()
+    except _Killed:
+        first.abort()  # 进程退出后内存中的解压状态全部丢失，只剩 .part 和 .part.json
+    extractor = ZipMemberStream(EXE_NAME, out_path)
+    downloader = ResumableDownload(url, out_path, requests.get, expected_sha256=digest,
+                                   sleep=lambda s: None, sink=extractor)
+    downloader.run()
+    return {"resumed_from_mb": round(downloader.resumed_from / 1024 / 1024, 1), "reconnects": downloader.reconnects}
+
+
+def run_scenario(archive, exe, install, drop_every=0):
+    digest = hashlib.sha256(archive).hexdigest()
+    directory = tempfile.mkdtemp(prefix="gss_bench_")
+    server = MockUpdateServer({PATH: archive}, drop_every=drop_every).start()
+    try:
+        io_before = _proc_io()
+        t0 = time.perf_counter()
+        with DiskSampler(directory) as sampler:
+            extra = install(server.url(PATH), directory, digest)
+        elapsed = time.perf_counter() - t0
+        io_after = _proc_io()
+        with open(os.path.join(directory, "GameShadowSnap.new"), "rb") as f:
+            identical = f.read() == exe
+        leftovers = sorted(set(os.listdir(directory)) - {"GameShadowSnap.new"})
+        result = {"ok": identical and not leftovers, "seconds": round(elapsed, 2),
+                  "peak_disk_mb": round(sampler.peak / 1024 / 1024, 1), "leftovers": leftovers}
+        if io_before and io_after:
+            result["file_read_mb"] = round((io_after[0] - io_before[0]) / 1024 / 1024, 1)
+            result["file_write_mb"] = round((io_after[1] - io_before[1]) / 1024 / 1024, 1)
+        if extra:
+            result.update(extra)
+        return result
+    finally:
+        server.stop()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流式安装基准")
+    parser.add_argument("--size", type=float, default=100, help="模拟 EXE 大小 (MB)")
+    parser.add_argument("--drop-every", type=float, default=24, help="drops 场景中每个响应发送多少 MB 后断线")
+    args = parser.parse_args()
+
+    exe = make_exe(int(args.size * 1024 * 1024))
+    archive = make_archive(exe)
+    scenarios = {
+        "legacy": lambda: run_scenario(archive, exe, install_legacy),
+        "stream": lambda: run_scenario(archive, exe, install_stream),
+        "drops": lambda: run_scenario(archive, exe, install_stream, int(args.drop_every * 1024 * 1024)),
+        "restart": lambda: run_scenario(archive, exe, install_restart, int(args.drop_every * 1024 * 1024)),
+        "descriptor": lambda: run_scenario(make_archive(exe, seekable=False), exe, install_stream),
+        "spill": lambda: run_scenario(make_archive(exe, seekable=False, stored=True), exe, install_stream),
+    }
+    results = {}
+    for name, scenario in scenarios.items():
+        results[name] = scenario()
+        if name == "restart":
+            results[name]["ok"] = results[name]["ok"] and results[name]["resumed_from_mb"] > 0
+        print(f"{name:<11} {'通过' if results[name]['ok'] else '失败'}  {results[name]}")
+
+    legacy, stream = results["legacy"], results["stream"]
+    summary = {"peak_disk_ratio": round(stream["peak_disk_mb"] / max(0.1, legacy["peak_disk_mb"]), 2)}
+    if "file_write_mb" in legacy:
+        legacy_io = legacy["file_read_mb"] + legacy["file_write_mb"]
+        summary["file_io_ratio"] = round((stream["file_read_mb"] + stream["file_write_mb"]) / max(0.1, legacy_io), 2)
+    print(json.dumps({"exe_mb": args.size, "archive_mb": round(len(archive) / 1024 / 1024, 1),
+                      "results": results, "summary": summary}, indent=2, ensure_ascii=False))
+    exit_on_failure(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+更新检查基准：用本地模拟的 GitHub API 验证 release 信息的条件请求与限流退避。
+
+场景:
+  conditional  首次 200 并缓存 ETag，之后 304 (零解析、零配额)，发布新版本后重新获取
+  interval     最小检查间隔内不发请求
+  persist      重建 ReleaseChecker (模拟重启) 后仍能用磁盘上的 ETag 得到 304
+  ratelimit    响应头显示配额已用完 (X-RateLimit-Remaining: 0) 时，重置时间之前主动停止请求
+  retry_after  二级限流 (429 + Retry-After，无配额头)：被拒绝后按 Retry-After 退避
+
+用法 (在仓库根目录执行):
+    python -m benchmarks.bench_update_check
+"""
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import requests
+
+from benchmarks import exit_on_failure
+from benchmarks.mock_update_server import MockUpdateServer
+from src.release_info import ReleaseChecker, RateLimited, CACHE_FILENAME
+
+API_PATH = "/repos/StreLitziaYc/game_shadow_snap/releases/latest"
+
+
+def make_release(tag):
+    """体积接近真实 GitHub 响应的 release JSON"""
+    assets = [{
+        "name": name,
+        "browser_download_url": f"https://example.invalid/{tag}/{name}",
+        "size": 40 * 1024 * 1024,
+        "digest": "sha256:" + "ab" * 32,
+        "uploader": {"login": "github-actions[bot]", "id": 41898282, "type": "Bot"},
+        "label": "", "state": "uploaded", "download_count": 1234,
+    } for name in ("GameShadowSnap.zip", "GameShadowSnap.zip.sha256")]
+    body = {"tag_name": tag, "name": tag, "body": "更新说明\n" * 200, "assets": assets,
+            "author": {"login": "StreLitziaYc"}, "draft": False, "prerelease": False}
+    return json.dumps(body, ensure_ascii=False).encode("utf-8")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self):
+        return self.now
+
+
+def checker_for(server, directory, clock, min_interval=3600):
+    return ReleaseChecker(server.url(API_PATH), requests.get, os.path.join(directory, CACHE_FILENAME),
+                          min_interval=min_interval, clock=clock)
+
+
+def scenario_conditional(directory):
+    server = MockUpdateServer({API_PATH: make_release("v1.0.0")}).start()
+    try:
+        clock = FakeClock()
+        checker = checker_for(server, directory, clock)
+        sources = [checker.fetch(force=True)[1]]
+        sent_first = server.bytes_sent
+        for _ in range(5):
+            sources.append(checker.fetch(force=True)[1])
+        sent_conditional = server.bytes_sent - sent_first
+        server.set_file(API_PATH, make_release("v1.1.0"))
+        release, source = checker.fetch(force=True)
+        sources.append(source)
+        return {"ok": sources == ["network"] + ["not_modified"] * 5 + ["network"] and release["tag_name"] == "v1.1.0",
+                "sources": sources, "first_body_bytes": sent_first, "five_304_body_bytes": sent_conditional}
+    finally:
+        server.stop()
+
+
+def scenario_interval(directory):
+    server = MockUpdateServer({API_PATH: make_release("v1.0.0")}).start()
+    try:
+        clock = FakeClock()
+        checker = checker_for(server, directory, clock, min_interval=600)
+        checker.fetch()
+        clock.now += 300
+        _, inside = checker.fetch()
+        clock.now += 400
+        _, after = checker.fetch()
+        return {"ok": inside == "throttled" and after == "not_modified" and len(server.requests) == 2,
+                "requests": len(server.requests), "inside": inside, "after": after}
+    finally:
+        server.stop()
+
+
+def scenario_persist(directory):
+    server = MockUpdateServer({API_PATH: make_release("v1.0.0")}).start()
+    try:
+        clock = FakeClock()
+        checker_for(server, directory, clock).fetch(force=True)
+        release, source = checker_for(server, directory, clock).fetch(force=True)
+        return {"ok": source == "not_modified" and release["tag_name"] == "v1.0.0", "source": source}
+    finally:
+        server.stop()
+
+
+def scenario_ratelimit(directory, retry_after=0):
+    server = MockUpdateServer({API_PATH: make_release("v1.0.0")}, api_limit=2, api_window=120,
+                              retry_after=retry_after).start()
+    try:
+        clock = FakeClock()
+        checker = checker_for(server, directory, clock, min_interval=0)
+        # 每次都换一个 ETag，迫使请求消耗配额
+        sources = []
+        for i in range(3):
+            server.set_file(API_PATH, make_release(f"v1.0.{i}"))
+            try:
+                sources.append(checker.fetch()[1])
+            except RateLimited:
+                sources.append("limited")
+        requests_before = len(server.requests)
+        sources.append(checker.fetch()[1])  # 退避期间：不应发请求
+        suppressed = len(server.requests) == requests_before
+        clock.now = max(clock.now, checker.cache.retry_after) + 1
+        server.api_reset_at = time.time()  # 服务端同时重置配额
+        sources.append(checker.fetch()[1])
+        if retry_after:
+            expected = ["network", "network", "limited", "rate_limited", "network"]
+        else:
+            # 第二次响应已带 Remaining: 0，第三次请求根本不会发出
+            expected = ["network", "network", "rate_limited", "rate_limited", "network"]
+        return {"ok": sources == expected and suppressed, "sources": sources,
+                "server_rejections": server.rate_limited}
+    finally:
+        server.stop()
+
+
+def main():
+    results = {}
+    scenarios = {
+        "conditional": scenario_conditional,
+        "interval": scenario_interval,
+        "persist": scenario_persist,
+        "ratelimit": scenario_ratelimit,
+        "retry_after": lambda d: scenario_ratelimit(d, retry_after=30),
+    }
+    for name, scenario in scenarios.items():
+        directory = tempfile.mkdtemp(prefix="gss_bench_")
+        try:
+            results[name] = scenario(directory)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        print(f"{name:<12} {'通过' if results[name]['ok'] else '失败'}  {results[name]}")
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    exit_on_failure(results)
+
+
+if __name__ == "__main__":
+    main()
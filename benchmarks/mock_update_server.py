@@ -0,0 +1,214 @@
+"""
+本地模拟的更新服务器 (只用标准库)，用于在没有网络的环境下验证更新下载：
+  - 支持 Range / If-Range / ETag，行为与 GitHub 发布文件的 CDN 一致
+  - 可注入断线 (每个响应最多发送 N 字节后直接断开连接) 和限速 (慢速链路)
+  - API 路径 (/repos/...) 模拟 GitHub 的条件请求 (If-None-Match -> 304) 和限流响应头
+
+在其他基准中使用:
+    server = MockUpdateServer({"/GameShadowSnap.zip": data}, drop_every=5 * 1024 * 1024)
+    server.start()
+    url = server.url("/GameShadowSnap.zip")
+    ...
+    server.stop()
+
+单独运行 (在仓库根目录执行):
+    python -m benchmarks.mock_update_server --size 20 --drop-every 4 --rate 5
+"""
+import argparse
+import hashlib
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SEND_BLOCK = 64 * 1024
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass  # 基准输出保持干净
+
+    def do_GET(self):
+        server = self.server.owner
+        server.requests.append((self.path, dict(self.headers)))
+        data = server.files.get(self.path.split("?")[0])
+        if data is None:
+            self.send_error(404)
+            return
+
+        etag = server.etags[self.path.split("?")[0]]
+        if self.headers.get("If-None-Match") == etag:
+            # 与 GitHub 一致：304 不消耗配额
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self._send_rate_headers(server)
+            self.end_headers()
+            return
+        if self.path.startswith(server.api_prefix) and not self._check_rate_limit(server):
+            return
+        start, end, status = 0, len(data) - 1, 200
+        range_header = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        if range_header and server.support_range and (not if_range or if_range == etag):
+            match = re.match(r"bytes=(\d+)-(\d*)", range_header)
+            if match:
+                start = int(match.group(1))
+                end = int(match.group(2)) if match.group(2) else len(data) - 1
+                if start >= len(data):
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{len(data)}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                status = 206
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("ETag", etag)
+        self.send_header("Accept-Ranges", "bytes" if server.support_range else "none")
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        if self.path.startswith(server.api_prefix):
+            self._send_rate_headers(server)
+        self.end_headers()
+        server.bytes_sent += self._send_body(server, data, start, end + 1)
+
+    def _send_rate_headers(self, server):
+        # 二级限流 (Retry-After) 模式下不给出配额信息，客户端只能被动退避
+        if server.api_limit is None or server.retry_after:
+            return
+        self.send_header("X-RateLimit-Limit", str(server.api_limit))
+        self.send_header("X-RateLimit-Remaining", str(max(0, server.api_limit - server.api_used)))
+        self.send_header("X-RateLimit-Reset", str(int(server.api_reset_at)))
+
+    def _check_rate_limit(self, server):
+        """配额用完时返回 403 (或带 Retry-After 的 429)，否则计数并放行"""
+        if server.api_limit is None:
+            return True
+        if time.time() >= server.api_reset_at:
+            server.api_used = 0
+            server.api_reset_at = time.time() + server.api_window
+        if server.api_used < server.api_limit:
+            server.api_used += 1
+            return True
+        server.rate_limited += 1
+        body = b'{"message": "API rate limit exceeded", "documentation_url": "https://docs.github.com/rest"}'
+        self.send_response(429 if server.retry_after else 403)
+        if server.retry_after:
+            self.send_header("Retry-After", str(server.retry_after))
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self._send_rate_headers(server)
+        self.end_headers()
+        self.wfile.write(body)
+        return False
+
+    def _send_body(self, server, data, start, stop):
+        sent = 0
+        drop = server.should_drop()
+        t0 = time.perf_counter()
+        position = start
+        while position < stop:
+            block = data[position:min(stop, position + SEND_BLOCK)]
+            if drop and sent + len(block) > server.drop_every:
+                # 模拟断线：发一部分后直接关闭连接
+                self.wfile.write(block[:server.drop_every - sent])
+                self.wfile.flush()
+                self.close_connection = True
+                server.drops_done += 1
+                return server.drop_every
+            self.wfile.write(block)
+            sent += len(block)
+            position += len(block)
+            if server.rate:
+                # 限速：按已发送字节数计算应到达的时间
+                delay = sent / server.rate - (time.perf_counter() - t0)
+                if delay > 0:
+                    time.sleep(delay)
+        return sent
+
+
+class MockUpdateServer:
+    """
+    files: {路径: bytes}
+    drop_every: 每个响应最多发送多少字节后断开 (0 为不断线)
+    max_drops: 最多注入多少次断线 (None 为不限)
+    rate: 限速 (字节/秒，0 为不限速)
+    api_limit: API 路径在每个 api_window 秒内允许的请求数 (None 为不限流)
+    retry_after: 限流时返回 429 + Retry-After (秒) 而不是 403 + X-RateLimit-Reset
+    """
+
+    def __init__(self, files, drop_every=0, max_drops=None, rate=0, support_range=True, port=0,
+                 api_limit=None, api_window=3600, retry_after=0, api_prefix="/repos/"):
+        self.files = dict(files)
+        self.etags = {path: f'"{hashlib.sha256(data).hexdigest()[:16]}"' for path, data in self.files.items()}
+        self.drop_every = drop_every
+        self.max_drops = max_drops
+        self.rate = rate
+        self.support_range = support_range
+        self.requests = []
+        self.bytes_sent = 0
+        self.drops_done = 0
+        self.api_prefix = api_prefix
+        self.api_limit = api_limit
+        self.api_window = api_window
+        self.api_used = 0
+        self.api_reset_at = time.time() + api_window
+        self.retry_after = retry_after
+        self.rate_limited = 0
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.owner = self
+        self._thread = None
+
+    def should_drop(self):
+        if not self.drop_every:
+            return False
+        return self.max_drops is None or self.drops_done < self.max_drops
+
+    def set_file(self, path, data):
+        """替换文件内容 (模拟服务器上发布了新版本)"""
+        self.files[path] = data
+        self.etags[path] = f'"{hashlib.sha256(data).hexdigest()[:16]}"'
+
+    def url(self, path="/"):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}{path}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-update-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟更新服务器")
+    parser.add_argument("--size", type=float, default=20, help="发布文件大小 (MB)")
+    parser.add_argument("--drop-every", type=float, default=0, help="每个响应发送多少 MB 后断线")
+    parser.add_argument("--rate", type=float, default=0, help="限速 (MB/s)")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    data = os.urandom(int(args.size * 1024 * 1024))
+    server = MockUpdateServer({"/GameShadowSnap.zip": data},
+                              drop_every=int(args.drop_every * 1024 * 1024),
+                              rate=args.rate * 1024 * 1024, port=args.port).start()
+    print(f"服务地址: {server.url('/GameShadowSnap.zip')}")
+    print(f"SHA-256: {hashlib.sha256(data).hexdigest()}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
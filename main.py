@@ -1,63 +1,165 @@
 
+# 最先导入：设置 GSS_PROFILE_STARTUP=1 时从这里开始统计每个模块的导入耗时
+from src import startup
+
+import argparse
 import threading
-import queue
-import tkinter as tk
+import multiprocessing
 import os
 
-from src.logger import setup_redirects
-from src.updater import UpdateManager
-from src.utils import set_dpi_awareness, enforce_single_instance
-from src.capture import CaptureManager
-from src.ui.overlay import NotificationOverlay
-from src.ui.tray import setup_tray
+from src.logger import setup_redirects, configure_logging, flush_logs
+# 热键就绪之前只导入单实例锁；src.utils 的其他子模块和完整的配置模块在热键注册之后才加载
+from src.utils.instance import enforce_single_instance, start_instance_server, on_instance_command
+
+# 退出时等待在途截图写盘的最长时间 (秒)
+EXIT_FLUSH_TIMEOUT = 10
+
+
+def apply_log_config():
+    from src.config import config
+    configure_logging(level=config.get('log_level', 'INFO'),
+                      max_bytes=config.get('log_max_mb', 5) * 1024 * 1024,
+                      backups=config.get('log_backups', 3))
+
+
+def apply_metrics_config():
+    from src.config import config
+    from src.metrics import metrics
+    metrics.enabled = config.get('metrics_enabled', False)
+    metrics.serve(config.get('metrics_port', 0) if metrics.enabled else 0)
+
+
+def parse_args():
+    """命令行参数：程序已在运行时，这些命令会转发给它执行，当前进程立即退出"""
+    parser = argparse.ArgumentParser(description="GameShadowSnap")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--capture", dest="command", action="store_const", const="capture", help="立即截图")
+    group.add_argument("--open-folder", dest="command", action="store_const", const="open_folder",
+                       help="打开保存文件夹")
+    group.add_argument("--reload-config", dest="command", action="store_const", const="reload_config",
+                       help="重新加载 config.json")
+    group.add_argument("--shutdown", dest="command", action="store_const", const="shutdown",
+                       help="让正在运行的实例保存完在途截图后退出")
+    # PyInstaller / multiprocessing 可能附带额外参数，忽略即可
+    args, _ = parser.parse_known_args()
+    return args
+
+
+def open_save_folder():
+    from src.config import config
+    os.startfile(os.path.abspath(config.get('save_dir')))
 
 
 def main():
-    # 0. 强制单实例 (最先执行)
-    enforce_single_instance()
+    args = parse_args()
+
+    # 0. 强制单实例 (最先执行)：已有实例在运行时把命令转发过去后直接退出
+    #    开发环境 (未打包) 同样生效，--capture 等命令才能转发；只有强制结束无响应的旧实例限于打包环境
+    if not enforce_single_instance(args.command):
+        flush_logs()
+        return
+    startup.mark("single_instance")
+
+    # 0.5 立刻挂上主热键 (只依赖 keyboard 和 config.json 中的热键字段)
+    #     截图模块加载期间的按键会在加载完成后补拍 (拍到的是加载完成时的画面)
+    early_hotkey = None
+    settings = startup.read_hotkey_settings()
+    if settings is not None:
+        try:
+            early_hotkey = startup.EarlyHotkey(*settings)
+            startup.mark("hotkey_armed")
+        except Exception as e:
+            print(f"[Startup] 提前注册热键失败，等待截图模块加载后再注册: {e}")
+
+    # 热键就绪后再打开命令通道、加载完整配置和较重的依赖 (Tkinter、PIL、pystray 等)
+    start_instance_server()
+    from src.config import config, BASE_DIR
+    from src.utils import set_dpi_awareness
+    import tkinter as tk
+    from src.capture import CaptureManager
+    from src.ui.overlay import NotificationOverlay, OverlayQueue
+    from src.ui.tray import setup_tray, stop_tray
+    from src.updater import UpdateManager
+    startup.mark("modules_loaded")
 
     # 1. 初始化系统设置
     set_dpi_awareness()
+    apply_log_config()
+    config.subscribe(lambda old, new, changed: apply_log_config(), keys=('log_level', 'log_max_mb', 'log_backups'))
 
-    # 2. 创建通信队列
-    gui_queue = queue.Queue()
+    # 2. 创建通信队列 (投递消息时直接唤醒 GUI 线程)
+    gui_queue = OverlayQueue()
 
     # 3. 初始化模块
     # Tkinter root 必须在主线程创建
     root = tk.Tk()
 
-    capture_mgr = CaptureManager(gui_queue)
     overlay_mgr = NotificationOverlay(root, gui_queue)
+    capture_mgr = CaptureManager(gui_queue, overlay_mgr)
+    startup.mark("capture_ready")
+
+    # 截图耗时统计 (托盘悬停文字 / 本机 JSON 接口)
+    from src.metrics import metrics
+    metrics.add_source("pipeline", capture_mgr.pipeline.stats)
+    metrics.add_source("overlay", overlay_mgr.stats)
+    metrics.add_source("clipboard", lambda: capture_mgr.clipboard.stats() if capture_mgr.clipboard else {})
+    apply_metrics_config()
+    config.subscribe(lambda old, new, changed: apply_metrics_config(), keys=('metrics_enabled', 'metrics_port'))
     # 初始化更新管理器 (会自动清理旧备份)
     update_mgr = UpdateManager(root)
 
     # 4. 启动子线程
 
-    # 线程 A: 键盘监听
-    t_kb = threading.Thread(target=capture_mgr.start_listener, daemon=True)
+    # 线程 A: 键盘监听 (接管提前注册的热键)
+    t_kb = threading.Thread(target=capture_mgr.start_listener, args=(early_hotkey,), daemon=True)
     t_kb.start()
 
     # 线程 B: 托盘图标
     # 定义退出回调，当托盘点击退出时，杀掉进程
     def on_exit():
+        # os._exit 不会等待后台线程，先把还在编码/写盘的截图落地
+        capture_mgr.flush(timeout=EXIT_FLUSH_TIMEOUT)
+        # 日志由后台线程写入，os._exit 不会触发 atexit，必须手动落盘
+        flush_logs()
         os._exit(0)
 
     t_tray = threading.Thread(target=setup_tray, args=(on_exit, update_mgr), daemon=True)
     t_tray.start()
 
+    # 第二个实例 (例如 GameShadowSnap.exe --capture) 转发过来的命令
+    on_instance_command("capture", capture_mgr.take_screenshot)
+    on_instance_command("open_folder", open_save_folder)
+    on_instance_command("reload_config", config.reload)
+
+    # 与托盘菜单的“退出”走同一条路径：先移除托盘图标，再保存在途截图并退出
+    def request_exit():
+        stop_tray()
+        on_exit()
+
+    on_instance_command("shutdown", request_exit)
+
+    # 线程 C: 检测 config.json 修改，热重载配置
+    config.start_watching()
+
     # 5. 启动时延迟2秒静默检查更新
     root.after(2000, lambda: update_mgr.check_for_updates(silent=True))
 
     # 6. 启动 GUI 循环 (主线程阻塞)
-    overlay_mgr.process_queue()  # 开始轮询队列
+    overlay_mgr.start()  # 绑定唤醒事件，处理启动前积压的消息
+    startup.finish(os.path.join(BASE_DIR, startup.PROFILE_FILENAME))
 
     try:
         root.mainloop()
     except KeyboardInterrupt:
         pass
+    finally:
+        capture_mgr.flush(timeout=EXIT_FLUSH_TIMEOUT)
+        flush_logs()
 
 
 if __name__ == "__main__":
+    # 打包后的 EXE 使用进程池 (后台重压缩) 时必须调用，否则子进程会重新启动整个程序
+    multiprocessing.freeze_support()
     # 程序一启动就立刻接管日志
     # 放在任何其他业务逻辑之前，确保所有 import 过程中的报错也能被记录
     setup_redirects()
@@ -0,0 +1,196 @@
+import random
+import statistics
+import time
+
+from PIL import Image, ImageChops, ImageDraw, ImageGrab
+
+
+class RawFrame:
+    """
+    原始像素帧：data 是按行紧密排列的像素字节 (bytes/bytearray/memoryview 均可)。
+    零拷贝后端直接返回自己的缓冲区，需要 PIL 图像时再按需包装。
+    """
+
+    def __init__(self, data, size, mode, image=None):
+        self.data = data
+        self.size = size
+        self.mode = mode
+        self._image = image
+
+    def to_image(self):
+        if self._image is None:
+            self._image = Image.frombuffer(self.mode, self.size, self.data, "raw", self.mode, 0, 1)
+        return self._image
+
+
+class CaptureBackend:
+    """
+    截图后端接口：
+    grab() 返回 PIL 图像；grab_raw() 返回 RawFrame。
+    只实现其中一个即可，另一个由基类互相转换。
+    能直接拿到像素缓冲的后端 (如 DXGI Desktop Duplication) 应覆盖 grab_raw，避免多余的拷贝。
+    """
+    name = "base"
+
+    def grab(self, bbox=None):
+        return self.grab_raw(bbox).to_image()
+
+    def grab_raw(self, bbox=None):
+        image = self.grab(bbox)
+        return RawFrame(image.tobytes(), image.size, image.mode, image=image)
+
+    def grab_into(self, buffer, bbox=None):
+        """
+        把一帧写入调用方预先分配的缓冲区，返回指向该缓冲区的 RawFrame。
+        缓冲区不够大时返回 None。支持直接写入外部内存的后端应覆盖此方法。
+        """
+        frame = self.grab_raw(bbox)
+        n = len(frame.data)
+        if n > len(buffer):
+            return None
+        view = memoryview(buffer)[:n]
+        view[:] = frame.data
+        return RawFrame(view, frame.size, frame.mode)
+
+    def close(self):
+        pass
+
+
+class ImageGrabBackend(CaptureBackend):
+    """默认后端：PIL.ImageGrab (Windows 下走 GDI BitBlt)"""
+    name = "imagegrab"
+
+    def grab(self, bbox=None):
+        return ImageGrab.grab(bbox=bbox, all_screens=True)
+
+
+class SyntheticBackend(CaptureBackend):
+    """
+    合成画面后端：不依赖显示器和 Windows API，可在 Linux/CI 下无头运行。
+    画面内容由 pattern 和 seed 完全决定；animate 为 True 时每帧水平平移，模拟画面变化。
+    """
+    name = "synthetic"
+    PATTERNS = ("scene", "gradient", "noise", "solid")
+
+    def __init__(self, resolution=(1920, 1080), pattern="scene", seed=0, animate=True):
+        if pattern not in self.PATTERNS:
+            raise ValueError(f"未知的合成画面类型: {pattern}")
+        self.resolution = (int(resolution[0]), int(resolution[1]))
+        self.pattern = pattern
+        self.seed = seed
+        self.animate = animate
+        self.frame_index = 0
+        self._base = self._render(self.resolution)
+        self._renders = {self.resolution: self._base}
+
+    def _render(self, size):
+        width, height = size
+        if self.pattern == "solid":
+            return Image.new("RGB", size, (32, 96, 160))
+
+        if self.pattern == "noise":
+            rng = random.Random(self.seed)
+            return Image.frombytes("RGB", size, rng.randbytes(width * height * 3))
+
+        # 渐变背景 (三个通道方向不同)
+        ramp = Image.linear_gradient("L")
+        r = ramp.resize(size)
+        g = ramp.rotate(90).resize(size)
+        b = ramp.rotate(180).resize(size)
+        image = Image.merge("RGB", (r, g, b))
+        if self.pattern == "gradient":
+            return image
+
+        # "scene": 渐变 + 色块 (类似 UI/HUD) + 一条噪点带 (类似植被、粒子等高频细节)
+        rng = random.Random(self.seed)
+        draw = ImageDraw.Draw(image)
+        tile = max(16, width // 24)
+        for y in range(0, height // 2, tile):
+            for x in range(0, width, tile):
+                if rng.random() < 0.3:
+                    color = (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+                    draw.rectangle((x, y, x + tile - 1, y + tile - 1), fill=color)
+        band_height = max(1, height // 8)
+        noise = Image.frombytes("RGB", (width, band_height), rng.randbytes(width * band_height * 3))
+        image.paste(noise, (0, height - band_height * 2))
+        return image
+
+    def grab(self, bbox=None):
+        # bbox 只用于确定尺寸；未指定时使用配置的分辨率
+        if bbox is not None:
+            size = (bbox[2] - bbox[0], bbox[3] - bbox[1])
+            if size != self._base.size:
+                # 裁剪/拼接模式下尺寸会变化，渲染结果按尺寸缓存 (最多保留几种尺寸)
+                base = self._renders.get(size)
+                if base is None:
+                    if len(self._renders) >= 8:
+                        self._renders.clear()
+                    base = self._renders[size] = self._render(size)
+                self._base = base
+        frame = self._base
+        if self.animate:
+            frame = ImageChops.offset(self._base, (self.frame_index * 7) % self._base.width, 0)
+        else:
+            frame = frame.copy()
+        self.frame_index += 1
+        return frame
+
+
+BACKENDS = {
+    ImageGrabBackend.name: ImageGrabBackend,
+    SyntheticBackend.name: SyntheticBackend,
+}
+
+
+def create_backend(name, **options):
+    """按名字创建截图后端，options 原样传给后端的构造函数"""
+    if name not in BACKENDS:
+        print(f"[Capture] 未知的截图后端 '{name}'，已回退为 {ImageGrabBackend.name}")
+        return ImageGrabBackend()
+    return BACKENDS[name](**options)
+
+
+def grab_plan(plan, grab, executor=None):
+    """
+    按 CapturePlan 抓帧：只有一块时直接抓取；多块 (多显示器拼接) 时用 executor 并行抓取各块，
+    再按偏移贴到一张画布上。grab(bbox) 返回 PIL 图像或 RawFrame。
+    """
+    if len(plan.tiles) == 1:
+        return grab(plan.tiles[0])
+    if executor is not None:
+        frames = list(executor.map(grab, plan.tiles))
+    else:
+        frames = [grab(tile) for tile in plan.tiles]
+    canvas = Image.new("RGB", plan.size)  # 显示器之间的空隙保持黑色
+    for frame, offset in zip(frames, plan.offsets()):
+        image = frame.to_image() if isinstance(frame, RawFrame) else frame
+        canvas.paste(image.convert("RGB") if image.mode != "RGB" else image, offset)
+    return canvas
+
+
+def benchmark_backend(backend, bbox=None, rounds=20, warmup=2, raw=False):
+    """测量某个后端单次抓帧的耗时 (毫秒)"""
+    grab = backend.grab_raw if raw else backend.grab
+    for _ in range(warmup):
+        grab(bbox)
+
+    samples = []
+    size = None
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        frame = grab(bbox)
+        samples.append((time.perf_counter() - t0) * 1000)
+        size = frame.size
+
+    samples.sort()
+    return {
+        "backend": backend.name,
+        "raw": raw,
+        "size": list(size),
+        "rounds": rounds,
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "p50_ms": round(samples[len(samples) // 2], 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "min_ms": round(samples[0], 3),
+        "max_ms": round(samples[-1], 3),
+    }
@@ -0,0 +1,130 @@
+import os
+import queue
+import time
+
+from .pipeline import CaptureJob
+
+
+class BufferPool:
+    """固定数量、固定大小的帧缓冲池：连拍时循环复用，不在热路径上分配大块内存"""
+
+    def __init__(self, count, size):
+        self.size = size
+        self._free = queue.Queue()
+        for _ in range(count):
+            self._free.put(bytearray(size))
+
+    def acquire(self):
+        """取一块空闲缓冲；全部在编码中时返回 None (调用方记为丢帧)"""
+        try:
+            return self._free.get_nowait()
+        except queue.Empty:
+            return None
+
+    def release(self, buffer):
+        self._free.put(buffer)
+
+
+class BurstRecorder:
+    """
+    连拍模式：按住热键 (或指定帧数) 期间以目标帧率抓帧。
+    抓到的帧写入预分配的缓冲池，交给独立的编码流水线批量处理，
+    因此持续帧率只受抓帧速度限制，而不受 PNG 编码速度限制。
+    """
+
+    def __init__(self, backend, bbox_provider, pipeline, fps=15, frames=0, buffers=8, max_seconds=10):
+        self.backend = backend
+        self.bbox_provider = bbox_provider
+        self.pipeline = pipeline
+        self.fps = max(1.0, float(fps))
+        self.frames = int(frames)
+        self.buffers = max(1, int(buffers))
+        self.max_seconds = float(max_seconds)
+        self._pool = None
+
+    def _ensure_pool(self, frame_bytes):
+        if self._pool is None or self._pool.size < frame_bytes:
+            self._pool = None
+            self._pool = BufferPool(self.buffers, frame_bytes)
+            print(f"[Burst] 已分配 {self.buffers} 个帧缓冲，共 {self.buffers * frame_bytes / 1024 / 1024:.0f} MB")
+        return self._pool
+
+    def run(self, save_dir, is_held, encoder=None):
+        """
+        执行一次连拍，阻塞直到结束，返回统计信息。
+        is_held: 返回热键是否仍被按住的函数 (frames > 0 时忽略)。
+        """
+        bbox = self.bbox_provider()
+        first = self.backend.grab_raw(bbox)
+        pool = self._ensure_pool(len(first.data))
+
+        burst_dir = os.path.join(save_dir, f"burst_{time.strftime('%Y-%m-%d_%H-%M-%S')}")
+        os.makedirs(burst_dir, exist_ok=True)
+
+        interval = 1.0 / self.fps
+        start = time.perf_counter()
+        next_tick = start
+        captured = 0
+        dropped = 0
+        max_backlog = 0
+        frame = first
+
+        while True:
+            if frame is None:
+                buffer = pool.acquire()
+                if buffer is None:
+                    dropped += 1
+                else:
+                    frame = self.backend.grab_into(buffer, bbox)
+                    if frame is None:
+                        pool.release(buffer)
+                        dropped += 1
+            else:
+                buffer = None  # 第一帧来自 grab_raw，不占用缓冲池
+
+            if frame is not None:
+                captured += 1
+                # 序号命名，不需要逐个探测文件是否存在
+                job = CaptureJob(frame, burst_dir, f"frame_{captured:05d}", encoder)
+                job.exact_name = True
+                job.notify = False
+                job.dedup = False
+                job.clipboard = False  # 帧缓冲会被复用，剪贴板线程不能持有它
+                if buffer is not None:
+                    job.on_encoded = lambda b=buffer: pool.release(b)
+                self.pipeline.submit(job)
+                max_backlog = max(max_backlog, self.pipeline.pending())
+                frame = None
+
+            # 结束条件
+            elapsed = time.perf_counter() - start
+            if self.frames > 0:
+                if captured + dropped >= self.frames:
+                    break
+            elif not is_held():
+                break
+            if elapsed >= self.max_seconds:
+                break
+
+            # 固定节拍调度，落后时追赶一拍并把错过的节拍记为丢帧
+            next_tick += interval
+            now = time.perf_counter()
+            if now > next_tick + interval:
+                missed = int((now - next_tick) / interval)
+                dropped += missed
+                next_tick += missed * interval
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        duration = time.perf_counter() - start
+        return {
+            "folder": burst_dir,
+            "captured": captured,
+            "dropped": dropped,
+            "duration": round(duration, 2),
+            "target_fps": self.fps,
+            "achieved_fps": round(captured / duration, 2) if duration > 0 else 0.0,
+            "max_backlog": max_backlog,
+            "backlog": self.pipeline.pending(),
+        }
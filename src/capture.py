@@ -1,56 +1,650 @@
 import time
 import os
+import threading
 import keyboard
 from datetime import datetime
-from PIL import ImageGrab
+from .backends import create_backend, grab_plan, RawFrame
+from .classify import GameClassifier
 from .config import config
-from .utils import get_current_monitor_bbox, get_unique_filepath
+from .encoders import EncoderRegistry
+from .pipeline import CapturePipeline, CaptureJob, Notice
+from .library import ScreenshotLibrary
+from .logger import log, DEBUG, WARNING
+from .metrics import metrics
+from .utils import (get_current_monitor_bbox, write_raw_temp, RAW_EXTENSION,
+                    write_temp_file, clean_temp_files, FilenameAllocator,
+                    get_topology, get_geometry, CapturePlan, wait_for_composition)
+
+
+# 旧版本清理 UI 时固定等待的时长，用于统计握手方式节省的延迟
+LEGACY_CLEAR_DELAY = 0.1
+# 多显示器拼接时并行抓取的最大线程数
+MAX_TILE_WORKERS = 4
+# 切换保存目录时，等待在途截图写入原目录的最长时间 (秒)
+SWITCH_FLUSH_TIMEOUT = 5
+# 变化时需要重建影子预录制 / 连拍的字段
+SHADOW_KEYS = ('shadow_enabled', 'shadow_fps', 'shadow_seconds', 'shadow_memory_mb')
+BURST_KEYS = ('burst_hotkey', 'burst_fps', 'burst_frames', 'burst_max_seconds', 'burst_buffers', 'burst_workers')
 
 
 class CaptureManager:
-    def __init__(self, gui_queue):
+    def __init__(self, gui_queue, overlay=None):
         self.gui_queue = gui_queue
+        self.overlay = overlay
+        self.clear_saved_ms = 0.0  # 相比固定 sleep 累计节省的延迟
         self.save_dir = config.get('save_dir')
         if not os.path.exists(self.save_dir):
             os.makedirs(self.save_dir)
+        clean_temp_files(self.save_dir)
+        # 文件名分配器：启动时扫描一次目录，之后 O(1) 分配并原子占用文件名
+        self.filenames = FilenameAllocator(config.get('filename_template'))
+        self.filenames.prime(self.save_dir)
+
+        # 启动时枚举一次显示器，首次按热键时不再付出枚举开销
+        try:
+            get_topology()
+        except Exception as e:
+            print(f"[Capture] 显示器布局预取失败: {e}")
+
+        # 截图后端 (默认 PIL.ImageGrab，可在配置中切换)
+        self.backend = self._create_backend()
+        # 多显示器拼接：各显示器在线程池中并行抓取，每个线程使用自己的后端实例
+        self._tile_pool = None
+        self._tile_backends = threading.local()
+
+        # 输出编码器 (全局默认 + 可按热键单独指定)
+        self.encoders = EncoderRegistry(config.get('encoder_options', {}))
+        self.default_encoder = self._resolve_encoder(config.get('encoder', 'png'))
+
+        # 编码/写盘流水线 (热键线程只抓帧，不再等待 PNG 编码)
+        self.pipeline = CapturePipeline(
+            handler=self._save_job,
+            spill_handler=self._spill_job,
+            depth=config.get('pipeline_depth', 4),
+            workers=config.get('pipeline_workers', 2),
+            policy=config.get('pipeline_policy', 'block'),
+        )
+
+        # 影子预录制 (可选)：持续把画面写入环形缓冲，热键保存按键前的瞬间
+        self.shadow = self._create_shadow()
+
+        # 连拍 (可选)：独立的编码流水线，不阻塞普通截图
+        self._burst_running = threading.Lock()
+        self.burst = self._create_burst()
+
+        # 复制到剪贴板 (可选)：后台线程发布，不占用热键线程和编码 worker
+        self.clipboard = None
+        self._apply_clipboard_config()
+
+        # 按前台游戏分类保存 (前台进程名有缓存，同一个游戏窗口只查询一次)
+        self.classifier = self._create_classifier()
+        self._known_dirs = set()
+        self._foreground_available = True
+
+        # 保存目录相关的索引 (截图库 / 查重 / 重压缩)，切换目录时会重新打开
+        self.library = None
+        self.dedup = None
+        self.recompressor = None
+        self._open_indexes()
+
+        # 配置热重载：保存目录、文件名模板、编码器、热键变化时立即生效
+        self._hotkey_handles = []
+        self._listening = False
+        config.subscribe(self._on_save_dir_changed, keys=('save_dir',))
+        config.subscribe(self._on_output_changed, keys=('filename_template', 'encoder', 'encoder_options',
+                                                        'recompress_sources'))
+        config.subscribe(self._apply_clipboard_config, keys=('clipboard_enabled', 'clipboard_formats'))
+        config.subscribe(self._on_classify_changed, keys=('classify_rules', 'classify_fallback'))
+        config.subscribe(self._on_hotkeys_changed, keys=('hotkey', 'suppress_key', 'hotkey_encoders',
+                                                         'shadow_hotkey') + SHADOW_KEYS + BURST_KEYS)
+
+    def _create_shadow(self):
+        if not config.get('shadow_enabled', False):
+            return None
+        # 可选功能的模块在开启时才导入，减少冷启动耗时
+        from .shadow import ShadowRecorder
+        return ShadowRecorder(
+            backend=self._create_backend(),
+            bbox_provider=get_current_monitor_bbox,
+            fps=config.get('shadow_fps', 2.0),
+            seconds=config.get('shadow_seconds', 5.0),
+            memory_mb=config.get('shadow_memory_mb', 512),
+        )
+
+    def _create_burst(self):
+        if not config.get('burst_hotkey'):
+            return None
+        from .burst import BurstRecorder
+        buffers = config.get('burst_buffers', 8)
+        return BurstRecorder(
+            backend=self._create_backend(),
+            bbox_provider=get_current_monitor_bbox,
+            pipeline=CapturePipeline(handler=self._save_job, depth=buffers,
+                                     workers=config.get('burst_workers', 3)),
+            fps=config.get('burst_fps', 15.0),
+            frames=config.get('burst_frames', 0),
+            buffers=buffers,
+            max_seconds=config.get('burst_max_seconds', 10.0),
+        )
+
+    def _retire_burst(self, burst):
+        """[后台线程] 等正在进行的连拍结束后，写完旧流水线里剩余的帧并停止它"""
+        with self._burst_running:
+            burst.pipeline.shutdown()
+
+    def _open_indexes(self):
+        """打开当前保存目录下的截图库、查重索引和重压缩服务"""
+        # 截图库索引：记录每张截图，启动时在后台增量同步程序外的增删
+        if config.get('library_enabled', True):
+            try:
+                self.library = ScreenshotLibrary(self.save_dir)
+                threading.Thread(target=self.library.rescan, name="library-rescan", daemon=True).start()
+            except Exception as e:
+                self.library = None
+                log(f"[Library] 截图库索引初始化失败: {e}", WARNING)
 
-    def take_screenshot(self):
+        # 重复画面过滤 (可选)
+        if config.get('dedup_enabled', False):
+            from .dedup import HashIndex
+            self.dedup = HashIndex(self.save_dir, config.get('dedup_distance', 4))
+
+        # 延迟重压缩 (可选)：空闲时把快速保存的截图转码为归档格式
+        self.recompress_sources = set(config.get('recompress_sources', ['raw', 'png_fast']))
+        if config.get('recompress_enabled', False):
+            from .recompress import RecompressService
+            self.recompressor = RecompressService(
+                self.save_dir,
+                target=config.get('recompress_target', 'png_max'),
+                options=config.get('encoder_options', {}),
+                workers=config.get('recompress_workers', 1),
+                idle_seconds=config.get('recompress_idle_seconds', 120),
+                interval_minutes=config.get('recompress_interval_minutes', 0),
+                on_transcoded=self.library.move if self.library else None,
+            )
+            self.recompressor.start()
+
+    def _close_indexes(self):
+        """关闭当前保存目录的索引 (之前应先等在途截图写完，它们还会写入这些索引)"""
+        if self.recompressor:
+            self.recompressor.stop()  # 未完成的任务留在原目录的日志里
+        if self.library:
+            self.library.close()
+        # 查重索引每条记录在 commit 时就追加到磁盘，没有需要刷新的缓冲
+        self.library = self.dedup = self.recompressor = None
+
+    def _on_save_dir_changed(self, old, new, changed):
+        """[配置检测线程] 切换保存目录：之后的截图写入新目录，在途截图仍写入原目录"""
+        save_dir = new.save_dir
+        os.makedirs(save_dir, exist_ok=True)
+        clean_temp_files(save_dir)
+        self.filenames.prime(save_dir)
+        self.save_dir = save_dir
+        # 在途截图写完 (并记入原目录的索引) 后再关闭旧索引
+        ok = self.pipeline.flush(SWITCH_FLUSH_TIMEOUT)
+        if self.burst:
+            ok = self.burst.pipeline.flush(SWITCH_FLUSH_TIMEOUT) and ok
+        if not ok:
+            print("[Capture] 等待在途截图写盘超时，部分截图可能不会记入原目录的索引")
+        self._close_indexes()
+        self._open_indexes()
+        print(f"[Capture] 保存目录已切换为: {save_dir}")
+
+    def _on_output_changed(self, old, new, changed):
+        """[配置检测线程] 文件名模板 / 编码器变化"""
+        if 'filename_template' in changed:
+            filenames = FilenameAllocator(new.filename_template)
+            filenames.prime(self.save_dir)
+            self.filenames = filenames
+        if 'encoder_options' in changed:
+            self.encoders = EncoderRegistry(new.encoder_options)
+        self.default_encoder = self._resolve_encoder(new.encoder)
+        self.recompress_sources = set(new.recompress_sources)
+
+    def _apply_clipboard_config(self, *args):
+        """启动时和配置变化时调用：按 clipboard_enabled 开启或关闭剪贴板发布"""
+        enabled = config.get('clipboard_enabled', False)
+        if not enabled:
+            if self.clipboard:
+                self.clipboard.close()
+                self.clipboard = None
+            return
+        from .clipboard import ClipboardSink, create_clipboard_backend
+        formats = config.get('clipboard_formats', ['dib', 'png'])
+        if self.clipboard:
+            self.clipboard.set_formats(formats)
+            return
+        try:
+            backend = create_clipboard_backend()
+        except Exception as e:
+            print(f"[Clipboard] 剪贴板初始化失败: {e}")
+            return
+        if backend is None:
+            print("[Clipboard] 当前平台不支持复制到剪贴板")
+            return
+        self.clipboard = ClipboardSink(backend, formats)
+
+    def _publish_clipboard(self, job, image, png=None):
+        """[worker 线程] 把截图交给剪贴板线程 (只传引用，不做转换)"""
+        if self.clipboard and job.clipboard:
+            self.clipboard.submit(image, png)
+
+    def _create_classifier(self, cache=None):
+        return GameClassifier(config.get('classify_rules', {}), config.get('classify_fallback', '{process}'),
+                              cache=cache)
+
+    def _on_classify_changed(self, old, new, changed):
+        """[配置检测线程] 分类规则变化：沿用已缓存的进程名"""
+        self.classifier = self._create_classifier(self.classifier._cache)
+
+    def _on_hotkeys_changed(self, old, new, changed):
+        """[配置检测线程] 热键变化：按需重建影子预录制 / 连拍，然后注销旧热键并重新注册"""
+        if changed & set(SHADOW_KEYS):
+            if self.shadow:
+                self.shadow.stop()
+            self.shadow = self._create_shadow()
+            if self.shadow and self._listening:
+                self.shadow.start()
+        if changed & set(BURST_KEYS):
+            retired, self.burst = self.burst, self._create_burst()
+            if retired:
+                threading.Thread(target=self._retire_burst, args=(retired,), name="burst-retire",
+                                 daemon=True).start()
+        if not self._listening:
+            return
+        for handle in self._hotkey_handles:
+            try:
+                keyboard.remove_hotkey(handle)
+            except (KeyError, ValueError):
+                pass
+        self._hotkey_handles = []
+        self._register_hotkeys()
+
+    def _create_backend(self):
+        name = config.get('capture_backend', 'imagegrab')
+        if name == 'synthetic':
+            return create_backend(name,
+                                  resolution=config.get('synthetic_resolution', [1920, 1080]),
+                                  pattern=config.get('synthetic_pattern', 'scene'))
+        return create_backend(name)
+
+    def _resolve_encoder(self, name):
+        """检查编码器是否可用，不可用时回退到 PNG"""
+        try:
+            self.encoders.get(name)
+            return name
+        except Exception as e:
+            print(f"[Capture] 编码器 '{name}' 不可用 ({e})，已回退为 png")
+            return "png"
+
+    def take_screenshot(self, encoder=None):
+        t_entry = time.perf_counter()
         # 1. 清理 UI (防止画中画)
-        if config.get('show_notification', True):
-            self.gui_queue.put("CLEAR")
-            time.sleep(0.1)
+        clear_wait = self._clear_ui()
+
+        try:
+            # 2. 准备保存位置：按前台游戏分到子文件夹 (文件名在写盘时按截图时刻分配)
+            save_dir, context = self._classify()
 
+            # 3. 截图 (按 capture_mode 裁剪到前台窗口或拼接所有显示器，像素越少抓帧和编码越快)
+            t0 = time.perf_counter()
+            plan = self._plan_capture(context)
+            t1 = time.perf_counter()
+            screenshot = self._grab_plan(plan)
+            t2 = time.perf_counter()
+
+            # 4. 交给后台编码保存
+            job = CaptureJob(screenshot, save_dir, "screenshot", encoder or self.default_encoder)
+            job.triggered_at = t_entry
+            job.timings["clear_wait"] = clear_wait
+            job.timings["monitor"] = t1 - t0
+            job.timings["grab"] = t2 - t1
+            job.meta["bbox"] = plan.bounds
+            self._apply_context(job, context)
+            self.pipeline.submit(job)
+            # 热键回调本身的耗时 (不含后台编码写盘)，决定了下一次按键多快能被响应
+            metrics.observe("hotkey", time.perf_counter() - t_entry)
+
+        except Exception as e:
+            metrics.count("failures")
+            print(f"截图失败: {e}")
+
+    def _classify(self):
+        """
+        返回 (保存目录, 前台窗口分类结果)。开启分类时保存到对应游戏的子文件夹；
+        截图库需要的窗口标题和进程名也来自这里 (共用进程名缓存，同一窗口只查询一次进程名)。
+        """
+        classifier = self.classifier
+        classify = config.get('classify_enabled', False) and (classifier.rules or classifier.fallback)
+        if not (classify or self.library) or not self._foreground_available:
+            return self.save_dir, None
+        try:
+            context = classifier.classify()
+        except (AttributeError, OSError) as e:
+            # 非 Windows 平台没有前台窗口 API，之后不再尝试
+            self._foreground_available = False
+            print(f"[Classify] 无法获取前台进程 ({e})，截图保存到根目录")
+            return self.save_dir, None
+        if not classify or not context.folder:
+            return self.save_dir, context
+        return self._ensure_dir(os.path.join(self.save_dir, context.folder)), context
+
+    def _ensure_dir(self, directory):
+        """每个子文件夹每次运行只创建/清理一次"""
+        if directory not in self._known_dirs:
+            os.makedirs(directory, exist_ok=True)
+            clean_temp_files(directory)
+            self._known_dirs.add(directory)
+        return directory
+
+    @staticmethod
+    def _apply_context(job, context):
+        if context is None:
+            return
+        job.meta["window_title"] = context.title
+        job.meta["process"] = context.process
+        if context.folder:
+            job.meta["game"] = context.folder  # 截图库按规则里的游戏名归类
+
+    def _plan_capture(self, context=None):
+        """本次截图的范围；默认模式直接用缓存的显示器布局，不经过窗口查询"""
+        mode = config.get('capture_mode', 'monitor')
+        if mode == 'monitor':
+            return CapturePlan([get_current_monitor_bbox()])
+        return get_geometry().plan(mode, config.get('capture_regions'), context.process if context else None)
+
+    def _grab_plan(self, plan):
+        if len(plan.tiles) == 1:
+            return self.backend.grab(plan.tiles[0])
+        if self._tile_pool is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._tile_pool = ThreadPoolExecutor(max_workers=MAX_TILE_WORKERS, thread_name_prefix="capture-tile")
+        return grab_plan(plan, self._grab_tile, self._tile_pool)
+
+    def _grab_tile(self, bbox):
+        """[拼接线程] 抓取一个显示器 (后端实例不保证线程安全，每个线程各用一个)"""
+        backend = getattr(self._tile_backends, "backend", None)
+        if backend is None:
+            backend = self._tile_backends.backend = self._create_backend()
+        return backend.grab(bbox)
+
+    def _clear_ui(self):
+        """
+        丢弃还没显示的提示，只有提示窗在屏幕上 (或正在显示) 时才等待它关闭，返回实际等待的秒数。
+        窗口隐藏后再等 DWM 合成一帧，而不是固定 sleep。
+        """
+        if not config.get('show_notification', True) or not self.overlay:
+            return 0.0
+        t0 = time.perf_counter()
+        hidden = self.overlay.request_clear(timeout=LEGACY_CLEAR_DELAY * 2)
+        if hidden is False:
+            print("[Capture] 等待提示窗关闭超时，继续截图")
+        elif hidden:
+            wait_for_composition()
+        waited = time.perf_counter() - t0
+        self.clear_saved_ms += (LEGACY_CLEAR_DELAY - waited) * 1000
+        return waited
+
+    def save_shadow(self):
+        """把影子缓冲中最近 N 秒的画面 (或其中最清晰的一帧) 交给流水线保存"""
+        if not self.shadow:
+            return
         try:
-            # 2. 准备路径 (TODO: 未来在这里加入智能分类逻辑，修改 save_dir)
-            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-            filename_base = f"screenshot_{timestamp}"
-            filepath, final_filename = get_unique_filepath(self.save_dir, filename_base, ".png")
+            mode = config.get('shadow_save_mode', 'best')
+            frames = self.shadow.collect(mode)
+            if not frames:
+                print("[Shadow] 缓冲区暂无可保存的画面")
+                return
 
-            # 3. 截图
-            bbox = get_current_monitor_bbox()
-            screenshot = ImageGrab.grab(bbox=bbox, all_screens=True)
+            save_dir, context = self._classify()
+            if mode == "best":
+                frame_time, image = frames[0]
+                job = CaptureJob(image, save_dir, "shadow")
+                self._apply_context(job, context)
+                # 文件名使用这一帧实际被抓取的时刻，而不是按下热键的时刻
+                job.captured_at = datetime.fromtimestamp(frame_time)
+                job.taken_at = frame_time
+                self.pipeline.submit(job)
+            else:
+                # 多帧保存到单独的子文件夹，按时间顺序编号
+                timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+                target_dir = os.path.join(save_dir, f"shadow_{timestamp}")
+                os.makedirs(target_dir, exist_ok=True)
+                for index, (frame_time, image) in enumerate(frames, 1):
+                    job = CaptureJob(image, target_dir, f"frame_{index:03d}")
+                    self._apply_context(job, context)
+                    job.exact_name = True
+                    job.clipboard = False
+                    job.notify = False  # 逐帧不弹提示，全部提交后只提示一次
+                    job.captured_at = datetime.fromtimestamp(frame_time)
+                    job.taken_at = frame_time
+                    self.pipeline.submit(job)
+                if config.get('show_notification', True):
+                    self.gui_queue.put(Notice(f"影子回溯 {len(frames)} 帧\n{os.path.basename(target_dir)}"))
 
-            # 4. 保存
-            screenshot.save(filepath)
-            print(f"截图保存: {filepath}")
+            stats = self.shadow.stats()
+            print(f"[Shadow] 已提交 {len(frames)} 帧 | 实际 {stats['achieved_fps']} fps | "
+                  f"丢帧 {stats['dropped']} | 缓冲 {stats['slots']} 帧 / {stats['memory_mb']} MB")
+        except Exception as e:
+            print(f"[Shadow] 保存预录制画面失败: {e}")
 
-            # 5. TODO: 在这里添加【剪贴板复制】逻辑
-            # 6. TODO: 在这里添加【音效播放】逻辑
-            # 7. TODO: 在这里添加【手机快传】二维码生成逻辑
+    def start_burst(self):
+        """[热键回调] 在独立线程中连拍，避免阻塞键盘钩子 (否则检测不到按键松开)"""
+        if not self.burst or not self._burst_running.acquire(blocking=False):
+            return  # 按住时系统的按键重复也会触发回调，连拍进行中直接忽略
+        threading.Thread(target=self._run_burst, name="burst", daemon=True).start()
 
-            # 8. 通知 UI
+    def _run_burst(self):
+        try:
+            self._clear_ui()
+            hotkey = config.get('burst_hotkey')
+            encoder = config.get('burst_encoder')
+            encoder = self._resolve_encoder(encoder) if encoder else None
+            save_dir, _ = self._classify()
+            burst = self.burst  # 配置变化时 self.burst 可能被替换，本次连拍使用开始时的实例
+            if not burst:
+                return
+            summary = burst.run(save_dir, lambda: keyboard.is_pressed(hotkey), encoder=encoder)
+            print(f"[Burst] 连拍结束: {summary['captured']} 帧 / {summary['duration']} 秒 | "
+                  f"实际 {summary['achieved_fps']} fps (目标 {summary['target_fps']:g}) | "
+                  f"丢帧 {summary['dropped']} | 最大编码积压 {summary['max_backlog']} | "
+                  f"剩余积压 {summary['backlog']} | {summary['folder']}")
             if config.get('show_notification', True):
-                self.gui_queue.put(final_filename)
+                self.gui_queue.put(Notice(f"连拍 {summary['captured']} 帧 @ {summary['achieved_fps']} fps"
+                                          f"，丢帧 {summary['dropped']}"))
+        except Exception as e:
+            print(f"[Burst] 连拍失败: {e}")
+        finally:
+            self._burst_running.release()
+
+    def _save_job(self, job):
+        """[worker 线程] 编码并保存一帧"""
+        job.timings["queue"] = time.perf_counter() - job.created_at
+        encoder = self.encoders.get(job.encoder or self.default_encoder)
+        image = job.image.to_image() if isinstance(job.image, RawFrame) else job.image
+
+        # 查重放在编码之前：重复画面直接跳过，省掉最贵的一步
+        dedup_entry = None
+        if self.dedup and job.dedup:
+            from .dedup import dhash
+            t0 = time.perf_counter()
+            value = dhash(image)
+            job.meta["phash"] = f"{value:016x}"
+            match, dedup_entry = self.dedup.check_and_reserve(value)
+            job.timings["dedup"] = time.perf_counter() - t0
+            if match is not None:
+                if job.on_encoded:
+                    job.on_encoded()
+                self._publish_clipboard(job, image)
+                self._save_duplicate(job, match)
+                return
+        try:
+            self._encode_and_write(job, encoder, image, dedup_entry)
+        except Exception:
+            if dedup_entry:
+                self.dedup.discard(dedup_entry)
+            raise
+
+    def _save_duplicate(self, job, match):
+        """与已有截图几乎相同：按配置跳过，或硬链接到已有文件 (不占额外空间)"""
+        message = "重复画面，已跳过"
+        if config.get('dedup_action', 'skip') == 'hardlink' and match["path"]:
+            try:
+                extension = os.path.splitext(match["path"])[1]
+                filepath, final_filename = self.filenames.claim(
+                    match["path"], job.save_dir, extension, job.filename_base, job.captured_at, move=False)
+                message = f"重复画面，已链接\n{final_filename}"
+                self._record(job, filepath, "hardlink")
+            except OSError as e:
+                log(f"[Dedup] 创建硬链接失败: {e}", WARNING)
+        log(f"[Dedup] {message.splitlines()[0]} (与 {match['path'] or '正在保存的截图'} 相似，"
+            f"查重 {job.timings['dedup'] * 1000:.1f} ms)", DEBUG)
+        metrics.observe_job(job, outcome="duplicates")
+        if job.notify and config.get('show_notification', True):
+            self.gui_queue.put(Notice(message))
+
+    def _encode_and_write(self, job, encoder, image, dedup_entry=None):
+        t0 = time.perf_counter()
+        try:
+            data = encoder.encode(image)
+        finally:
+            if job.on_encoded:
+                job.on_encoded()
+        job.timings["encode"] = time.perf_counter() - t0
+
+        # 先写临时文件，再原子重命名，保存目录里不会出现写了一半的图片
+        t0 = time.perf_counter()
+        temp_path = write_temp_file(job.save_dir, data)
+        if job.exact_name:
+            final_filename = f"{job.filename_base}{encoder.extension}"
+            filepath = os.path.join(job.save_dir, final_filename)
+            os.replace(temp_path, filepath)
+        else:
+            filepath, final_filename = self.filenames.claim(
+                temp_path, job.save_dir, encoder.extension, job.filename_base, job.captured_at)
+        job.timings["write"] = time.perf_counter() - t0
+
+        if dedup_entry:
+            self.dedup.commit(dedup_entry, filepath)
+        self._record(job, filepath, encoder.name)
+        if self.recompressor and encoder.name in self.recompress_sources:
+            self.recompressor.enqueue(filepath)
+
+        clear_wait = job.timings.get("clear_wait", 0.0)
+        print(f"截图保存: {filepath} ({encoder.name} {len(data) / 1024 / 1024:.2f} MB，"
+              f"编码 {job.timings['encode'] * 1000:.0f} ms，"
+              f"清理 UI 等待 {clear_wait * 1000:.1f} ms，累计节省 {self.clear_saved_ms:.0f} ms)")
+
+        # 5. 复制到剪贴板：PNG 编码结果直接复用，不再编码第二次
+        self._publish_clipboard(job, image, data if encoder.extension == ".png" else None)
+        # 6. TODO: 在这里添加【音效播放】逻辑
+        # 7. TODO: 在这里添加【手机快传】二维码生成逻辑
+
+        metrics.observe_job(job, len(data))
 
+        # 8. 通知 UI
+        if job.notify and config.get('show_notification', True):
+            self.gui_queue.put(final_filename)
+
+    def _record(self, job, filepath, encoder_name):
+        """写入截图库索引 (失败不影响截图本身)"""
+        if not self.library:
+            return
+        try:
+            process = job.meta.get("process") or None
+            width, height = job.image.size  # PIL 图像和 RawFrame 都有 size，不必重新打开刚写好的文件
+            self.library.record(
+                filepath,
+                encoder=encoder_name,
+                bbox=job.meta.get("bbox"),
+                window_title=job.meta.get("window_title") or None,
+                process=process,
+                game=job.meta.get("game") or (os.path.splitext(process)[0] if process else None),
+                phash=job.meta.get("phash"),
+                taken_at=job.taken_at,
+                width=width,
+                height=height,
+            )
         except Exception as e:
-            print(f"截图失败: {e}")
+            log(f"[Library] 记录截图失败: {e}", WARNING)
+
+    def _spill_job(self, job):
+        """[热键线程] 队列已满时，跳过编码直接写原始像素"""
+        temp_path = write_raw_temp(job.save_dir, job.image)
+        if job.exact_name:
+            final_filename = f"{job.filename_base}{RAW_EXTENSION}"
+            filepath = os.path.join(job.save_dir, final_filename)
+            os.replace(temp_path, filepath)
+        else:
+            filepath, final_filename = self.filenames.claim(
+                temp_path, job.save_dir, RAW_EXTENSION, job.filename_base, job.captured_at)
+        print(f"截图队列已满，原始帧已落盘: {filepath}")
+        self._publish_clipboard(job, job.image)
+        if metrics.enabled:
+            metrics.observe_job(job, os.path.getsize(filepath), outcome="spilled")
+        self._record(job, filepath, "raw")
+        if self.recompressor:
+            self.recompressor.enqueue(filepath)
+
+        if job.notify and config.get('show_notification', True):
+            self.gui_queue.put(final_filename)
 
-    def start_listener(self):
+    def flush(self, timeout=None):
+        """等待所有在途截图写盘完成 (退出前调用)"""
+        pending = self.pipeline.pending()
+        if pending:
+            print(f"[Capture] 正在等待 {pending} 张截图写盘...")
+        ok = self.pipeline.flush(timeout)
+        if self.burst:
+            ok = self.burst.pipeline.flush(timeout) and ok
+        if self.clipboard:
+            ok = self.clipboard.flush(timeout) and ok
+        if self.recompressor:
+            self.recompressor.stop()
+        return ok
+
+    def _add_hotkey(self, hotkey, callback, args=()):
+        if not hotkey:
+            return
+        try:
+            handle = keyboard.add_hotkey(hotkey, callback, args=args, suppress=config.get('suppress_key'))
+        except ValueError as e:
+            # 一个热键写错不影响其他热键
+            print(f"[Capture] 热键 '{hotkey}' 无效，已跳过: {e}")
+            return
+        self._hotkey_handles.append(handle)
+
+    def _register_hotkeys(self):
         hotkey = config.get('hotkey')
-        suppress = config.get('suppress_key')
-        print(f"键盘监听启动: {hotkey}, 独占: {suppress}")
+        print(f"键盘监听启动: {hotkey}, 独占: {config.get('suppress_key')}")
+        self._add_hotkey(hotkey, self.take_screenshot)
+        # 额外热键：使用指定编码器截图，例如 {"ctrl+f11": "jpeg"}
+        for extra_hotkey, encoder_name in config.get('hotkey_encoders', {}).items():
+            encoder_name = self._resolve_encoder(encoder_name)
+            self._add_hotkey(extra_hotkey, self.take_screenshot, args=(encoder_name,))
+            print(f"编码器热键: {extra_hotkey} -> {encoder_name}")
+        if self.shadow:
+            shadow_hotkey = config.get('shadow_hotkey')
+            self._add_hotkey(shadow_hotkey, self.save_shadow)
+            print(f"影子回溯热键: {shadow_hotkey}")
+        if self.burst:
+            burst_hotkey = config.get('burst_hotkey')
+            self._add_hotkey(burst_hotkey, self.start_burst)
+            print(f"连拍热键: {burst_hotkey}")
+
+    def start_listener(self, early_hotkey=None):
+        """
+        注册全部热键并阻塞等待。early_hotkey 为启动时抢先注册的主热键 (EarlyHotkey)：
+        先注册正式热键再撤下它，期间按下的次数在这里补拍，保证启动过程中的按键不丢失。
+        """
         try:
-            keyboard.add_hotkey(hotkey, self.take_screenshot, suppress=suppress)
+            self._listening = True
+            self._register_hotkeys()
+            if early_hotkey:
+                for _ in range(early_hotkey.release()):
+                    print("[Capture] 补拍启动期间按下的截图")
+                    self.take_screenshot()
+            if self.shadow:
+                self.shadow.start()
             keyboard.wait()
         except Exception as e:
-            print(f"监听出错: {e}")
\ No newline at end of file
+            print(f"监听出错: {e}")
@@ -0,0 +1,183 @@
+import ctypes
+import fnmatch
+import os
+import re
+import threading
+import time
+
+# 进程名缓存的有效期 (秒)：PID 被系统复用的极端情况下，最多这么久后重新查询
+CACHE_TTL = 300
+CACHE_SIZE = 256
+# 文件夹名中不允许出现的字符 (Windows)
+_INVALID_CHARS = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+
+
+class ForegroundInfo:
+    """前台窗口信息：window 为窗口句柄 (用于判断缓存是否仍然有效)"""
+
+    def __init__(self, window, pid, title=""):
+        self.window = window
+        self.pid = pid
+        self.title = title
+
+
+class Win32ProcessTable:
+    """
+    通过 Win32 API 查询前台窗口和进程名。
+    foreground() 只调用几个 user32 函数 (很便宜)；process_name() 需要打开进程句柄，交给缓存避免每次都查。
+    """
+
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+
+    def __init__(self):
+        self.user32 = ctypes.WinDLL("user32")  # 单独加载，设置 argtypes 不影响共享的 windll.user32
+        self.kernel32 = ctypes.windll.kernel32
+        self.user32.GetForegroundWindow.restype = ctypes.c_void_p
+        self.user32.GetWindowTextLengthW.argtypes = [ctypes.c_void_p]
+        self.user32.GetWindowTextW.argtypes = [ctypes.c_void_p, ctypes.c_wchar_p, ctypes.c_int]
+        self.user32.GetWindowThreadProcessId.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_ulong)]
+
+    def foreground(self):
+        hwnd = self.user32.GetForegroundWindow()
+        if not hwnd:
+            return None
+        length = self.user32.GetWindowTextLengthW(hwnd)
+        title = ctypes.create_unicode_buffer(length + 1)
+        self.user32.GetWindowTextW(hwnd, title, length + 1)
+        pid = ctypes.c_ulong()
+        self.user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+        return ForegroundInfo(hwnd, pid.value, title.value)
+
+    def process_name(self, pid):
+        handle = self.kernel32.OpenProcess(self.PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return ""
+        try:
+            size = ctypes.c_ulong(1024)
+            path = ctypes.create_unicode_buffer(size.value)
+            if self.kernel32.QueryFullProcessImageNameW(handle, 0, path, ctypes.byref(size)):
+                return os.path.basename(path.value)
+            return ""
+        finally:
+            self.kernel32.CloseHandle(handle)
+
+
+class FakeProcessTable:
+    """测试用的假进程表 (可在 Linux 上使用)：记录进程名被查询的次数"""
+
+    def __init__(self, processes=None, foreground_pid=None, window=1, title=""):
+        self.processes = dict(processes or {})
+        self.foreground_pid = foreground_pid
+        self.window = window
+        self.title = title
+        self.lookups = 0
+
+    def switch(self, pid, window=None, title=""):
+        """模拟切换前台窗口"""
+        self.foreground_pid = pid
+        self.window = window if window is not None else self.window + 1
+        self.title = title
+
+    def foreground(self):
+        if self.foreground_pid is None:
+            return None
+        return ForegroundInfo(self.window, self.foreground_pid, self.title)
+
+    def process_name(self, pid):
+        self.lookups += 1
+        return self.processes.get(pid, "")
+
+
+class ProcessNameCache:
+    """
+    PID -> 进程名缓存：同一个窗口 (句柄 + PID 都不变) 直接命中，热键路径上不再打开进程句柄。
+    PID 会被系统复用，因此窗口句柄变化、超过 ttl 或调用 invalidate 时重新查询。
+    """
+
+    def __init__(self, table, ttl=CACHE_TTL, size=CACHE_SIZE, clock=time.monotonic):
+        self.table = table
+        self.ttl = ttl
+        self.size = size
+        self.clock = clock
+        self._entries = {}  # pid -> (窗口句柄, 进程名, 查询时刻)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, info):
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(info.pid)
+            if entry and entry[0] == info.window and now - entry[2] < self.ttl:
+                self.hits += 1
+                return entry[1]
+        name = self.table.process_name(info.pid)
+        with self._lock:
+            self.misses += 1
+            if len(self._entries) >= self.size:
+                # 淘汰最早查询的一半
+                for pid, _ in sorted(self._entries.items(), key=lambda item: item[1][2])[:self.size // 2]:
+                    del self._entries[pid]
+            self._entries[info.pid] = (info.window, name, now)
+        return name
+
+    def invalidate(self, pid=None):
+        with self._lock:
+            if pid is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(pid, None)
+
+
+def sanitize_folder(name):
+    """把规则或进程名转换为合法的文件夹名，不合法时返回空字符串"""
+    name = _INVALID_CHARS.sub("_", str(name)).strip().rstrip(". ")
+    if name in ("", ".", ".."):
+        return ""
+    return name
+
+
+class Classification:
+    def __init__(self, folder, process="", title=""):
+        self.folder = folder  # 相对保存目录的子文件夹，空字符串表示保存在根目录
+        self.process = process
+        self.title = title
+
+
+class GameClassifier:
+    """
+    按前台进程名把截图分到每个游戏的子文件夹 (config.json 中的 classify_rules)：
+    规则的键是进程名 (不区分大小写，支持 * ? 通配符)，值是文件夹名，空字符串表示不分类；
+    没有匹配的规则时使用 fallback，其中的 {process} 替换为去掉扩展名的进程名。
+    """
+
+    def __init__(self, rules=None, fallback="{process}", table=None, cache=None):
+        self.rules = [(pattern.lower(), folder) for pattern, folder in (rules or {}).items()]
+        self.fallback = fallback
+        self._table = table
+        self._cache = cache
+
+    @property
+    def cache(self):
+        # 进程表首次使用时才创建 (非 Windows 平台上创建会失败，由调用方回退)
+        if self._cache is None:
+            self._cache = ProcessNameCache(self._table or Win32ProcessTable())
+        return self._cache
+
+    def match(self, process):
+        """只做规则匹配 (不查询进程)，返回文件夹名"""
+        key = process.lower()
+        for pattern, folder in self.rules:
+            if fnmatch.fnmatchcase(key, pattern):
+                return sanitize_folder(folder) if folder else ""
+        if not process or not self.fallback:
+            return ""
+        return sanitize_folder(self.fallback.replace("{process}", os.path.splitext(process)[0]))
+
+    def classify(self):
+        """[热键线程] 查询前台进程 (带缓存) 并匹配规则"""
+        info = self.cache.table.foreground()
+        if info is None:
+            return Classification("")
+        process = self.cache.lookup(info)
+        return Classification(self.match(process), process, info.title)
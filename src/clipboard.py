@@ -0,0 +1,247 @@
+import ctypes
+import struct
+import sys
+import threading
+import time
+
+# 支持的剪贴板格式
+FORMAT_DIB = "dib"  # CF_DIB：几乎所有程序都认 (画图、微信、Office…)
+FORMAT_PNG = "png"  # 注册格式 "PNG"：浏览器、Discord 等优先使用，直接复用已编码的 PNG，零转换
+FORMATS = (FORMAT_DIB, FORMAT_PNG)
+# 剪贴板被其他程序占用时的重试
+OPEN_RETRIES = 10
+OPEN_RETRY_DELAY = 0.02
+
+
+def make_dib(image):
+    """
+    PIL 图像 -> CF_DIB 数据 (BITMAPINFOHEADER + 自下而上的 32 位 BGRX 像素)。
+    32 位每行天然 4 字节对齐，Pillow 用一次 C 层的打包完成通道重排和上下翻转。
+    """
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    width, height = image.size
+    pixels = image.tobytes("raw", "BGRX", 0, -1)
+    header = struct.pack("<IiiHHIIiiII", 40, width, height, 1, 32, 0, len(pixels), 0, 0, 0, 0)
+    return header + pixels
+
+
+class ClipboardBackend:
+    """剪贴板后端接口：set(data) 一次性替换剪贴板内容，data 为 {格式: bytes}，值必须是 bytes/bytearray"""
+    name = "base"
+
+    def set(self, data):
+        raise NotImplementedError
+
+    def close(self):
+        """释放后端资源 (在调用 set 的线程上调用)"""
+
+
+class Win32Clipboard(ClipboardBackend):
+    """通过 Win32 API 写入剪贴板"""
+    name = "win32"
+
+    CF_DIB = 8
+    GMEM_MOVEABLE = 0x0002
+    HWND_MESSAGE = -3
+
+    def __init__(self):
+        # 用独立加载的 DLL 对象设置函数原型，不改动其他模块共用的 ctypes.windll
+        self.user32 = ctypes.WinDLL("user32")
+        self.kernel32 = ctypes.WinDLL("kernel32")
+        # 句柄和指针按指针宽度传递，避免 64 位系统上被截断
+        self.kernel32.GlobalAlloc.argtypes = [ctypes.c_uint, ctypes.c_size_t]
+        self.kernel32.GlobalAlloc.restype = ctypes.c_void_p
+        self.kernel32.GlobalLock.argtypes = [ctypes.c_void_p]
+        self.kernel32.GlobalLock.restype = ctypes.c_void_p
+        self.kernel32.GlobalUnlock.argtypes = [ctypes.c_void_p]
+        self.kernel32.GlobalFree.argtypes = [ctypes.c_void_p]
+        self.user32.SetClipboardData.argtypes = [ctypes.c_uint, ctypes.c_void_p]
+        self.user32.SetClipboardData.restype = ctypes.c_void_p
+        self.user32.CreateWindowExW.argtypes = [
+            ctypes.c_uint, ctypes.c_wchar_p, ctypes.c_wchar_p, ctypes.c_uint, ctypes.c_int, ctypes.c_int,
+            ctypes.c_int, ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p]
+        self.user32.CreateWindowExW.restype = ctypes.c_void_p
+        self.user32.DestroyWindow.argtypes = [ctypes.c_void_p]
+        self.user32.OpenClipboard.argtypes = [ctypes.c_void_p]
+        self._hwnd = None
+        self.formats = {FORMAT_DIB: self.CF_DIB, FORMAT_PNG: self.user32.RegisterClipboardFormatW("PNG")}
+
+    def _owner(self):
+        """
+        剪贴板所有者窗口：OpenClipboard(NULL) 后 EmptyClipboard 会把所有者设为 NULL，SetClipboardData 随之失败。
+        窗口属于创建它的线程，所以在第一次 set (剪贴板线程) 时创建一个仅消息窗口，之后一直复用。
+        """
+        if self._hwnd is None:
+            hwnd = self.user32.CreateWindowExW(0, "STATIC", "GameShadowSnap Clipboard", 0, 0, 0, 0, 0,
+                                               ctypes.c_void_p(self.HWND_MESSAGE), None, None, None)
+            if not hwnd:
+                raise OSError(f"创建剪贴板窗口失败 (错误码 {self.kernel32.GetLastError()})")
+            self._hwnd = hwnd
+        return self._hwnd
+
+    def _open(self):
+        owner = self._owner()
+        for _ in range(OPEN_RETRIES):
+            if self.user32.OpenClipboard(owner):
+                return True
+            time.sleep(OPEN_RETRY_DELAY)
+        return False
+
+    def _global_copy(self, payload):
+        handle = self.kernel32.GlobalAlloc(self.GMEM_MOVEABLE, len(payload))
+        if not handle:
+            raise MemoryError("GlobalAlloc 失败")
+        pointer = self.kernel32.GlobalLock(handle)
+        if not pointer:
+            self.kernel32.GlobalFree(handle)
+            raise MemoryError("GlobalLock 失败")
+        ctypes.memmove(pointer, payload, len(payload))
+        self.kernel32.GlobalUnlock(handle)
+        return handle
+
+    def set(self, data):
+        if not self._open():
+            raise OSError("剪贴板被其他程序占用")
+        try:
+            self.user32.EmptyClipboard()
+            for name, payload in data.items():
+                handle = self._global_copy(payload)
+                # 成功后内存归系统所有，失败时需要自己释放
+                if not self.user32.SetClipboardData(self.formats[name], handle):
+                    self.kernel32.GlobalFree(handle)
+                    raise OSError(f"写入剪贴板格式 {name} 失败")
+        finally:
+            self.user32.CloseClipboard()
+
+    def close(self):
+        if self._hwnd is not None:
+            self.user32.DestroyWindow(self._hwnd)
+            self._hwnd = None
+
+
+class MemoryClipboard(ClipboardBackend):
+    """测试用的内存剪贴板 (可在 Linux 上使用)：delay 模拟写入剪贴板的耗时"""
+    name = "memory"
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.data = {}
+        self.history = []  # 每次写入的 (时刻, 格式列表)
+        self._lock = threading.Lock()
+
+    def set(self, data):
+        # 和 Win32 后端一样只接受 bytes/bytearray (ctypes.memmove 不接受 memoryview)
+        for name, payload in data.items():
+            if not isinstance(payload, (bytes, bytearray)):
+                raise TypeError(f"剪贴板格式 {name} 的数据类型错误: {type(payload).__name__}")
+        if self.delay:
+            time.sleep(self.delay)
+        with self._lock:
+            self.data = dict(data)
+            self.history.append((time.perf_counter(), sorted(data)))
+
+
+def create_clipboard_backend():
+    """当前平台的剪贴板后端，不支持时返回 None"""
+    if sys.platform != "win32":
+        return None
+    return Win32Clipboard()
+
+
+class ClipboardSink:
+    """
+    后台剪贴板发布：截图流水线的 worker 只把 (图像, 已编码的 PNG) 放进单个槽位就返回，
+    由独立线程写入剪贴板。连续截图时新的一张覆盖还没发布的旧的，只发布最新一张。
+    """
+
+    def __init__(self, backend, formats=FORMATS):
+        self.backend = backend
+        self.set_formats(formats)
+        self._pending = None
+        self._cond = threading.Condition()
+        self._busy = False
+        self._closed = False
+        # 统计
+        self.submitted = 0
+        self.published = 0
+        self.coalesced = 0
+        self.failed = 0
+        self.last_latency = None  # 最近一次从提交到写入剪贴板的耗时 (秒)
+        self._thread = threading.Thread(target=self._loop, name="clipboard", daemon=True)
+        self._thread.start()
+
+    def set_formats(self, formats):
+        unknown = [f for f in formats if f not in FORMATS]
+        if unknown:
+            print(f"[Clipboard] 忽略未知的剪贴板格式: {', '.join(unknown)} (可选: {', '.join(FORMATS)})")
+        self.formats = tuple(f for f in formats if f in FORMATS) or (FORMAT_DIB,)
+
+    def submit(self, image, png=None):
+        """
+        [worker 线程] image 为截图的 PIL 图像 (或 RawFrame)，png 为已编码的 PNG 字节 (没有则为 None)。
+        只保存引用，不做任何转换。
+        """
+        with self._cond:
+            if self._pending is not None:
+                self.coalesced += 1
+            self._pending = (image, png, time.perf_counter())
+            self.submitted += 1
+            self._cond.notify()
+
+    def _build(self, image, png):
+        data = {}
+        if FORMAT_PNG in self.formats and png is not None:
+            # 编码器返回的是 BytesIO 的 memoryview，ctypes.memmove 不接受，在剪贴板线程里转成 bytes
+            data[FORMAT_PNG] = png if isinstance(png, (bytes, bytearray)) else bytes(png)
+        if FORMAT_DIB in self.formats or not data:
+            if hasattr(image, "to_image"):
+                image = image.to_image()
+            data[FORMAT_DIB] = make_dib(image)
+        return data
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._pending is None:
+                    break
+                image, png, submitted_at = self._pending
+                self._pending = None
+                self._busy = True
+            try:
+                self.backend.set(self._build(image, png))
+                self.published += 1
+                self.last_latency = time.perf_counter() - submitted_at
+            except Exception as e:
+                self.failed += 1
+                print(f"[Clipboard] 复制到剪贴板失败: {e}")
+            finally:
+                del image, png
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+        # 所有者窗口属于本线程，在这里销毁
+        self.backend.close()
+
+    def flush(self, timeout=None):
+        """等待待发布的截图写入剪贴板"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending is not None or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self):
+        return {"submitted": self.submitted, "published": self.published, "coalesced": self.coalesced,
+                "failed": self.failed,
+                "last_latency_ms": round(self.last_latency * 1000, 2) if self.last_latency is not None else None}
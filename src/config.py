@@ -1,21 +1,15 @@
 import json
 import os
 import sys
+import threading
+
+# 配置文件路径放在不依赖其他模块的 paths 中 (启动时抢先注册热键要单独读取)
+from .paths import BASE_DIR, CONFIG_FILE
 
 # 优先读取系统环境变量 'GSS_VERSION' (方便IDE调试)
 # 如果没有，默认为 'dev' (本地开发模式)
 # CI 打包时，GitHub Actions 会把这一行替换为具体 Tag
 APP_VERSION = os.getenv("GSS_VERSION", "dev")
-# 确定配置文件的绝对路径，确保读写的是同一个文件
-if getattr(sys, 'frozen', False):
-    # 打包环境：使用 EXE 所在的目录
-    BASE_DIR = os.path.dirname(sys.executable)
-else:
-    # 开发环境：使用入口脚本 (main.py) 所在的目录
-    # sys.argv[0] 通常是 main.py 的路径
-    BASE_DIR = os.path.dirname(os.path.abspath(sys.argv[0]))
-
-CONFIG_FILE = os.path.join(BASE_DIR, 'config.json')
 
 
 # 获取资源路径（兼容 PyInstaller）
@@ -25,6 +19,106 @@ def get_resource_path(relative_path):
     return os.path.join(os.path.abspath("."), relative_path)
 
 
+# 配置文件变化检测间隔 (秒)：只做一次 os.stat，几乎没有开销
+WATCH_INTERVAL = 1.0
+
+# 取值受限的字段 (类型之外的额外校验)
+CHOICES = {
+    "pipeline_policy": ("block", "drop_oldest", "spill"),
+    "shadow_save_mode": ("best", "all"),
+    "dedup_action": ("skip", "hardlink"),
+    "log_level": ("DEBUG", "INFO", "WARNING", "ERROR"),
+    "capture_mode": ("monitor", "window", "all_monitors"),
+}
+# 不能为空的字段
+REQUIRED = ("hotkey", "save_dir")
+# 文件名模板可用的字段 (与 FilenameAllocator 一致)，校验时用示例值试格式化一次
+TEMPLATE_SAMPLE = {"prefix": "screenshot", "date": "2024-01-31", "time": "12-30-45", "ms": "042", "seq": 0}
+
+
+class FrozenDict(dict):
+    """只读字典 (配置快照里的嵌套对象)，仍可 json 序列化、传给子进程"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("配置快照不可修改")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return FrozenDict((k, _freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class ConfigSnapshot:
+    """
+    不可变的配置快照：字段是普通实例属性 (读取就是一次字典查找)，
+    重载时整体替换引用，读取方永远看到一份完整一致的配置。
+    """
+
+    def __init__(self, values):
+        for key, value in values.items():
+            object.__setattr__(self, key, _freeze(value))
+
+    def __setattr__(self, key, value):
+        raise AttributeError("配置快照不可修改")
+
+    __delattr__ = __setattr__
+
+    def get(self, key, default=None):
+        return self.__dict__.get(key, default)
+
+    def as_dict(self):
+        return dict(self.__dict__)
+
+
+def _check_value(key, value, default):
+    """校验单个字段，返回 (规范化后的值, 错误信息)"""
+    if isinstance(default, bool):
+        ok = isinstance(value, bool)
+    elif isinstance(default, int):
+        # 写成 4.0 的整数字段按整数处理；可以取小数的字段 (帧率、秒数等) 默认值为 float
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        ok = isinstance(value, int) and not isinstance(value, bool)
+    elif isinstance(default, float):
+        ok = isinstance(value, (int, float)) and not isinstance(value, bool)
+    elif isinstance(default, str):
+        # 端口之类的字段允许写成数字
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = str(value)
+        ok = isinstance(value, str)
+    elif isinstance(default, list):
+        ok = isinstance(value, list)
+    elif isinstance(default, dict):
+        ok = isinstance(value, dict)
+    else:
+        ok = True
+    if not ok:
+        return default, f"'{key}' 类型应为 {type(default).__name__}，实际为 {type(value).__name__}"
+    if key in CHOICES:
+        # 不区分大小写，返回规范写法 (使用方按原样比较，例如 "Block" -> "block")
+        canonical = {c.upper(): c for c in CHOICES[key]}.get(str(value).upper())
+        if canonical is None:
+            return default, f"'{key}' 只能是 {'/'.join(CHOICES[key])}，实际为 {value!r}"
+        value = canonical
+    if key in REQUIRED and not str(value).strip():
+        return default, f"'{key}' 不能为空"
+    if key == "filename_template" and value:
+        try:
+            value.format(**TEMPLATE_SAMPLE)
+        except (KeyError, IndexError, ValueError, AttributeError) as e:
+            fields = " ".join(f"{{{name}}}" for name in TEMPLATE_SAMPLE)
+            return default, f"'{key}' 无法格式化 ({type(e).__name__}: {e})，可用字段: {fields}"
+    return value, None
+
+
 class ConfigManager:
     def __init__(self):
         self.default_config = {
@@ -33,15 +127,78 @@ class ConfigManager:
             "show_notification": True,
             "suppress_key": True,
             "auto_update": True,
-            "proxy_port": ""
+            "proxy_port": "",
+            "pipeline_depth": 4,
+            "pipeline_workers": 2,
+            "pipeline_policy": "block",
+            "shadow_enabled": False,
+            "shadow_hotkey": "ctrl+f12",
+            "shadow_fps": 2.0,
+            "shadow_seconds": 5.0,
+            "shadow_memory_mb": 512,
+            "shadow_save_mode": "best",
+            "capture_backend": "imagegrab",
+            "capture_mode": "monitor",
+            "capture_regions": {},
+            "synthetic_resolution": [1920, 1080],
+            "synthetic_pattern": "scene",
+            "encoder": "png",
+            "encoder_options": {},
+            "hotkey_encoders": {},
+            "recompress_enabled": False,
+            "recompress_sources": ["raw", "png_fast"],
+            "recompress_target": "png_max",
+            "recompress_workers": 1,
+            "recompress_idle_seconds": 120.0,
+            "recompress_interval_minutes": 0.0,
+            "burst_hotkey": "",
+            "burst_fps": 15.0,
+            "burst_frames": 0,
+            "burst_max_seconds": 10.0,
+            "burst_buffers": 8,
+            "burst_workers": 3,
+            "burst_encoder": "png_fast",
+            "dedup_enabled": False,
+            "dedup_distance": 4,
+            "dedup_action": "skip",
+            "library_enabled": True,
+            "classify_enabled": False,
+            "classify_rules": {},
+            "classify_fallback": "{process}",
+            "clipboard_enabled": False,
+            "clipboard_formats": ["dib", "png"],
+            "filename_template": "{prefix}_{date}_{time}",
+            "log_level": "INFO",
+            "log_max_mb": 5.0,
+            "log_backups": 3,
+            "update_check_interval_minutes": 60.0,
+            "metrics_enabled": False,
+            "metrics_port": 0
         }
+        self._lock = threading.Lock()
+        self._subscribers = []
+        self._stat = None
+        self._watcher = None
         self.data = self.load()
+        self.snapshot, errors = self.validate(self.data)
+        for error in errors:
+            print(f"[Config] 配置无效: {error}，该字段使用默认值")
+
+    def validate(self, data):
+        """按默认配置的类型校验，返回 (快照, 错误列表)；出错的字段回退为默认值"""
+        values = dict(data)
+        errors = []
+        for key, default in self.default_config.items():
+            values[key], error = _check_value(key, data.get(key, default), default)
+            if error:
+                errors.append(error)
+        return ConfigSnapshot(values), errors
 
     def load(self):
         # 1. 如果文件不存在，直接写入默认配置
         if not os.path.exists(CONFIG_FILE):
             self.save(self.default_config)
-            return self.default_config
+            return dict(self.default_config)
 
         try:
             with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
@@ -65,18 +222,99 @@ class ConfigManager:
 
         except Exception as e:
             print(f"配置读取失败: {e}，将使用默认配置。")
-            return self.default_config
+            return dict(self.default_config)
 
     def save(self, data):
         """保存配置到文件"""
         try:
             with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=4, ensure_ascii=False)
+            # 自己写入的修改不需要再触发一次重载
+            self._stat = self._file_stat()
         except Exception as e:
             print(f"配置保存失败: {e}")
 
     def get(self, key, default=None):
-        return self.data.get(key, default)
+        return self.snapshot.get(key, default)
+
+    def subscribe(self, callback, keys=None):
+        """
+        订阅配置变化：callback(old, new, changed) 在检测线程中调用，
+        changed 为发生变化的字段集合；指定 keys 时只在这些字段变化时通知。
+        """
+        self._subscribers.append((callback, set(keys) if keys else None))
+
+    @staticmethod
+    def _file_stat():
+        try:
+            st = os.stat(CONFIG_FILE)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def reload(self):
+        """
+        重新读取 config.json，成功时原子替换快照并通知订阅者，返回变化的字段集合。
+        文件损坏或校验失败时保留上一份有效配置，返回 None。
+        """
+        with self._lock:
+            self._stat = self._file_stat()
+            try:
+                with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if not isinstance(data, dict):
+                    raise ValueError("顶层必须是对象")
+            except Exception as e:
+                print(f"[Config] 配置文件解析失败 ({e})，继续使用上一份有效配置")
+                return None
+            merged = dict(self.default_config)
+            merged.update(data)
+            snapshot, errors = self.validate(merged)
+            if errors:
+                print(f"[Config] 配置校验失败 ({'; '.join(errors)})，继续使用上一份有效配置")
+                return None
+
+            old = self.snapshot
+            changed = {key for key in set(old.__dict__) | set(snapshot.__dict__)
+                       if old.get(key) != snapshot.get(key)}
+            if not changed:
+                return changed
+            self.data = merged
+            self.snapshot = snapshot
+        print(f"[Config] 配置已重新加载，变化的字段: {', '.join(sorted(changed))}")
+
+        for callback, keys in list(self._subscribers):
+            if keys is None or keys & changed:
+                try:
+                    callback(old, snapshot, changed)
+                except Exception as e:
+                    print(f"[Config] 配置变化处理失败 ({getattr(callback, '__name__', callback)}): {e}")
+        return changed
+
+    def check_for_changes(self):
+        """文件的 mtime/大小变化时才真正重新读取"""
+        if self._file_stat() != self._stat:
+            return self.reload()
+        return None
+
+    def start_watching(self, interval=WATCH_INTERVAL):
+        """启动后台检测线程 (重复调用无效)"""
+        if self._watcher:
+            return
+        self._stat = self._file_stat()
+        stop = threading.Event()
+
+        def loop():
+            while not stop.wait(interval):
+                self.check_for_changes()
+
+        self._watcher = stop
+        threading.Thread(target=loop, name="config-watch", daemon=True).start()
+
+    def stop_watching(self):
+        if self._watcher:
+            self._watcher.set()
+            self._watcher = None
 
 
 # 创建全局单例
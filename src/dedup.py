@@ -0,0 +1,122 @@
+import json
+import os
+import threading
+
+from PIL import Image
+
+from .logger import log, DEBUG
+
+INDEX_FILENAME = ".gss_hashes.jsonl"
+# dHash 使用 9x8 灰度缩略图，相邻像素比较得到 64 位指纹
+HASH_SIZE = 8
+
+
+def dhash(image):
+    """
+    差值哈希 (dHash)。
+    先用 Pillow 的 reduce 在 C 层做整数倍盒式缩小，再缩放到 9x8，4K 画面也只需几毫秒。
+    """
+    small = image.resize((HASH_SIZE + 1, HASH_SIZE), Image.BILINEAR, reducing_gap=2.0).convert("L")
+    pixels = small.tobytes()
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class HashIndex:
+    """
+    感知哈希索引 (多索引哈希)：
+    把 64 位指纹切成 max_distance + 1 段，两个指纹的汉明距离不超过 max_distance 时，
+    根据抽屉原理至少有一段完全相同。因此只需对每一段做一次字典查找，与历史数量无关。
+    """
+
+    def __init__(self, save_dir, max_distance=4):
+        self.max_distance = max(0, min(int(max_distance), 15))
+        self.path = os.path.join(save_dir, INDEX_FILENAME)
+        self.save_dir = save_dir
+        bands = self.max_distance + 1
+        width = 64 // bands
+        # 每段的 (位移, 掩码)；最后一段吸收除不尽的位
+        self._bands = []
+        for i in range(bands):
+            bits = width if i < bands - 1 else 64 - width * (bands - 1)
+            self._bands.append((i * width, (1 << bits) - 1))
+        self._tables = [dict() for _ in self._bands]
+        self._lock = threading.Lock()
+        self._load()
+
+    def _keys(self, value):
+        return [(value >> shift) & mask for shift, mask in self._bands]
+
+    def _insert(self, entry):
+        for table, key in zip(self._tables, self._keys(entry["hash"])):
+            table.setdefault(key, []).append(entry)
+
+    def _remove(self, entry):
+        for table, key in zip(self._tables, self._keys(entry["hash"])):
+            bucket = table.get(key)
+            if bucket and entry in bucket:
+                bucket.remove(entry)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        count = 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    entry = {"hash": int(record["h"], 16), "path": os.path.join(self.save_dir, record["p"])}
+                except (ValueError, KeyError):
+                    continue
+                self._insert(entry)
+                count += 1
+        log(f"[Dedup] 已加载 {count} 条截图指纹", DEBUG)
+
+    def find(self, value):
+        """返回距离最近且在阈值内的条目，没有则返回 None"""
+        best = None
+        best_distance = self.max_distance + 1
+        for table, key in zip(self._tables, self._keys(value)):
+            for entry in table.get(key, ()):
+                distance = hamming(value, entry["hash"])
+                if distance < best_distance:
+                    best, best_distance = entry, distance
+        return best
+
+    def check_and_reserve(self, value):
+        """
+        原子地查重并登记：有相似画面时返回 (已有条目, None)，
+        否则登记一个尚未落盘的新条目并返回 (None, 新条目)。
+        """
+        with self._lock:
+            match = self.find(value)
+            # 已被用户删除的截图不算重复
+            while match is not None and match["path"] is not None and not os.path.exists(match["path"]):
+                self._remove(match)
+                match = self.find(value)
+            if match is not None:
+                return match, None
+            entry = {"hash": value, "path": None}
+            self._insert(entry)
+            return None, entry
+
+    def commit(self, entry, path):
+        """截图落盘后记录路径，并追加到磁盘索引"""
+        with self._lock:
+            entry["path"] = path
+            record = {"h": f"{entry['hash']:016x}", "p": os.path.relpath(path, self.save_dir)}
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def discard(self, entry):
+        """保存失败时撤销登记"""
+        with self._lock:
+            self._remove(entry)
@@ -0,0 +1,190 @@
+import hashlib
+import os
+import struct
+import zlib
+
+# 补丁文件格式 (所有整数为小端)：
+#   头部   MAGIC | 旧文件大小 u64 | 旧文件 SHA-256 | 新文件大小 u64 | 新文件 SHA-256
+#   指令   OP_COPY u8 | 旧文件偏移 u64 | 长度 u32          —— 从旧文件复制
+#          OP_DATA u8 | 原始长度 u32 | 压缩长度 u32 | zlib 数据 —— 新增内容
+#          OP_END  u8
+MAGIC = b"GSSDELTA1\n"
+OP_END, OP_COPY, OP_DATA = 0, 1, 2
+HEADER = struct.Struct("<Q32sQ32s")
+COPY = struct.Struct("<QI")
+DATA = struct.Struct("<II")
+
+# 内容定义分块 (CDC)：块边界由内容决定，插入/删除只影响附近的块，后面的块仍能对齐复用
+CHUNK_MIN = 2 * 1024
+CHUNK_AVG_BITS = 13  # 平均约 8 KB
+CHUNK_MAX = 64 * 1024
+COPY_MAX = 0xFFFFFFFF
+STREAM_BLOCK = 1024 * 1024
+
+
+class DeltaError(Exception):
+    """补丁与当前文件不匹配，或应用结果校验失败"""
+
+
+def _gear_table():
+    # 固定种子生成的 256 个随机 32 位数，生成端和任何版本都必须一致
+    table = []
+    state = 0x9E3779B9
+    for _ in range(256):
+        state = (state * 6364136223846793005 + 1442695040888963407) & 0xFFFFFFFFFFFFFFFF
+        table.append(state >> 32)
+    return table
+
+
+GEAR = _gear_table()
+
+
+def chunk_boundaries(data):
+    """Gear 哈希分块，返回每块的 (起点, 终点)"""
+    mask = (1 << CHUNK_AVG_BITS) - 1
+    gear = GEAR
+    chunks = []
+    start = 0
+    size = len(data)
+    while start < size:
+        end = min(size, start + CHUNK_MAX)
+        h = 0
+        i = start + CHUNK_MIN
+        cut = end
+        while i < end:
+            h = ((h << 1) + gear[data[i]]) & 0xFFFFFFFF
+            if not h & mask:
+                cut = i + 1
+                break
+            i += 1
+        chunks.append((start, cut))
+        start = cut
+    return chunks
+
+
+def _file_sha256(path):
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(STREAM_BLOCK)
+            if not block:
+                break
+            hasher.update(block)
+    return hasher.digest()
+
+
+def make_patch(old_data, new_data):
+    """生成补丁 (发布端使用)，返回 (补丁 bytes, 统计信息)"""
+    index = {}
+    for start, end in chunk_boundaries(old_data):
+        index.setdefault(hashlib.sha1(old_data[start:end]).digest(), (start, end - start))
+
+    ops = []  # [("copy", offset, length) | ("data", start, end)]
+    reused = 0
+    for start, end in chunk_boundaries(new_data):
+        match = index.get(hashlib.sha1(new_data[start:end]).digest())
+        last = ops[-1] if ops else None
+        if match:
+            offset, length = match
+            reused += length
+            # 连续的复制合并成一条指令
+            if last and last[0] == "copy" and last[1] + last[2] == offset and last[2] + length <= COPY_MAX:
+                ops[-1] = ("copy", last[1], last[2] + length)
+            else:
+                ops.append(("copy", offset, length))
+        elif last and last[0] == "data" and last[2] == start and end - last[1] <= CHUNK_MAX * 16:
+            ops[-1] = ("data", last[1], end)
+        else:
+            ops.append(("data", start, end))
+
+    parts = [MAGIC, HEADER.pack(len(old_data), hashlib.sha256(old_data).digest(),
+                                len(new_data), hashlib.sha256(new_data).digest())]
+    for op in ops:
+        if op[0] == "copy":
+            parts.append(bytes([OP_COPY]) + COPY.pack(op[1], op[2]))
+        else:
+            raw = new_data[op[1]:op[2]]
+            packed = zlib.compress(raw, 9)
+            parts.append(bytes([OP_DATA]) + DATA.pack(len(raw), len(packed)) + packed)
+    parts.append(bytes([OP_END]))
+    patch = b"".join(parts)
+    stats = {"old_size": len(old_data), "new_size": len(new_data), "patch_size": len(patch),
+             "reused_bytes": reused, "ops": len(ops)}
+    return patch, stats
+
+
+def read_header(f):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise DeltaError("不是有效的补丁文件")
+    old_size, old_hash, new_size, new_hash = HEADER.unpack(f.read(HEADER.size))
+    return old_size, old_hash, new_size, new_hash
+
+
+def apply_patch(old_path, patch_path, out_path):
+    """
+    把补丁应用到 old_path，结果流式写入 out_path (客户端使用)。
+    先确认旧文件与补丁的基准版本一致，写完后校验新文件的 SHA-256，
+    任何一步不匹配都会删除 out_path 并抛出 DeltaError。返回新文件的 SHA-256 (hex)。
+    """
+    with open(patch_path, "rb") as patch:
+        old_size, old_hash, new_size, new_hash = read_header(patch)
+        if os.path.getsize(old_path) != old_size or _file_sha256(old_path) != old_hash:
+            raise DeltaError("当前程序与补丁的基准版本不一致")
+
+        hasher = hashlib.sha256()
+        written = 0
+        try:
+            with open(old_path, "rb") as old, open(out_path, "wb") as out:
+                while True:
+                    op = patch.read(1)
+                    if not op:
+                        raise DeltaError("补丁文件不完整")
+                    op = op[0]
+                    if op == OP_END:
+                        break
+                    if op == OP_COPY:
+                        offset, length = COPY.unpack(patch.read(COPY.size))
+                        if offset + length > old_size:
+                            raise DeltaError("补丁引用超出旧文件范围")
+                        old.seek(offset)
+                        while length:
+                            block = old.read(min(length, STREAM_BLOCK))
+                            if not block:
+                                raise DeltaError("旧文件读取不完整")
+                            out.write(block)
+                            hasher.update(block)
+                            written += len(block)
+                            length -= len(block)
+                    elif op == OP_DATA:
+                        raw_len, packed_len = DATA.unpack(patch.read(DATA.size))
+                        try:
+                            block = zlib.decompress(patch.read(packed_len))
+                        except zlib.error:
+                            raise DeltaError("补丁数据块损坏")
+                        if len(block) != raw_len:
+                            raise DeltaError("补丁数据块损坏")
+                        out.write(block)
+                        hasher.update(block)
+                        written += len(block)
+                    else:
+                        raise DeltaError(f"未知的补丁指令 {op}")
+
+            if written != new_size or hasher.digest() != new_hash:
+                raise DeltaError("应用补丁后的文件校验失败")
+        except struct.error:
+            _remove(out_path)
+            raise DeltaError("补丁文件不完整")
+        except Exception:
+            _remove(out_path)
+            raise
+    return hasher.hexdigest()
+
+
+def _remove(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def delta_asset_name(from_version):
+    """发布附件中从指定版本升级的补丁文件名，例如 GameShadowSnap_v1.2.0.delta"""
+    return f"GameShadowSnap_v{from_version.lstrip('v')}.delta"
@@ -0,0 +1,255 @@
+import hashlib
+import json
+import os
+import re
+import time
+
+# 自适应分块：每次读取尽量耗时 TARGET_READ_SECONDS，块大小在 [CHUNK_MIN, CHUNK_MAX] 内翻倍/减半
+CHUNK_MIN = 64 * 1024
+CHUNK_MAX = 4 * 1024 * 1024
+TARGET_READ_SECONDS = 0.25
+# 连续多少次没有任何进展的失败后放弃
+MAX_RETRIES = 6
+RETRY_BACKOFF_MAX = 10.0
+HASH_BLOCK = 1024 * 1024
+
+PART_SUFFIX = ".part"
+META_SUFFIX = ".part.json"
+
+
+class DownloadError(Exception):
+    """不可重试的下载错误 (HTTP 4xx、重试次数用尽等)"""
+
+
+class IntegrityError(DownloadError):
+    """下载完成但 SHA-256 与发布的摘要不一致"""
+
+
+def parse_sha256(text):
+    """
+    从发布附带的摘要中取出 SHA-256，兼容：
+    'sha256:<hex>' (GitHub asset digest)、'<hex>  GameShadowSnap.zip' (sha256sum 输出)、纯 '<hex>'
+    """
+    if not text:
+        return None
+    match = re.search(r"(?:sha256:)?\b([0-9a-fA-F]{64})\b", text)
+    return match.group(1).lower() if match else None
+
+
+def _content_range_start(value):
+    """'bytes 100-199/200' -> 100"""
+    match = re.match(r"bytes\s+(\d+)-\d+/(\d+|\*)", value or "")
+    return int(match.group(1)) if match else None
+
+
+class ResumableDownload:
+    """
+    可断点续传的下载：
+    数据先写入 <dest>.part，旁边的 <dest>.part.json 记录 URL 与 ETag/Last-Modified；
+    连接中断或程序重启后用 HTTP Range (+ If-Range) 从已下载的位置继续。
+    下载过程中增量计算 SHA-256，全部完成并校验通过后才重命名为 dest。
+
+    request: 与 requests.get 签名一致的函数 (url, headers=, stream=, timeout=)，
+    返回的对象需要有 status_code / headers / raw.read(n) / close()。
+
+    sink: 不为 None 时每块数据在写入 .part 的同时交给 sink (例如 ZipMemberStream 边下载边解压)。
+    sink 需要提供 write(data) / reset() / close() / abort()；程序重启后先把 .part 中已下载的部分
+    重新喂给 sink，再用 Range 继续下载。全部完成后删除 .part，不重命名为 dest (结果由 sink 产出)。
+    """
+
+    def __init__(self, url, dest, request, expected_sha256=None, progress=None,
+                 retries=MAX_RETRIES, timeout=30, sleep=time.sleep, sink=None):
+        self.url = url
+        self.dest = dest
+        self.request = request
+        self.expected_sha256 = expected_sha256.lower() if expected_sha256 else None
+        self.progress = progress  # progress(已下载字节, 总字节或 0)
+        self.retries = retries
+        self.timeout = timeout
+        self.sleep = sleep
+        self.sink = sink
+
+        self.part_path = dest + PART_SUFFIX
+        self.meta_path = dest + META_SUFFIX
+        self.total = 0
+        self.validator = None
+        self.chunk_size = CHUNK_MIN
+        self.offset = 0
+        self._hasher = None
+        # 统计
+        self.resumed_from = 0
+        self.reconnects = 0
+        self.sha256 = None
+
+    # ---------- 断点信息 ----------
+    def _load_meta(self):
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get("url") == self.url else None
+
+    def _save_meta(self):
+        with open(self.meta_path, "w", encoding="utf-8") as f:
+            json.dump({"url": self.url, "validator": self.validator, "total": self.total}, f)
+
+    def _restart(self):
+        """丢弃已下载的部分，从头开始"""
+        if self.sink is not None:
+            self.sink.reset()
+        open(self.part_path, "wb").close()
+        return hashlib.sha256(), 0
+
+    def _resume_state(self):
+        """返回 (hasher, offset)：把已下载部分重新计算一遍哈希，之后增量更新"""
+        hasher = hashlib.sha256()
+        meta = self._load_meta()
+        if not meta or not os.path.exists(self.part_path):
+            return self._restart()
+        self.validator = meta.get("validator")
+        self.total = meta.get("total") or 0
+        if self.total and os.path.getsize(self.part_path) > self.total:
+            return self._restart()
+        if self.sink is not None:
+            self.sink.reset()
+        offset = 0
+        try:
+            with open(self.part_path, "rb") as f:
+                while True:
+                    block = f.read(HASH_BLOCK)
+                    if not block:
+                        break
+                    hasher.update(block)
+                    offset += len(block)
+                    if self.sink is not None:
+                        self.sink.write(block)  # 重建 sink 的状态 (例如解压到一半的 EXE)
+        except DownloadError as e:
+            print(f"[Download] 已下载的部分无法继续使用 ({e})，从头下载")
+            return self._restart()
+        return hasher, offset
+
+    # ---------- 下载 ----------
+    def _open(self, offset):
+        # 禁止压缩传输，保证 Range 的偏移就是文件偏移
+        headers = {"Accept-Encoding": "identity"}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            if self.validator:
+                # 服务器上的文件变了就返回完整内容 (200)，而不是拼出一个损坏的文件
+                headers["If-Range"] = self.validator
+        return self.request(self.url, headers=headers, stream=True, timeout=self.timeout)
+
+    def _adapt_chunk(self, elapsed):
+        if elapsed < TARGET_READ_SECONDS / 2 and self.chunk_size < CHUNK_MAX:
+            self.chunk_size *= 2
+        elif elapsed > TARGET_READ_SECONDS * 2 and self.chunk_size > CHUNK_MIN:
+            self.chunk_size //= 2
+
+    def _stream(self, response, f):
+        """把响应体追加到 .part (同时交给 sink)；连接中途断开时抛出异常 (已写入的部分保留在 self.offset 中)"""
+        while True:
+            t0 = time.perf_counter()
+            chunk = response.raw.read(self.chunk_size)
+            if not chunk:
+                break
+            f.write(chunk)
+            if self.sink is not None:
+                self.sink.write(chunk)
+            self._hasher.update(chunk)
+            self.offset += len(chunk)
+            self._adapt_chunk(time.perf_counter() - t0)
+            if self.progress:
+                self.progress(self.offset, self.total)
+        if self.total and self.offset < self.total:
+            raise ConnectionError(f"连接提前结束 ({self.offset}/{self.total} 字节)")
+
+    def run(self):
+        """执行下载 (可重复调用以继续)，成功时返回 dest 路径 (使用 sink 时返回 sink.close() 的结果)"""
+        self._hasher, self.offset = self._resume_state()
+        self.resumed_from = self.offset
+        if self.offset:
+            print(f"[Download] 从 {self.offset / 1024 / 1024:.2f} MB 处继续下载")
+
+        try:
+            self._transfer()
+        except DownloadError:
+            if self.sink is not None:
+                self.sink.abort()
+            raise
+
+        self.sha256 = self._hasher.hexdigest()
+        if self.expected_sha256 and self.sha256 != self.expected_sha256:
+            # 内容已损坏，续传也救不回来，删掉重新下载
+            if self.sink is not None:
+                self.sink.abort()
+            for path in (self.part_path, self.meta_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            raise IntegrityError(f"SHA-256 校验失败: 期望 {self.expected_sha256}，实际 {self.sha256}")
+
+        if self.sink is not None:
+            try:
+                return self.sink.close()
+            finally:
+                # 校验已通过：不论 sink 是否产出结果，已下载的部分都不再需要续传
+                for path in (self.part_path, self.meta_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+        os.replace(self.part_path, self.dest)
+        if os.path.exists(self.meta_path):
+            os.remove(self.meta_path)
+        return self.dest
+
+    def _transfer(self):
+        failures = 0
+        while not (self.total and self.offset == self.total):
+            response = None
+            start_offset = self.offset
+            try:
+                response = self._open(self.offset)
+                status = response.status_code
+                if status == 416 and self.offset and self.total == self.offset:
+                    break
+                if status == 206:
+                    if _content_range_start(response.headers.get("Content-Range")) != self.offset:
+                        print("[Download] 服务器返回的续传范围不匹配，从头下载")
+                        self._hasher, self.offset = self._restart()
+                        self.validator = None
+                        continue
+                    if not self.total:
+                        total = (response.headers.get("Content-Range") or "").rpartition("/")[2]
+                        self.total = int(total) if total.isdigit() else 0
+                elif status == 200:
+                    if self.offset:
+                        print("[Download] 服务器不支持续传或文件已变化，从头下载")
+                    self._hasher, self.offset = self._restart()
+                    start_offset = 0
+                    self.total = int(response.headers.get("Content-Length") or 0)
+                elif 400 <= status < 500 and status not in (408, 429):
+                    raise DownloadError(f"HTTP {status}")
+                else:
+                    raise ConnectionError(f"HTTP {status}")
+
+                self.validator = response.headers.get("ETag") or response.headers.get("Last-Modified")
+                self._save_meta()
+
+                with open(self.part_path, "ab") as f:
+                    self._stream(response, f)
+                if not self.total:
+                    self.total = self.offset  # 服务器没给长度，以连接正常结束为准
+                break
+            except DownloadError:
+                raise
+            except Exception as e:
+                self.reconnects += 1
+                # 有进展就重置失败计数，只有原地打转才会放弃
+                failures = 0 if self.offset > start_offset else failures + 1
+                if failures > self.retries:
+                    raise DownloadError(f"下载失败，已重试 {self.retries} 次: {e}")
+                delay = min(RETRY_BACKOFF_MAX, 0.5 * 2 ** failures)
+                print(f"\n[Download] 连接中断 ({e})，{delay:.1f} 秒后从 {self.offset / 1024 / 1024:.2f} MB 处继续")
+                self.sleep(delay)
+            finally:
+                if response is not None:
+                    response.close()
@@ -0,0 +1,158 @@
+import importlib.util
+import io
+import threading
+import time
+
+from .utils import raw_frame_header, Chunks, RAW_EXTENSION
+
+
+class EncoderStats:
+    """累计某个编码器的输出体积和耗时 (多个 worker 线程共享)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.frames = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def record(self, size, seconds):
+        with self._lock:
+            self.frames += 1
+            self.bytes += size
+            self.seconds += seconds
+
+    def summary(self):
+        with self._lock:
+            if not self.frames:
+                return {"frames": 0, "bytes_per_frame": 0, "ms_per_frame": 0.0}
+            return {
+                "frames": self.frames,
+                "bytes_per_frame": self.bytes // self.frames,
+                "ms_per_frame": round(self.seconds / self.frames * 1000, 2),
+            }
+
+
+class Encoder:
+    """编码器基类：把 PIL 图像编码为内存中的文件内容"""
+    name = "base"
+    extension = ""
+
+    def __init__(self):
+        self.stats = EncoderStats()
+
+    def _encode(self, image):
+        raise NotImplementedError
+
+    def encode(self, image):
+        t0 = time.perf_counter()
+        data = self._encode(image)
+        self.stats.record(len(data), time.perf_counter() - t0)
+        return data
+
+
+class PillowEncoder(Encoder):
+    """通过 Pillow 的 save() 编码，params 原样传给 save"""
+
+    def __init__(self, name, extension, format, **params):
+        super().__init__()
+        self.name = name
+        self.extension = extension
+        self.format = format
+        self.params = params
+
+    def _encode(self, image):
+        # JPEG 不支持透明通道
+        if self.format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        buffer = io.BytesIO()
+        image.save(buffer, format=self.format, **self.params)
+        return buffer.getbuffer()
+
+
+class QOIEncoder(Encoder):
+    """
+    QOI (Quite OK Image) 快速无损格式，需要可选依赖 `qoi` (pip install qoi numpy，C 实现)。
+    Pillow 11.3+ 虽然也能写 QOI，但它的编码器是纯 Python 实现，4K 一帧要 8 秒以上 (比 png 慢约 20 倍)，
+    不符合"快速"的定位，因此不使用。
+    """
+    name = "qoi"
+    extension = ".qoi"
+
+    def __init__(self):
+        super().__init__()
+        # 只检查依赖是否已安装，真正的导入推迟到第一次编码
+        if importlib.util.find_spec("numpy") is None or importlib.util.find_spec("qoi") is None:
+            raise RuntimeError("QOI 编码需要 pip install qoi numpy (Pillow 自带的 QOI 写入太慢，不使用)")
+
+    def _encode(self, image):
+        import numpy
+        import qoi
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGB")
+        return qoi.encode(numpy.asarray(image))
+
+
+class RawEncoder(Encoder):
+    """不压缩，直接输出 .gssraw 原始像素 (最快，但体积最大)"""
+    name = "raw"
+    extension = RAW_EXTENSION
+
+    def _encode(self, image):
+        # 文件头和像素分段写盘，不为拼接再复制一次整帧
+        return Chunks(raw_frame_header(image), image.tobytes())
+
+
+# 预设: 名称 -> (构造函数, 参数)
+# 选择时可以在 encoder_options 中按名称覆盖参数，例如 {"jpeg": {"quality": 85}}
+PRESETS = {
+    "png_fast": (PillowEncoder, {"extension": ".png", "format": "PNG", "compress_level": 1}),
+    "png": (PillowEncoder, {"extension": ".png", "format": "PNG", "compress_level": 6}),
+    "png_max": (PillowEncoder, {"extension": ".png", "format": "PNG", "compress_level": 9, "optimize": True}),
+    "webp_lossless": (PillowEncoder, {"extension": ".webp", "format": "WEBP", "lossless": True,
+                                      "quality": 50, "method": 2}),
+    "webp": (PillowEncoder, {"extension": ".webp", "format": "WEBP", "quality": 90, "method": 4}),
+    "jpeg": (PillowEncoder, {"extension": ".jpg", "format": "JPEG", "quality": 92}),
+    "qoi": (QOIEncoder, {}),
+    "raw": (RawEncoder, {}),
+}
+
+
+class EncoderRegistry:
+    """按名称创建并缓存编码器，同一名称共享一份统计数据"""
+
+    def __init__(self, options=None):
+        self.options = options or {}
+        self._encoders = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            if name in self._encoders:
+                return self._encoders[name]
+            if name not in PRESETS:
+                raise ValueError(f"未知的编码器: {name} (可选: {', '.join(PRESETS)})")
+            factory, params = PRESETS[name]
+            params = dict(params, **self.options.get(name, {}))
+            if factory is PillowEncoder:
+                encoder = PillowEncoder(name, **params)
+            else:
+                encoder = factory(**params)
+            self._encoders[name] = encoder
+            return encoder
+
+    def available(self):
+        """返回当前环境可用的编码器名称"""
+        result = []
+        for name in PRESETS:
+            try:
+                self.get(name)
+                result.append(name)
+            except Exception:
+                pass
+        return result
+
+    def report(self):
+        """每个编码器的平均体积和耗时"""
+        with self._lock:
+            encoders = dict(self._encoders)
+        return {name: encoder.stats.summary() for name, encoder in encoders.items()}
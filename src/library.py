@@ -0,0 +1,237 @@
+import os
+import sqlite3
+import threading
+import time
+
+from .logger import log, DEBUG
+from .utils import read_raw_frame_info, RAW_EXTENSION
+
+DB_FILENAME = ".gss_library.db"
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".qoi", RAW_EXTENSION}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS captures (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,      -- 相对 save_dir 的路径
+    dir TEXT NOT NULL,              -- 所在子目录 (相对路径，根目录为 '')
+    taken_at REAL NOT NULL,         -- 截图时间 (Unix 时间戳)
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    width INTEGER,
+    height INTEGER,
+    encoder TEXT,
+    bbox TEXT,
+    window_title TEXT,
+    process TEXT,
+    game TEXT,
+    phash TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_captures_taken_at ON captures(taken_at);
+CREATE INDEX IF NOT EXISTS idx_captures_game ON captures(game, taken_at);
+CREATE INDEX IF NOT EXISTS idx_captures_dir ON captures(dir);
+CREATE TABLE IF NOT EXISTS dirs (
+    dir TEXT PRIMARY KEY,
+    mtime REAL NOT NULL
+);
+"""
+
+COLUMNS = ("path", "taken_at", "size", "width", "height", "encoder", "bbox",
+           "window_title", "process", "game", "phash")
+
+
+def _image_size(path):
+    """只读文件头获取分辨率，读不出来时返回 (None, None)"""
+    try:
+        if path.endswith(RAW_EXTENSION):
+            width, height, mode = read_raw_frame_info(path)
+            return width, height
+        from PIL import Image
+        with Image.open(path) as image:
+            return image.size
+    except Exception:
+        return None, None
+
+
+class ScreenshotLibrary:
+    """
+    截图库索引 (SQLite)：
+    每张截图落盘时写入一条记录；程序外新增/删除的文件通过基于目录 mtime 的增量扫描同步。
+    """
+
+    def __init__(self, save_dir):
+        self.save_dir = os.path.abspath(save_dir)
+        self.db_path = os.path.join(self.save_dir, DB_FILENAME)
+        self._lock = threading.Lock()
+        self._closed = False
+        # 截图 worker、扫描线程、查询方都会用到同一个连接，由 _lock 串行化
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def _relpath(self, path):
+        return os.path.relpath(os.path.abspath(path), self.save_dir).replace(os.sep, "/")
+
+    def record(self, path, encoder=None, bbox=None, window_title=None, process=None, game=None,
+               phash=None, taken_at=None, width=None, height=None):
+        """记录一张刚写入的截图；调用方知道分辨率时直接传入，省得重新打开文件读文件头"""
+        stat = os.stat(path)
+        if width is None or height is None:
+            width, height = _image_size(path)
+        rel = self._relpath(path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO captures (path, dir, taken_at, mtime, size, width, height, encoder, "
+                "bbox, window_title, process, game, phash) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (rel, os.path.dirname(rel), taken_at or stat.st_mtime, stat.st_mtime, stat.st_size,
+                 width, height, encoder, ",".join(map(str, bbox)) if bbox else None,
+                 window_title, process, game, phash))
+            self._conn.commit()
+
+    def move(self, old_path, new_path):
+        """文件被转码/改名后更新路径，保留截图时记录的信息"""
+        stat = os.stat(new_path)
+        rel = self._relpath(new_path)
+        with self._lock:
+            self._conn.execute("UPDATE captures SET path = ?, dir = ?, mtime = ?, size = ? WHERE path = ?",
+                               (rel, os.path.dirname(rel), stat.st_mtime, stat.st_size, self._relpath(old_path)))
+            self._conn.commit()
+
+    def remove(self, path):
+        with self._lock:
+            self._conn.execute("DELETE FROM captures WHERE path = ?", (self._relpath(path),))
+            self._conn.commit()
+
+    def rescan(self):
+        """
+        增量扫描：目录 mtime 没变的目录不重新列举文件 (文件增删一定会改变目录 mtime)，
+        只对变化的目录比对文件列表和每个文件的 mtime/大小。
+        """
+        try:
+            return self._rescan()
+        except sqlite3.ProgrammingError:
+            if not self._closed:
+                raise
+            # 切换保存目录时索引被关闭：放弃这次扫描，下次打开时重新扫描
+            log(f"[Library] 索引已关闭，增量扫描中止: {self.save_dir}", DEBUG)
+            return 0, 0, 0
+
+    def _rescan(self):
+        t0 = time.perf_counter()
+        added = removed = updated = scanned_dirs = 0
+        with self._lock:
+            known_dirs = dict(self._conn.execute("SELECT dir, mtime FROM dirs"))
+        seen_dirs = set()
+        stack = [""]
+
+        while stack:
+            rel_dir = stack.pop()
+            abs_dir = os.path.join(self.save_dir, rel_dir)
+            try:
+                dir_mtime = os.stat(abs_dir).st_mtime
+            except OSError:
+                continue
+            seen_dirs.add(rel_dir)
+
+            if known_dirs.get(rel_dir) == dir_mtime:
+                # 目录没变：沿用已知的子目录继续往下查
+                prefix = rel_dir + "/" if rel_dir else ""
+                stack.extend(d for d in known_dirs
+                             if d.startswith(prefix) and d != rel_dir and "/" not in d[len(prefix):])
+                continue
+
+            scanned_dirs += 1
+            files = {}
+            for entry in os.scandir(abs_dir):
+                if entry.name.startswith("."):
+                    continue
+                rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                if entry.is_dir():
+                    stack.append(rel)
+                elif os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS:
+                    files[rel] = entry
+
+            with self._lock:
+                indexed = {row[0]: (row[1], row[2]) for row in self._conn.execute(
+                    "SELECT path, mtime, size FROM captures WHERE dir = ?", (rel_dir,))}
+            a, r, u = self._sync_dir(rel_dir, dir_mtime, files, indexed)
+            added += a
+            removed += r
+            updated += u
+
+        # 已被删除的整个子目录
+        with self._lock:
+            for rel_dir in set(known_dirs) - seen_dirs:
+                cursor = self._conn.execute("DELETE FROM captures WHERE dir = ?", (rel_dir,))
+                removed += cursor.rowcount
+                self._conn.execute("DELETE FROM dirs WHERE dir = ?", (rel_dir,))
+            self._conn.commit()
+
+        log(f"[Library] 增量扫描完成: 检查 {scanned_dirs} 个目录，新增 {added}，删除 {removed}，"
+            f"更新 {updated} ({(time.perf_counter() - t0) * 1000:.0f} ms)", DEBUG)
+        return added, removed, updated
+
+    def _sync_dir(self, rel_dir, dir_mtime, files, indexed):
+        added = removed = updated = 0
+        rows = []
+        for rel, entry in files.items():
+            stat = entry.stat()
+            known = indexed.get(rel)
+            if known == (stat.st_mtime, stat.st_size):
+                continue
+            width, height = _image_size(entry.path)
+            rows.append((rel, rel_dir, stat.st_mtime, stat.st_mtime, stat.st_size, width, height))
+            if known is None:
+                added += 1
+            else:
+                updated += 1
+
+        with self._lock:
+            # 已存在的记录只更新文件属性，保留截图时记录的窗口/进程等信息
+            self._conn.executemany(
+                "INSERT INTO captures (path, dir, taken_at, mtime, size, width, height) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(path) DO UPDATE SET "
+                "mtime = excluded.mtime, size = excluded.size, width = excluded.width, height = excluded.height",
+                rows)
+            gone = [(rel,) for rel in indexed if rel not in files]
+            self._conn.executemany("DELETE FROM captures WHERE path = ?", gone)
+            removed += len(gone)
+            self._conn.execute("INSERT OR REPLACE INTO dirs (dir, mtime) VALUES (?, ?)", (rel_dir, dir_mtime))
+            self._conn.commit()
+        return added, removed, updated
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {', '.join(COLUMNS)} FROM captures {sql}", params).fetchall()
+        result = []
+        for row in rows:
+            item = dict(zip(COLUMNS, row))
+            item["path"] = os.path.join(self.save_dir, item["path"])
+            result.append(item)
+        return result
+
+    def recent(self, limit=20):
+        """最近的 N 张截图"""
+        return self._query("ORDER BY taken_at DESC LIMIT ?", (limit,))
+
+    def between(self, start, end, limit=1000):
+        """按时间范围查询 (Unix 时间戳，左闭右开)"""
+        return self._query("WHERE taken_at >= ? AND taken_at < ? ORDER BY taken_at DESC LIMIT ?",
+                           (start, end, limit))
+
+    def by_game(self, game, limit=100):
+        """某个游戏的截图，按时间倒序"""
+        return self._query("WHERE game = ? ORDER BY taken_at DESC LIMIT ?", (game, limit))
+
+    def games(self):
+        """所有游戏及其截图数量"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT game, COUNT(*) FROM captures WHERE game IS NOT NULL GROUP BY game "
+                "ORDER BY COUNT(*) DESC").fetchall()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._conn.close()
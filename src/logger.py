@@ -1,36 +1,208 @@
 import sys
 import os
+import atexit
+import queue
+import threading
+import time
 from datetime import datetime
 
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+LEVELS = {"DEBUG": DEBUG, "INFO": INFO, "WARNING": WARNING, "ERROR": ERROR}
 
-class Logger(object):
-    def __init__(self, filename="run.log"):
-        self.terminal = sys.stdout
-        self.log = open(filename, "a", encoding="utf-8")
+# 后台线程最多攒多久再落盘一次 (秒)
+FLUSH_INTERVAL = 0.5
+MAX_BATCH = 256
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_BACKUPS = 3
 
-    def write(self, message):
-        # 1. 写入控制台 (如果有，比如在 IDE 中)
+_writer = None
+
+
+class LogWriter:
+    """
+    后台日志写入线程：
+    print 只把文本放进队列就返回，由这个线程批量写控制台和 run.log，
+    文件超过 max_bytes 时轮转为 run.log.1 ~ run.log.N。
+    """
+
+    def __init__(self, path, terminal=None, level=INFO, max_bytes=DEFAULT_MAX_BYTES, backups=DEFAULT_BACKUPS):
+        self.path = path
+        self.terminal = terminal
+        self.level = level
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._queue = queue.SimpleQueue()
+        self._file = open(path, "a", encoding="utf-8")
+        self._size = self._file.tell()
+        self._progress = None  # 以 \r 开头的进度行，文件里只保留最后一次
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, text, level=INFO):
+        """[任意线程调用] 只入队，不做任何 I/O"""
+        if text and level >= self.level and not self._closed:
+            self._queue.put(text)
+
+    def flush(self, timeout=2.0):
+        """阻塞直到此前入队的日志全部落盘 (退出/崩溃时调用)"""
+        if self._closed or threading.current_thread() is self._thread:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=2.0):
+        self.flush(timeout)
+        self._closed = True
+        self._queue.put(None)
+
+    def _run(self):
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            batch = []
+            waiters = []
+            # 从第一条开始最多攒 FLUSH_INTERVAL 秒 (或 MAX_BATCH 条) 再统一写一次
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if stop or waiters or len(batch) >= MAX_BATCH:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            self._write_batch(batch)
+            for event in waiters:
+                event.set()
+        self._file.close()
+
+    def _write_batch(self, batch):
+        if not batch:
+            return
         if self.terminal:
             try:
-                self.terminal.write(message)
+                self.terminal.write("".join(batch))
                 self.terminal.flush()
             except Exception:
                 pass  # 防止某些特殊环境下控制台写入失败导致崩溃
 
-        # 2. 写入文件
+        parts = []
+        for text in batch:
+            if text.startswith("\r") and "\n" not in text:
+                self._progress = text.lstrip("\r")
+                continue
+            if self._progress is not None:
+                parts.append(self._progress if text.startswith("\n") else self._progress + "\n")
+                self._progress = None
+            parts.append(text)
+        if not parts:
+            return
+        data = "".join(parts)
         try:
-            self.log.write(message)
-            self.log.flush()
+            self._file.write(data)
+            self._file.flush()
+            self._size += len(data.encode("utf-8"))
+            if self._size >= self.max_bytes:
+                self._rotate()
         except Exception:
             pass
 
+    def _rotate(self):
+        """run.log -> run.log.1 -> ... -> run.log.N，最旧的一份被丢弃"""
+        self._file.close()
+        try:
+            if self.backups > 0:
+                for i in range(self.backups - 1, 0, -1):
+                    src = f"{self.path}.{i}"
+                    if os.path.exists(src):
+                        os.replace(src, f"{self.path}.{i + 1}")
+                os.replace(self.path, f"{self.path}.1")
+                mode = "a"
+            else:
+                mode = "w"
+        except OSError:
+            mode = "a"  # 文件被占用时先继续写，下一批再尝试
+        self._file = open(self.path, mode, encoding="utf-8")
+        self._size = self._file.tell()
+
+
+class Logger(object):
+    """替换 sys.stdout / sys.stderr 的文件对象，写入转交给后台 LogWriter"""
+
+    encoding = "utf-8"
+
+    def __init__(self, writer, level=INFO):
+        self.writer = writer
+        self.level = level
+
+    def write(self, message):
+        self.writer.write(message, self.level)
+
     def flush(self):
-        if self.terminal:
-            try:
-                self.terminal.flush()
-            except Exception:
-                pass
-        self.log.flush()
+        pass  # 由后台线程按批落盘；需要确保落盘时调用 flush_logs()
+
+    def isatty(self):
+        return False
+
+
+def log(message, level=INFO):
+    """
+    按级别写一行日志 (print 固定为 INFO、stderr 固定为 ERROR，调试信息和警告用这个函数)。
+    日志系统未启动时直接 print。
+    """
+    if _writer is None:
+        print(message)
+    else:
+        _writer.write(f"{message}\n", level)
+
+
+def configure_logging(level=None, max_bytes=None, backups=None):
+    """读取配置后调整日志级别和轮转参数"""
+    if _writer is None:
+        return
+    if level is not None:
+        _writer.level = LEVELS.get(str(level).upper(), INFO) if not isinstance(level, int) else level
+    if max_bytes:
+        _writer.max_bytes = int(max_bytes)
+    if backups is not None:
+        _writer.backups = max(0, int(backups))
+
+
+def flush_logs(timeout=2.0):
+    """等待所有已入队的日志落盘 (os._exit 前必须调用)"""
+    if _writer is not None:
+        return _writer.flush(timeout)
+    return True
+
+
+def _install_crash_hooks():
+    """未捕获的异常先写进日志并落盘，再交给原来的处理函数"""
+    previous_hook = sys.excepthook
+
+    def excepthook(exc_type, exc, tb):
+        previous_hook(exc_type, exc, tb)
+        flush_logs()
+
+    previous_thread_hook = threading.excepthook
+
+    def thread_excepthook(args):
+        previous_thread_hook(args)
+        flush_logs()
+
+    sys.excepthook = excepthook
+    threading.excepthook = thread_excepthook
+    atexit.register(lambda: _writer and _writer.close())
 
 
 def setup_redirects(log_filename="run.log"):
@@ -40,6 +212,7 @@ def setup_redirects(log_filename="run.log"):
     2. 写入启动时间戳
     3. 接管 sys.stdout 和 sys.stderr
     """
+    global _writer
 
     # 1. 确定保存路径
     if getattr(sys, 'frozen', False):
@@ -51,18 +224,19 @@ def setup_redirects(log_filename="run.log"):
 
     log_path = os.path.join(base_dir, log_filename)
 
-    # 2. 写入启动分割线
+    # 2. 启动后台写入线程
     try:
-        with open(log_path, "a", encoding="utf-8") as f:
-            f.write(f"\n{'=' * 20} 启动时间: {datetime.now()} {'=' * 20}\n")
+        _writer = LogWriter(log_path, terminal=sys.stdout)
     except Exception as e:
         # 如果连文件都打不开（极少见，比如权限问题），打印一下但不阻断程序
         print(f"警告: 无法初始化日志文件: {e}")
         return
+    _writer.write(f"\n{'=' * 20} 启动时间: {datetime.now()} {'=' * 20}\n")
 
     # 3. 核心：接管标准输出
-    # 实例化 Logger 并替换系统 stdout/stderr
-    sys.stdout = Logger(log_path)
-    sys.stderr = sys.stdout
+    # print 只入队，不再在截图/下载线程上同步写盘
+    sys.stdout = Logger(_writer, INFO)
+    sys.stderr = Logger(_writer, ERROR)
+    _install_crash_hooks()
 
-    print(f"[Logger] 日志系统已启动，输出路径: {log_path}")
\ No newline at end of file
+    print(f"[Logger] 日志系统已启动，输出路径: {log_path}")
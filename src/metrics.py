@@ -0,0 +1,228 @@
+import json
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 对数分桶直方图：每个 2 的幂区间再细分 SUB_BUCKETS 份，单位为微秒，
+# 覆盖 1 µs ~ 约 2^40 µs，分位数误差不超过 1 / (2 * SUB_BUCKETS)
+SUB_BUCKETS = 8
+MAX_EXPONENT = 40
+BUCKETS = MAX_EXPONENT * SUB_BUCKETS
+PERCENTILES = (50, 95, 99)
+
+# 截图各阶段 (秒)，按发生顺序排列
+STAGES = ("hotkey", "clear_wait", "monitor", "grab", "queue", "dedup", "encode", "write", "total", "notify")
+# 托盘提示最多刷新频率 (秒)
+TOOLTIP_INTERVAL = 1.0
+
+
+class Histogram:
+    """固定大小的直方图：O(1) 记录，内存不随样本数增长"""
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def bucket(value_us):
+        if value_us < 1:
+            return 0
+        mantissa, exponent = math.frexp(value_us)  # value = mantissa * 2^exponent，mantissa ∈ [0.5, 1)
+        return min(BUCKETS - 1, exponent * SUB_BUCKETS + int((mantissa - 0.5) * 2 * SUB_BUCKETS))
+
+    @staticmethod
+    def bucket_upper(index):
+        """桶的上界 (微秒)"""
+        exponent, sub = divmod(index, SUB_BUCKETS)
+        return math.ldexp(0.5 + (sub + 1) / (2 * SUB_BUCKETS), exponent)
+
+    def add(self, seconds):
+        value_us = seconds * 1e6
+        index = self.bucket(value_us)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += seconds
+            if self.min is None or seconds < self.min:
+                self.min = seconds
+            if self.max is None or seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, p):
+        """第 p 百分位 (秒)，取所在桶的上界，不超过实际最大值"""
+        with self._lock:
+            if not self.count:
+                return None
+            target = max(1, math.ceil(self.count * p / 100))
+            seen = 0
+            for index, n in enumerate(self.counts):
+                seen += n
+                if seen >= target:
+                    return min(self.bucket_upper(index) / 1e6, self.max)
+        return self.max
+
+    def summary(self):
+        """毫秒为单位的统计"""
+        if not self.count:
+            return {"count": 0}
+        result = {"count": self.count,
+                  "avg_ms": round(self.total / self.count * 1000, 3),
+                  "min_ms": round(self.min * 1000, 3),
+                  "max_ms": round(self.max * 1000, 3)}
+        for p in PERCENTILES:
+            result[f"p{p}_ms"] = round(self.percentile(p) * 1000, 3)
+        return result
+
+
+class CaptureMetrics:
+    """
+    截图热路径的分阶段耗时统计：
+    各阶段先写入 CaptureJob.timings (只是几次 perf_counter)，任务完成后由 observe_job 统一计入直方图。
+    未开启时 observe / observe_job / count 只做一次属性判断就返回。
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.histograms = {stage: Histogram() for stage in STAGES}
+        self.counters = {"captures": 0, "bytes_written": 0, "duplicates": 0, "spilled": 0, "failures": 0}
+        self.started_at = time.time()
+        self._sources = {}
+        self._listeners = []
+        self._last_notify = 0.0
+        self._lock = threading.Lock()
+        self._server = None
+
+    # ---------- 记录 ----------
+    def observe(self, stage, seconds):
+        if not self.enabled:
+            return
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms.setdefault(stage, Histogram())
+        histogram.add(seconds)
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe_job(self, job, bytes_written=0, outcome="captures"):
+        """[worker 线程] 一张截图处理完毕：记录各阶段和总耗时"""
+        if not self.enabled:
+            return
+        for stage, seconds in job.timings.items():
+            self.observe(stage, seconds)
+        self.observe("total", time.perf_counter() - job.triggered_at)
+        with self._lock:
+            self.counters[outcome] = self.counters.get(outcome, 0) + 1
+            self.counters["bytes_written"] += bytes_written
+        self._notify_listeners()
+
+    # ---------- 读取 ----------
+    def add_source(self, name, callback):
+        """附加到快照里的其他统计 (例如流水线队列状态)，callback 返回 dict"""
+        self._sources[name] = callback
+
+    def add_listener(self, callback):
+        """截图完成后 (最多每 TOOLTIP_INTERVAL 秒一次) 调用 callback()，用于刷新托盘提示"""
+        self._listeners.append(callback)
+
+    def _notify_listeners(self):
+        now = time.monotonic()
+        if now - self._last_notify < TOOLTIP_INTERVAL:
+            return
+        self._last_notify = now
+        for callback in self._listeners:
+            try:
+                callback()
+            except Exception as e:
+                print(f"[Metrics] 刷新统计显示失败: {e}")
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self.counters)
+        data = {
+            "enabled": self.enabled,
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "counters": counters,
+            "stages": {stage: histogram.summary() for stage, histogram in self.histograms.items()
+                       if histogram.count},
+        }
+        for name, callback in self._sources.items():
+            try:
+                data[name] = callback()
+            except Exception as e:
+                data[name] = {"error": str(e)}
+        return data
+
+    def summary_text(self):
+        """托盘提示用的简短摘要 (Windows 托盘提示最多 127 个字符)"""
+        if not self.enabled:
+            return None
+        hotkey = self.histograms["hotkey"].percentile(95)
+        total = self.histograms["total"].percentile(95)
+        saved = self.counters["captures"] + self.counters["spilled"]
+        text = f"已截图 {saved} 张"
+        if hotkey is not None:
+            text += f" | 热键 p95 {hotkey * 1000:.1f} ms"
+        if total is not None:
+            text += f" | 落盘 p95 {total * 1000:.0f} ms"
+        if self.counters["failures"]:
+            text += f" | 失败 {self.counters['failures']}"
+        return text
+
+    def reset(self):
+        self.histograms = {stage: Histogram() for stage in STAGES}
+        with self._lock:
+            self.counters = {name: 0 for name in self.counters}
+        self.started_at = time.time()
+
+    # ---------- HTTP 接口 ----------
+    def serve(self, port):
+        """在 127.0.0.1:port 提供 JSON 统计 (GET /metrics)，port 为 0 时关闭"""
+        if self._server is not None:
+            if port and self._server.server_address[1] == port:
+                return
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if not port:
+            return
+        try:
+            server = ThreadingHTTPServer(("127.0.0.1", int(port)), _MetricsHandler)
+        except OSError as e:
+            print(f"[Metrics] 统计接口启动失败 (端口 {port}): {e}")
+            return
+        server.daemon_threads = True
+        server.metrics = self
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        self._server = server
+        print(f"[Metrics] 统计接口: http://127.0.0.1:{port}/metrics")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass  # 不把每次请求写进日志
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = json.dumps(self.server.metrics.snapshot(), ensure_ascii=False, indent=2).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+
+# 全局实例
+metrics = CaptureMetrics()
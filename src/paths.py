@@ -0,0 +1,16 @@
+import os
+import sys
+
+# 确定配置文件的绝对路径，确保读写的是同一个文件
+if os.getenv("GSS_CONFIG_DIR"):
+    # 显式指定的配置目录 (基准测试用临时目录，不碰真实的 config.json)
+    BASE_DIR = os.path.abspath(os.environ["GSS_CONFIG_DIR"])
+elif getattr(sys, 'frozen', False):
+    # 打包环境：使用 EXE 所在的目录
+    BASE_DIR = os.path.dirname(sys.executable)
+else:
+    # 开发环境：使用入口脚本 (main.py) 所在的目录
+    # sys.argv[0] 通常是 main.py 的路径
+    BASE_DIR = os.path.dirname(os.path.abspath(sys.argv[0]))
+
+CONFIG_FILE = os.path.join(BASE_DIR, 'config.json')
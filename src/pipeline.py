@@ -0,0 +1,167 @@
+import queue
+import threading
+import time
+from datetime import datetime
+
+# 队列满时的背压策略
+POLICY_BLOCK = "block"              # 阻塞热键线程，直到有空位
+POLICY_DROP_OLDEST = "drop_oldest"  # 丢弃队列里最旧的一帧
+POLICY_SPILL = "spill"              # 不编码，直接把原始像素落盘
+POLICIES = (POLICY_BLOCK, POLICY_DROP_OLDEST, POLICY_SPILL)
+
+
+class Notice(str):
+    """
+    不是 "保存成功" 的提示 (重复画面、连拍/多帧汇总)：放进 UI 队列后提示窗原样显示。
+    普通字符串是刚保存的文件名，提示窗会在前面加上 "保存成功"。
+    """
+
+
+class CaptureJob:
+    """一次截图任务：热键线程抓到的帧 (PIL 图像或 RawFrame) + 保存所需的信息"""
+
+    def __init__(self, image, save_dir, filename_base, encoder=None):
+        self.image = image
+        self.save_dir = save_dir
+        self.filename_base = filename_base
+        self.encoder = encoder  # 编码器名称，None 表示使用默认
+        # filename_base 默认作为文件名模板的 {prefix}；
+        # exact_name 为 True 时直接用作文件名，不做重名分配 (连拍序号命名)
+        self.exact_name = False
+        self.notify = True  # 保存后是否弹出提示
+        self.dedup = True  # 是否参与重复画面过滤
+        self.clipboard = True  # 是否复制到剪贴板 (连拍、多帧保存不复制)
+        self.on_encoded = None  # 编码完成后的回调 (例如归还帧缓冲)
+        self.created_at = time.perf_counter()
+        self.triggered_at = self.created_at  # 按下热键的时刻，用于统计端到端耗时
+        self.captured_at = datetime.now()  # 用于生成文件名
+        self.taken_at = self.captured_at.timestamp()
+        self.timings = {}  # 各阶段耗时 (秒)
+        self.meta = {}  # 截图时的上下文 (显示器范围、前台窗口等)，写入截图库索引
+
+
+class CapturePipeline:
+    """
+    截图流水线：
+    热键线程只负责抓帧并放入有界队列，编码和写盘交给后台 worker 线程池。
+    (Pillow 编码时会释放 GIL，多个 worker 可以真正并行)
+    """
+
+    def __init__(self, handler, spill_handler=None, depth=4, workers=2, policy=POLICY_BLOCK):
+        if policy not in POLICIES:
+            print(f"[Pipeline] 未知的背压策略 '{policy}'，已回退为 '{POLICY_BLOCK}'")
+            policy = POLICY_BLOCK
+        if policy == POLICY_SPILL and spill_handler is None:
+            policy = POLICY_BLOCK
+
+        self.handler = handler
+        self.spill_handler = spill_handler
+        self.policy = policy
+        self._queue = queue.Queue(maxsize=max(1, int(depth)))
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.failed = 0
+
+        self._workers = []
+        for i in range(max(1, int(workers))):
+            t = threading.Thread(target=self._worker_loop, name=f"capture-worker-{i}", daemon=True)
+            t.start()
+            self._workers.append(t)
+
+    def submit(self, job):
+        """把任务交给流水线 (在热键线程调用，尽量快速返回)"""
+        with self._lock:
+            self.submitted += 1
+
+        if self.policy == POLICY_BLOCK:
+            self._queue.put(job)
+            return
+
+        while True:
+            try:
+                self._queue.put_nowait(job)
+                return
+            except queue.Full:
+                pass
+
+            if self.policy == POLICY_SPILL:
+                # 队列满：在当前线程直接写原始像素 (比 PNG 编码快得多)
+                with self._lock:
+                    self.spilled += 1
+                try:
+                    self.spill_handler(job)
+                except Exception as e:
+                    with self._lock:
+                        self.failed += 1
+                    print(f"[Pipeline] 原始帧落盘失败: {e}")
+                return
+
+            # POLICY_DROP_OLDEST: 扔掉最旧的一帧，再重试入队
+            try:
+                self._queue.get_nowait()
+                self._queue.task_done()
+                with self._lock:
+                    self.dropped += 1
+                print("[Pipeline] 队列已满，丢弃最旧的一帧")
+            except queue.Empty:
+                pass
+
+    def _worker_loop(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                self.handler(job)
+                with self._lock:
+                    self.completed += 1
+            except Exception as e:
+                with self._lock:
+                    self.failed += 1
+                print(f"[Pipeline] 处理截图任务失败: {e}")
+            finally:
+                self._queue.task_done()
+
+    def pending(self):
+        """还未处理完的任务数 (含正在编码的)"""
+        return self._queue.unfinished_tasks
+
+    def flush(self, timeout=None):
+        """
+        等待所有在途帧处理完毕。
+        返回 True 表示已全部落盘，False 表示超时。
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                if deadline is None:
+                    self._queue.all_tasks_done.wait()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def shutdown(self, timeout=None):
+        """处理完剩余任务后停止 worker"""
+        ok = self.flush(timeout)
+        for _ in self._workers:
+            self._queue.put(None)
+        return ok
+
+    def stats(self):
+        with self._lock:
+            return {
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "dropped": self.dropped,
+                "spilled": self.spilled,
+                "failed": self.failed,
+                "pending": self._queue.unfinished_tasks,
+            }
@@ -0,0 +1,232 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+from .encoders import EncoderRegistry
+from .utils import (claim_unique_filepath, read_raw_frame, RAW_EXTENSION, write_temp_file,
+                    get_idle_seconds, lower_process_priority)
+
+JOURNAL_FILENAME = ".gss_recompress.jsonl"
+# 空闲检测的轮询间隔 (秒)
+POLL_INTERVAL = 15
+
+
+def _transcode_file(src_path, target, options):
+    """
+    [子进程] 把一张快速保存的截图转码为归档格式。
+    先写同目录临时文件，再原子重命名，最后才删除源文件；任何一步中断都不会留下半成品。
+    返回 (新路径, 原大小, 新大小)。
+    """
+    if src_path.endswith(RAW_EXTENSION):
+        image = read_raw_frame(src_path)
+    else:
+        with Image.open(src_path) as f:
+            image = f.copy()
+
+    encoder = EncoderRegistry(options).get(target)
+    data = encoder.encode(image)
+    old_size = os.path.getsize(src_path)
+
+    directory = os.path.dirname(src_path)
+    stem = os.path.splitext(os.path.basename(src_path))[0]
+    temp_path = write_temp_file(directory, data)
+    try:
+        if os.path.splitext(src_path)[1] == encoder.extension:
+            # 同格式重压缩：直接覆盖原文件
+            dst_path = src_path
+            os.replace(temp_path, dst_path)
+        else:
+            # 硬链接原子占用文件名，不会覆盖截图线程同时写入的同名文件
+            dst_path = claim_unique_filepath(temp_path, directory, stem, encoder.extension)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    if dst_path != src_path:
+        os.remove(src_path)
+    return dst_path, old_size, len(data)
+
+
+class RecompressJournal:
+    """
+    磁盘上的任务日志 (追加写入的 JSON Lines)：
+    每行是 {"op": "add"|"done", "path": ...}，重启后重放即可得到未完成的任务。
+    """
+
+    def __init__(self, save_dir):
+        self.path = os.path.join(save_dir, JOURNAL_FILENAME)
+        self._lock = threading.Lock()
+
+    def load_pending(self):
+        pending = {}
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # 异常退出时最后一行可能不完整
+                if record.get("op") == "add":
+                    pending[record["path"]] = True
+                elif record.get("op") == "done":
+                    pending.pop(record["path"], None)
+        return [path for path in pending if os.path.exists(path)]
+
+    def append(self, op, path):
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"op": op, "path": path}, ensure_ascii=False) + "\n")
+
+    def compact(self, pending):
+        """所有任务完成后把日志重写为只包含未完成的任务，防止无限增长"""
+        with self._lock:
+            data = "".join(json.dumps({"op": "add", "path": p}, ensure_ascii=False) + "\n" for p in pending)
+            temp_path = write_temp_file(os.path.dirname(self.path), data.encode("utf-8"))
+            os.replace(temp_path, self.path)
+
+
+class RecompressService:
+    """
+    延迟重压缩服务：
+    截图时用最快的编码器落盘 (raw / png_fast)，等机器空闲或到达计划时间后，
+    再用低优先级的进程池把它们转码为归档格式 (png_max / webp_lossless)。
+    """
+
+    def __init__(self, save_dir, target="png_max", options=None, workers=1,
+                 idle_seconds=120, interval_minutes=0, on_transcoded=None):
+        self.save_dir = save_dir
+        self.on_transcoded = on_transcoded  # 转码完成回调 (原路径, 新路径)
+        self.target = target
+        self.options = options or {}
+        self.workers = max(1, min(int(workers), os.cpu_count() or 1))
+        self.idle_seconds = idle_seconds
+        self.interval = interval_minutes * 60 if interval_minutes else 0
+
+        self.journal = RecompressJournal(save_dir)
+        self._pending = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._executor = None
+        self._in_flight = set()
+        self._last_run = time.monotonic()
+        self.saved_bytes = 0
+
+    def start(self):
+        # 恢复上次未完成的任务，并把队列满时直接落盘的原始帧也纳入 (包括按游戏分类的子文件夹)
+        pending = self.journal.load_pending()
+        known = set(pending)
+        for root, dirs, files in os.walk(self.save_dir):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            for name in files:
+                path = os.path.join(root, name)
+                if name.endswith(RAW_EXTENSION) and path not in known:
+                    pending.append(path)
+                    self.journal.append("add", path)
+        with self._lock:
+            self._pending = pending
+        if pending:
+            print(f"[Recompress] 恢复了 {len(pending)} 个待转码文件")
+        threading.Thread(target=self._schedule_loop, name="recompress", daemon=True).start()
+
+    def enqueue(self, path):
+        """登记一个需要转码的文件 (截图 worker 线程调用)"""
+        with self._lock:
+            self.journal.append("add", path)
+            self._pending.append(path)
+
+    def _should_run(self):
+        if self.interval and time.monotonic() - self._last_run >= self.interval:
+            return True
+        idle = get_idle_seconds()
+        # 无法检测空闲状态的平台上只按计划执行；没配计划时视为一直空闲
+        if idle is None:
+            return not self.interval
+        return idle >= self.idle_seconds
+
+    def _schedule_loop(self):
+        while not self._stop.wait(POLL_INTERVAL):
+            with self._lock:
+                has_work = bool(self._pending)
+            if not has_work or not self._should_run():
+                continue
+            self._last_run = time.monotonic()
+            self._run_batch()
+
+    def _run_batch(self):
+        with self._lock:
+            if self._stop.is_set():
+                return
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     initializer=lower_process_priority)
+            executor = self._executor
+
+        while not self._stop.is_set():
+            with self._lock:
+                # 每次只投递 workers 个任务，用户回到游戏时可以尽快停手
+                if not self._pending or len(self._in_flight) >= self.workers:
+                    batch = []
+                else:
+                    batch = self._pending[:self.workers - len(self._in_flight)]
+                    del self._pending[:len(batch)]
+                self._in_flight.update(batch)
+            for path in batch:
+                try:
+                    future = executor.submit(_transcode_file, path, self.target, self.options)
+                except RuntimeError:
+                    # stop() 已关闭进程池：任务仍在日志里，下次启动继续
+                    with self._lock:
+                        self._in_flight.discard(path)
+                    continue
+                future.add_done_callback(lambda f, p=path: self._on_done(p, f))
+
+            if not batch:
+                with self._lock:
+                    if not self._in_flight:
+                        break
+                self._stop.wait(0.5)
+                continue
+            if not self._should_run():
+                print("[Recompress] 检测到用户操作，暂停转码")
+                break
+
+        with self._lock:
+            # 被 stop() 取消的任务要留在日志里，不能清空
+            if not self._pending and not self._in_flight and not self._stop.is_set():
+                self.journal.compact([])
+
+    def _on_done(self, path, future):
+        with self._lock:
+            self._in_flight.discard(path)
+        if future.cancelled():
+            return  # 退出时被取消，保留在日志里下次继续
+        try:
+            dst_path, old_size, new_size = future.result()
+            with self._lock:
+                self.saved_bytes += old_size - new_size
+            self.journal.append("done", path)
+            if self.on_transcoded:
+                self.on_transcoded(path, dst_path)
+            print(f"[Recompress] {os.path.basename(path)} -> {os.path.basename(dst_path)} "
+                  f"({old_size / 1024 / 1024:.1f} MB -> {new_size / 1024 / 1024:.1f} MB)")
+        except Exception as e:
+            # 失败的文件保留原样，标记完成避免反复重试
+            self.journal.append("done", path)
+            print(f"[Recompress] 转码失败 {path}: {e}")
+
+    def stop(self):
+        """
+        停止调度：取消排队的任务，等正在转码的 (最多 workers 个) 完成后关闭子进程。
+        未完成的任务留在日志里，下次启动继续。
+        """
+        with self._lock:
+            self._stop.set()
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,178 @@
+import email.utils
+import json
+import time
+
+from .logger import log, DEBUG, WARNING
+from .utils import atomic_write
+
+CACHE_FILENAME = "update_cache.json"
+# 没有限流头时的退避：从 1 分钟开始翻倍，最长 6 小时
+BACKOFF_BASE = 60
+BACKOFF_MAX = 6 * 3600
+
+# 只缓存用得到的字段，避免把完整的 release JSON 写进磁盘
+ASSET_FIELDS = ("name", "browser_download_url", "digest", "size")
+
+
+def _slim_release(data):
+    return {
+        "tag_name": data.get("tag_name", "v0.0.0"),
+        "assets": [{k: asset.get(k) for k in ASSET_FIELDS} for asset in data.get("assets", [])],
+    }
+
+
+class ReleaseCache:
+    """
+    update_cache.json (与 config.json 放在一起)：
+    上次请求的 ETag/Last-Modified、精简后的 release 信息、上次检查时间和限流退避截止时间。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.etag = None
+        self.last_modified = None
+        self.release = None
+        self.checked_at = 0.0
+        self.retry_after = 0.0  # 在此时间之前不发请求 (Unix 时间戳)
+        self.failures = 0
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict):
+            # 合法的 JSON 但不是缓存的结构 (例如 [] 或 null)，和损坏的文件一样丢弃
+            return
+        self.etag = data.get("etag")
+        self.last_modified = data.get("last_modified")
+        self.release = data.get("release")
+        self.checked_at = data.get("checked_at", 0.0)
+        self.retry_after = data.get("retry_after", 0.0)
+        self.failures = data.get("failures", 0)
+
+    def save(self):
+        data = {
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "release": self.release,
+            "checked_at": self.checked_at,
+            "retry_after": self.retry_after,
+            "failures": self.failures,
+        }
+        try:
+            atomic_write(self.path, json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8"))
+        except OSError as e:
+            log(f"[Updater] 保存更新缓存失败: {e}", WARNING)
+
+
+class RateLimited(Exception):
+    """被 GitHub 限流，retry_at 之前不应再请求"""
+
+    def __init__(self, retry_at, message=""):
+        super().__init__(message)
+        self.retry_at = retry_at
+
+
+class ReleaseHTTPError(Exception):
+    """限流以外的 HTTP 错误，response 保留给调用方解析错误详情"""
+
+    def __init__(self, response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+
+
+class ReleaseChecker:
+    """
+    带条件请求的 release 信息获取：
+    - 发送 If-None-Match / If-Modified-Since，304 时直接使用缓存 (不解析任何 JSON，也不消耗 GitHub 配额)
+    - 距上次检查不足 min_interval 秒时不发请求
+    - 遵守 Retry-After / X-RateLimit-Reset，限流期间不发请求
+
+    request: 与 requests.get 签名一致的函数 (url, headers=, timeout=)
+    fetch() 返回 (release, 来源)，来源为 "network" / "not_modified" / "throttled" / "rate_limited"
+    """
+
+    def __init__(self, api_url, request, cache_path, min_interval=3600, clock=time.time):
+        self.api_url = api_url
+        self.request = request
+        self.cache = ReleaseCache(cache_path)
+        self.min_interval = min_interval
+        self.clock = clock
+
+    def fetch(self, force=False):
+        """force=True (手动检查) 时忽略最小间隔，但仍然遵守限流退避"""
+        cache = self.cache
+        now = self.clock()
+        if now < cache.retry_after:
+            return cache.release, "rate_limited"
+        if not force and cache.release and now - cache.checked_at < self.min_interval:
+            return cache.release, "throttled"
+
+        headers = {"Accept": "application/vnd.github+json"}
+        if cache.release:
+            # 没有缓存的 release 时不能发条件请求，否则 304 后无数据可用
+            if cache.etag:
+                headers["If-None-Match"] = cache.etag
+            if cache.last_modified:
+                headers["If-Modified-Since"] = cache.last_modified
+        response = self.request(self.api_url, headers=headers, timeout=10)
+        now = self.clock()
+
+        if response.status_code == 304:
+            self._succeeded(now, response)
+            log("[Updater] 发布信息未变化 (304)，使用缓存", DEBUG)
+            return cache.release, "not_modified"
+
+        if response.status_code == 200:
+            cache.release = _slim_release(response.json())
+            cache.etag = response.headers.get("ETag")
+            cache.last_modified = response.headers.get("Last-Modified")
+            self._succeeded(now, response)
+            return cache.release, "network"
+
+        retry_at = self._retry_time(response, now)
+        if retry_at is not None:
+            cache.retry_after = retry_at
+            cache.save()
+            wait = max(0, int(retry_at - now))
+            log(f"[Updater] GitHub 限流 (HTTP {response.status_code})，{wait} 秒内不再请求", WARNING)
+            raise RateLimited(retry_at, f"HTTP {response.status_code}")
+        raise ReleaseHTTPError(response)
+
+    def _succeeded(self, now, response):
+        cache = self.cache
+        cache.checked_at = now
+        cache.failures = 0
+        cache.retry_after = 0.0
+        # 配额已用完时，在重置之前不再请求
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            reset = response.headers.get("X-RateLimit-Reset")
+            if reset and reset.isdigit():
+                cache.retry_after = float(reset)
+        cache.save()
+
+    def _retry_time(self, response, now):
+        """根据限流响应头计算下次允许请求的时间；不是限流错误时返回 None"""
+        headers = response.headers
+        if response.status_code not in (403, 429):
+            return None
+        retry_after = headers.get("Retry-After")
+        if retry_after:
+            if retry_after.isdigit():
+                return now + int(retry_after)
+            try:
+                return email.utils.parsedate_to_datetime(retry_after).timestamp()
+            except (TypeError, ValueError):
+                pass
+        if headers.get("X-RateLimit-Remaining") == "0":
+            reset = headers.get("X-RateLimit-Reset")
+            if reset and reset.isdigit():
+                return float(reset)
+        if response.status_code == 429 or "rate limit" in (getattr(response, "text", "") or "").lower():
+            # 没有给出时间的限流 (GitHub 的二级限流)：指数退避
+            self.cache.failures += 1
+            return now + min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (self.cache.failures - 1))
+        return None
@@ -0,0 +1,181 @@
+import threading
+import time
+from collections import deque
+
+from PIL import Image, ImageFilter, ImageStat
+
+# 计算清晰度时的缩小倍数 (只用来挑"最佳帧"，不需要全分辨率)
+SHARPNESS_REDUCE = 8
+
+
+class FrameRing:
+    """
+    预分配的环形帧缓冲：
+    启动时一次性申请一整块 bytearray 切成固定大小的槽位，之后只做内存拷贝，
+    不会随着录制时间增长而分配新的图像对象。
+    """
+
+    def __init__(self, slot_bytes, slots):
+        self.slot_bytes = slot_bytes
+        self.slots = slots
+        self._buffer = bytearray(slot_bytes * slots)
+        self._view = memoryview(self._buffer)
+        # 每个槽位的元信息: (时间戳, 宽, 高, 模式, 字节数, 清晰度)
+        self._meta = [None] * slots
+        self._next = 0
+
+    @property
+    def memory_bytes(self):
+        return len(self._buffer)
+
+    def push(self, data, timestamp, size, mode, score):
+        """写入一帧，缓冲满后覆盖最旧的帧"""
+        n = len(data)
+        if n > self.slot_bytes:
+            return False
+        index = self._next
+        start = index * self.slot_bytes
+        self._view[start:start + n] = data
+        self._meta[index] = (timestamp, size[0], size[1], mode, n, score)
+        self._next = (index + 1) % self.slots
+        return True
+
+    def frames_since(self, since):
+        """返回时间戳 >= since 的帧索引，按时间从旧到新排列"""
+        result = []
+        for offset in range(self.slots):
+            index = (self._next + offset) % self.slots
+            meta = self._meta[index]
+            if meta is not None and meta[0] >= since:
+                result.append(index)
+        return result
+
+    def meta(self, index):
+        return self._meta[index]
+
+    def to_image(self, index):
+        """把槽位里的像素复制成独立的 PIL 图像 (之后槽位被覆盖也不影响)"""
+        timestamp, width, height, mode, n, score = self._meta[index]
+        start = index * self.slot_bytes
+        return Image.frombytes(mode, (width, height), bytes(self._view[start:start + n]))
+
+
+def sharpness_score(image):
+    """粗略的清晰度评分：缩小后做边缘检测取平均亮度，运动模糊越少分数越高"""
+    small = image.reduce(SHARPNESS_REDUCE).convert("L")
+    return ImageStat.Stat(small.filter(ImageFilter.FIND_EDGES)).mean[0]
+
+
+class ShadowRecorder:
+    """
+    "影子"预录制：后台持续以固定频率抓取当前显示器，写入环形缓冲。
+    按下热键时可以保存按键之前 N 秒的画面，或者其中最清晰的一帧。
+    """
+
+    def __init__(self, backend, bbox_provider, fps=2, seconds=5, memory_mb=512):
+        self.backend = backend
+        self.bbox_provider = bbox_provider
+        self.fps = max(0.1, float(fps))
+        self.seconds = max(0.1, float(seconds))
+        self.memory_bytes = max(1, int(memory_mb)) * 1024 * 1024
+
+        self.ring = None
+        self._ring_size = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        # 统计信息
+        self.captured = 0
+        self.dropped = 0
+        self._recent = deque(maxlen=64)  # 最近若干帧的时间戳，用来计算实际帧率
+        self._grab_time_total = 0.0
+
+    def _ensure_ring(self, size, mode, slot_bytes):
+        """按当前显示器分辨率分配槽位；分辨率变化时重新分配"""
+        if self._ring_size == (size, mode):
+            return
+        wanted = max(1, int(round(self.fps * self.seconds)))
+        slots = min(wanted, self.memory_bytes // slot_bytes)
+        if slots < 1:
+            raise MemoryError(f"影子缓冲内存上限过小，无法容纳一帧 {size[0]}x{size[1]}")
+        if slots < wanted:
+            print(f"[Shadow] 内存上限只能容纳 {slots} 帧 (期望 {wanted} 帧)，"
+                  f"实际可回溯 {slots / self.fps:.1f} 秒")
+
+        self.ring = None  # 先释放旧缓冲再申请新的，避免峰值翻倍
+        self.ring = FrameRing(slot_bytes, slots)
+        self._ring_size = (size, mode)
+        print(f"[Shadow] 环形缓冲已分配: {slots} 帧 x {size[0]}x{size[1]}，"
+              f"共 {self.ring.memory_bytes / 1024 / 1024:.0f} MB")
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._record_loop, name="shadow-recorder", daemon=True)
+        self._thread.start()
+        print(f"[Shadow] 影子录制已启动: {self.fps:g} fps, 回溯 {self.seconds:g} 秒")
+
+    def stop(self):
+        self._stop.set()
+
+    def _record_loop(self):
+        interval = 1.0 / self.fps
+        next_tick = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                t0 = time.perf_counter()
+                frame = self.backend.grab_raw(self.bbox_provider())
+                score = sharpness_score(frame.to_image())
+                with self._lock:
+                    self._ensure_ring(frame.size, frame.mode, len(frame.data))
+                    self.ring.push(frame.data, time.time(), frame.size, frame.mode, score)
+                    self.captured += 1
+                    self._recent.append(time.perf_counter())
+                    self._grab_time_total += time.perf_counter() - t0
+            except MemoryError as e:
+                print(f"[Shadow] {e}，影子录制已停止")
+                return
+            except Exception as e:
+                print(f"[Shadow] 预录制抓帧失败: {e}")
+
+            # 固定节拍调度：抓帧太慢错过的节拍记为丢帧，而不是越积越多
+            next_tick += interval
+            now = time.perf_counter()
+            if now > next_tick:
+                missed = int((now - next_tick) / interval) + 1
+                self.dropped += missed
+                next_tick += missed * interval
+            self._stop.wait(max(0.0, next_tick - time.perf_counter()))
+
+    def collect(self, mode="all"):
+        """
+        取出最近 N 秒的帧 (复制为独立图像)。
+        mode="all" 返回 [(时间戳, 图像), ...]；mode="best" 只返回清晰度最高的一帧。
+        """
+        with self._lock:
+            if self.ring is None:
+                return []
+            indexes = self.ring.frames_since(time.time() - self.seconds)
+            if not indexes:
+                return []
+            if mode == "best":
+                indexes = [max(indexes, key=lambda i: self.ring.meta(i)[5])]
+            return [(self.ring.meta(i)[0], self.ring.to_image(i)) for i in indexes]
+
+    def stats(self):
+        with self._lock:
+            recent = list(self._recent)
+            achieved = 0.0
+            if len(recent) >= 2 and recent[-1] > recent[0]:
+                achieved = (len(recent) - 1) / (recent[-1] - recent[0])
+            return {
+                "target_fps": self.fps,
+                "achieved_fps": round(achieved, 2),
+                "captured": self.captured,
+                "dropped": self.dropped,
+                "avg_grab_ms": round(self._grab_time_total / self.captured * 1000, 2) if self.captured else 0.0,
+                "slots": self.ring.slots if self.ring else 0,
+                "memory_mb": round(self.ring.memory_bytes / 1024 / 1024, 1) if self.ring else 0.0,
+            }
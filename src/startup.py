@@ -0,0 +1,222 @@
+import ctypes
+import json
+import os
+import sys
+import threading
+import time
+
+# 设置 GSS_PROFILE_STARTUP=1 时记录每个模块的导入耗时 (类似 python -X importtime)，
+# 启动完成后打印耗时最多的模块并写入 startup_profile.json
+PROFILE_ENV = "GSS_PROFILE_STARTUP"
+PROFILE_FILENAME = "startup_profile.json"
+TOP_IMPORTS = 25
+
+
+def _process_age():
+    """进程已经运行了多久 (秒)：包含解释器初始化和 PyInstaller 解包，拿不到时返回 0"""
+    try:
+        if sys.platform == "win32":
+            creation, exit_time, kernel, user = (ctypes.c_ulonglong() for _ in range(4))
+            kernel32 = ctypes.windll.kernel32
+            if not kernel32.GetProcessTimes(ctypes.c_void_p(kernel32.GetCurrentProcess()), ctypes.byref(creation),
+                                            ctypes.byref(exit_time), ctypes.byref(kernel), ctypes.byref(user)):
+                return 0.0
+            now = ctypes.c_ulonglong()
+            kernel32.GetSystemTimeAsFileTime(ctypes.byref(now))
+            return max(0.0, (now.value - creation.value) / 1e7)  # FILETIME 以 100ns 为单位
+        with open("/proc/self/stat", "r") as f:
+            start_ticks = int(f.read().rpartition(")")[2].split()[19])
+        with open("/proc/uptime", "r") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except Exception:
+        return 0.0
+
+
+class _TimedLoader:
+    """包装真正的 loader，只对 exec_module (执行模块代码) 计时"""
+
+    def __init__(self, loader, profiler):
+        self._loader = loader
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        # 模块内部看到的仍然是原来的 loader (importlib.resources 等会用到)
+        module.__loader__ = self._loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self._loader
+        self._profiler.begin_import()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler.end_import(module.__name__)
+
+
+class _ImportTimer:
+    """放在 sys.meta_path 最前面：交给后面的 finder 查找，再把 loader 换成计时版本"""
+
+    def __init__(self, profiler):
+        self._profiler = profiler
+
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, self._profiler)
+                return spec
+        return None
+
+
+class StartupProfiler:
+    """
+    冷启动计时：mark(name) 记录从进程创建到此刻的耗时，
+    开启导入计时后按模块统计自身耗时 (self) 和包含子模块的累计耗时 (cumulative)。
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.origin = clock() - _process_age()
+        self.marks = {}
+        self.imports = {}  # 模块名 -> (self 秒, cumulative 秒)
+        self._local = threading.local()  # 每个线程各自的导入栈 [[开始时间, 子模块累计耗时]]
+        self._timer = None
+
+    def mark(self, name):
+        self.marks[name] = self.clock() - self.origin
+        return self.marks[name]
+
+    def install_import_hook(self):
+        if self._timer is None:
+            self._timer = _ImportTimer(self)
+            sys.meta_path.insert(0, self._timer)
+
+    def remove_import_hook(self):
+        if self._timer is not None and self._timer in sys.meta_path:
+            sys.meta_path.remove(self._timer)
+        self._timer = None
+
+    def begin_import(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append([self.clock(), 0.0])
+
+    def end_import(self, name):
+        stack = self._local.stack
+        start, children = stack.pop()
+        elapsed = self.clock() - start
+        self.imports[name] = (elapsed - children, elapsed)
+        if stack:
+            stack[-1][1] += elapsed
+
+    def report(self):
+        ranked = sorted(self.imports.items(), key=lambda item: item[1][0], reverse=True)
+        return {
+            "marks_ms": {name: round(value * 1000, 1) for name, value in self.marks.items()},
+            "imports_total_ms": round(sum(value[0] for value in self.imports.values()) * 1000, 1),
+            "modules_imported": len(self.imports),
+            "top_imports": [{"module": name, "self_ms": round(own * 1000, 2), "cumulative_ms": round(total * 1000, 2)}
+                            for name, (own, total) in ranked[:TOP_IMPORTS]],
+        }
+
+    def dump(self, path):
+        """打印报告并写入 path，返回报告 dict"""
+        data = self.report()
+        print("[Startup] 启动耗时 (自进程创建起): " +
+              ", ".join(f"{name} {value} ms" for name, value in data["marks_ms"].items()))
+        print(f"[Startup] 共导入 {data['modules_imported']} 个模块，耗时 {data['imports_total_ms']} ms，最慢的模块:")
+        for item in data["top_imports"][:10]:
+            print(f"[Startup]   {item['self_ms']:>8.2f} ms  (累计 {item['cumulative_ms']:>8.2f} ms)  {item['module']}")
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+        except OSError as e:
+            print(f"[Startup] 写入启动耗时报告失败: {e}")
+        return data
+
+
+# 全局实例：main.py 最先导入本模块，导入计时从这里开始
+profiler = StartupProfiler()
+PROFILING = os.environ.get(PROFILE_ENV, "") not in ("", "0")
+if PROFILING:
+    profiler.install_import_hook()
+
+
+def mark(name):
+    """记录一个启动阶段，返回自进程创建起的秒数"""
+    return profiler.mark(name)
+
+
+def finish(path):
+    """启动完成：关闭导入计时，开启分析时输出报告；始终打印热键就绪耗时"""
+    profiler.mark("ui_ready")
+    profiler.remove_import_hook()
+    armed = profiler.marks.get("hotkey_armed")
+    if armed is not None:
+        print(f"[Startup] 热键就绪耗时 {armed * 1000:.0f} ms，界面就绪耗时 {profiler.marks['ui_ready'] * 1000:.0f} ms")
+    if PROFILING:
+        profiler.dump(path)
+
+
+def read_hotkey_settings():
+    """
+    只从 config.json 读出 (主热键, 是否拦截按键)，不导入完整的配置模块 (校验、补全字段、写回文件)。
+    文件不存在 (首次运行) 或字段缺失、类型不对时返回 None，由截图模块加载完成后再注册热键。
+    """
+    from .paths import CONFIG_FILE
+    try:
+        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict):
+        return None
+    hotkey, suppress = data.get("hotkey"), data.get("suppress_key")
+    if not isinstance(hotkey, str) or not hotkey.strip() or not isinstance(suppress, bool):
+        return None
+    return hotkey, suppress
+
+
+class EarlyHotkey:
+    """
+    启动时抢先注册的主热键：此时截图模块 (PIL、编码器、截图库等) 还在加载，
+    只记下按键次数，由 CaptureManager.start_listener 注册正式热键后补拍。
+    注意补拍拍到的是加载完成时的画面，而不是按下热键那一刻的画面：
+    在按键时截图需要先加载截图库，正是这里要推迟的开销。
+    """
+
+    def __init__(self, hotkey, suppress=False):
+        import keyboard
+        self._keyboard = keyboard
+        self._lock = threading.Lock()
+        self._released = False
+        self.presses = 0
+        self._handle = keyboard.add_hotkey(hotkey, self._on_press, suppress=suppress)
+
+    def _on_press(self):
+        with self._lock:
+            if self._released:
+                return
+            self.presses += 1
+            count = self.presses
+        print(f"[Startup] 截图模块加载中，已记下第 {count} 次按键")
+
+    def release(self):
+        """撤下临时热键，返回期间按下的次数"""
+        with self._lock:
+            self._released = True
+            presses = self.presses
+        try:
+            self._keyboard.remove_hotkey(self._handle)
+        except (KeyError, ValueError):
+            pass
+        return presses
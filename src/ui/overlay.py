@@ -1,30 +1,179 @@
 import tkinter as tk
 import queue
+import threading
+import time
+from collections import deque
+from ..config import config
+from ..metrics import metrics
+from ..pipeline import Notice
 from ..utils import get_current_monitor_bbox
 
+# 截图线程投递消息后唤醒 UI 线程的虚拟事件
+WAKE_EVENT = "<<GssQueueWake>>"
+TOAST_DURATION_MS = 2000
+# 保留最近多少次 "入队 -> 可见" 的延迟样本
+LATENCY_SAMPLES = 200
+
+
+class ClearRequest:
+    """截图线程发给 UI 的"清屏"请求，UI 关闭提示窗后通过 done 回执"""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class OverlayQueue(queue.Queue):
+    """
+    UI 消息队列：put 时唤醒 Tk 主循环，不再需要定时轮询。
+    投递方 (截图 worker、热键线程) 只设置一个 Event，从不直接调用 Tk；
+    由专门的唤醒线程在主循环运行后转发给 Tk，同一批消息只唤醒一次。
+    每条消息记录入队时间，用于统计显示延迟。
+    """
+
+    def __init__(self, maxsize=0):
+        super().__init__(maxsize)
+        self.waker = None
+        self.on_toast_taken = None  # UI 线程取出一条提示消息时 (持有队列锁) 调用
+        self.last_put_time = None  # 最近一次取出的消息的入队时间
+        self._signal = threading.Event()
+
+    def _put(self, item):
+        self.queue.append((time.perf_counter(), item))
+
+    def _get(self):
+        self.last_put_time, item = self.queue.popleft()
+        if isinstance(item, str) and self.on_toast_taken:
+            self.on_toast_taken()
+        return item
+
+    def cancel_toasts(self):
+        """丢弃还没显示的提示消息，返回丢弃的条数"""
+        with self.mutex:
+            kept = [entry for entry in self.queue if not isinstance(entry[1], str)]
+            cancelled = len(self.queue) - len(kept)
+            if cancelled:
+                self.queue.clear()
+                self.queue.extend(kept)
+                self.not_full.notify_all()
+            return cancelled
+
+    def put(self, item, block=True, timeout=None):
+        super().put(item, block, timeout)
+        self._signal.set()
+
+    def start_waker(self, waker):
+        """[UI 线程] 主循环开始处理事件后调用：启动唤醒线程，之后每批新消息调用一次 waker()"""
+        self.waker = waker
+        threading.Thread(target=self._wake_loop, name="overlay-wake", daemon=True).start()
+
+    def _wake_loop(self):
+        while True:
+            self._signal.wait()
+            # 先清除再唤醒：唤醒之后到达的消息会再触发一次，不会漏掉
+            self._signal.clear()
+            try:
+                self.waker()
+            except Exception:
+                return  # 主循环已退出
+
 
 class NotificationOverlay:
     def __init__(self, root, gui_queue):
         self.root = root
         self.gui_queue = gui_queue
-        self.current_toast = None
+        # 复用同一个提示窗：只改文字和显隐，不再每次创建/销毁 Toplevel
+        self.toast = None
+        self.toast_label = None
+        self._hide_job = None
+        # 提示窗是否正在屏幕上或即将显示 (UI 线程已取出提示消息)，截图线程据此决定要不要等待清屏
+        self.toast_visible = threading.Event()
+        # 统计：UI 线程被唤醒的次数、提示窗显示次数、入队到可见的延迟
+        self.wakeups = 0
+        self.toasts_shown = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
         self.root.withdraw()  # 隐藏主窗口
+        # 关闭提示时立即收起正在显示的提示窗
+        config.subscribe(self._on_config_changed, keys=('show_notification',))
+
+    def _on_config_changed(self, old, new, changed):
+        if not new.show_notification:
+            self.request_clear()
 
-    def create_toast(self, message):
-        """创建提示窗口"""
+    def start(self):
+        """[UI 线程，mainloop 之前] 绑定唤醒事件；主循环开始后启动唤醒线程并处理积压的消息"""
+        self.root.bind(WAKE_EVENT, lambda event: self.process_queue())
+        if isinstance(self.gui_queue, OverlayQueue) and self._tcl_threaded():
+            self.gui_queue.on_toast_taken = self.toast_visible.set
+            # 主循环开始分发事件之前跨线程调用 Tk 会卡住约 1 秒后报错，所以等进入主循环再启动唤醒线程
+            self.root.after_idle(self._on_mainloop_started)
+        else:
+            # 普通 Queue 或非线程版 Tcl 无法从其他线程唤醒主循环，退回旧的轮询方式
+            if isinstance(self.gui_queue, OverlayQueue):
+                self.gui_queue.on_toast_taken = self.toast_visible.set
+            self._poll()
+
+    def _tcl_threaded(self):
         try:
-            window = tk.Toplevel(self.root)
-            self.current_toast = window
+            return self.root.tk.eval("set tcl_platform(threaded)") == "1"
+        except tk.TclError:
+            return False
+
+    def _on_mainloop_started(self):
+        self.gui_queue.start_waker(self._wake)
+        self.process_queue()
+
+    def _wake(self):
+        """[唤醒线程] 线程版 Tcl 把事件转交给主线程；只有唤醒线程会阻塞在这里，投递方不会"""
+        self.root.event_generate(WAKE_EVENT, when="tail")
+
+    def _poll(self):
+        self.process_queue()
+        self.root.after(50, self._poll)
+
+    def request_clear(self, timeout=0.2):
+        """
+        [任意线程调用] 请求关闭提示窗，并等待 UI 确认窗口已隐藏。
+        还在队列里没显示的提示直接丢弃 (否则会出现在下一张截图里)；
+        没有需要关闭的提示窗时立即返回 None；关闭后返回 True；超时返回 False。
+        """
+        if isinstance(self.gui_queue, OverlayQueue):
+            # 先丢弃排队的提示，再检查：UI 线程在此之前取出的提示已经 (在同一把锁内) 标记为可见
+            self.gui_queue.cancel_toasts()
+        elif not self.gui_queue.empty():
+            # 普通 Queue 无法丢弃其中的消息，只能让清屏请求排在它们后面
+            self.toast_visible.set()
+        if not self.toast_visible.is_set():
+            return None
+        request = ClearRequest()
+        self.gui_queue.put(request)
+        return request.done.wait(timeout)
+
+    def _ensure_toast(self):
+        """首次使用时创建提示窗，之后一直复用"""
+        if self.toast is not None:
+            return self.toast
+        window = tk.Toplevel(self.root)
+        window.withdraw()
+
+        # 窗口样式 (TODO: 未来在这里进行 UI 美化)
+        window.overrideredirect(True)
+        window.attributes("-topmost", True)
+        window.attributes("-alpha", 0.85)
+        window.configure(bg="#333333")
 
-            # 窗口样式 (TODO: 未来在这里进行 UI 美化)
-            window.overrideredirect(True)
-            window.attributes("-topmost", True)
-            window.attributes("-alpha", 0.85)
-            window.configure(bg="#333333")
+        label = tk.Label(window, bg="#333333", fg="#00FF00",
+                         font=("微软雅黑", 12, "bold"), padx=15, pady=8)
+        label.pack()
 
-            label = tk.Label(window, text=f"保存成功\n{message}", bg="#333333", fg="#00FF00",
-                             font=("微软雅黑", 12, "bold"), padx=15, pady=8)
-            label.pack()
+        self.toast = window
+        self.toast_label = label
+        return window
+
+    def create_toast(self, message, enqueued_at=None):
+        """显示提示窗口 (复用已创建的窗口)"""
+        try:
+            window = self._ensure_toast()
+            self.toast_label.configure(text=message if isinstance(message, Notice) else f"保存成功\n{message}")
 
             # 位置计算
             try:
@@ -36,35 +185,64 @@ class NotificationOverlay:
                 sw = window.winfo_screenwidth()
                 window.geometry(f"+{int(sw / 2 - 50)}+20")
 
-            # 自动关闭
-            window.after(2000, lambda: self.close_toast(window))
+            window.deiconify()
+            window.lift()
+            self.toast_visible.set()
+
+            # 自动关闭 (连续截图时重新计时)
+            if self._hide_job is not None:
+                window.after_cancel(self._hide_job)
+            self._hide_job = window.after(TOAST_DURATION_MS, self.close_toast)
+
+            if enqueued_at is not None:
+                window.update_idletasks()
+                latency = time.perf_counter() - enqueued_at
+                self.latencies.append(latency)
+                metrics.observe("notify", latency)
+            self.toasts_shown += 1
 
         except Exception as e:
             print(f"弹窗创建失败: {e}")
 
-    def close_toast(self, window=None):
-        target = window if window else self.current_toast
-        if target:
+    def close_toast(self):
+        if self._hide_job is not None:
+            try:
+                self.toast.after_cancel(self._hide_job)
+            except:
+                pass
+            self._hide_job = None
+        if self.toast is not None:
             try:
-                target.destroy()
+                self.toast.withdraw()
             except:
                 pass
-            if target == self.current_toast:
-                self.current_toast = None
+        self.toast_visible.clear()
 
     def process_queue(self):
-        """轮询队列"""
+        """处理队列中的全部消息 (由唤醒事件触发)"""
+        self.wakeups += 1
         try:
             while True:
                 msg = self.gui_queue.get_nowait()
+                enqueued_at = getattr(self.gui_queue, "last_put_time", None)
 
-                if msg == "CLEAR":
+                if isinstance(msg, ClearRequest):
                     self.close_toast()
+                    # 让 Tk 立即处理隐藏，再回执给截图线程
+                    self.root.update_idletasks()
+                    msg.done.set()
                 elif isinstance(msg, str):
-                    self.close_toast()  # 先关旧的
-                    self.create_toast(msg)
+                    self.toast_visible.set()
+                    self.create_toast(msg, enqueued_at)
         except queue.Empty:
             pass
 
-        # 继续轮询
-        self.root.after(50, self.process_queue)
\ No newline at end of file
+    def stats(self):
+        """唤醒次数与 "入队 -> 可见" 延迟 (毫秒)"""
+        samples = sorted(self.latencies)
+        result = {"wakeups": self.wakeups, "toasts": self.toasts_shown}
+        if samples:
+            result["latency_avg_ms"] = round(sum(samples) / len(samples) * 1000, 2)
+            result["latency_p95_ms"] = round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 2)
+            result["latency_max_ms"] = round(samples[-1] * 1000, 2)
+        return result
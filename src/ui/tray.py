@@ -1,7 +1,14 @@
 import os
+import threading
 import pystray
 from PIL import Image, ImageDraw
 from ..config import config, get_resource_path, APP_VERSION
+from ..metrics import metrics
+
+# 当前托盘图标；stop_tray() 可能在图标创建之前就被调用 (启动期间收到的退出命令)
+_icon = None
+_stopped = False
+_icon_lock = threading.Lock()
 
 
 def create_default_icon():
@@ -17,17 +24,16 @@ def create_default_icon():
 
 def setup_tray(stop_callback, update_mgr):
     icon_path = get_resource_path('camera.ico')
-    save_dir = config.get('save_dir')
-    hotkey = config.get('hotkey')
 
     def open_folder(icon, item):
-        os.startfile(os.path.abspath(save_dir))
+        # 每次读取最新配置，修改保存目录后无需重启
+        os.startfile(os.path.abspath(config.get('save_dir')))
 
     def check_update_action(icon, item):
         update_mgr.check_for_updates(silent=False)  # 手动检查
 
     def exit_program(icon, item):
-        icon.stop()
+        stop_tray()
         stop_callback()
 
     if os.path.exists(icon_path):
@@ -38,26 +44,61 @@ def setup_tray(stop_callback, update_mgr):
     # TODO: 未来在这里添加 "设置" 菜单
     menu = (
         pystray.MenuItem(f'GameShadowSnap {APP_VERSION}', lambda i, It: None, enabled=False),
-        pystray.MenuItem(f'热键: {hotkey}', lambda i, It: None, enabled=False),
+        pystray.MenuItem(lambda item: f"热键: {config.get('hotkey')}", lambda i, It: None, enabled=False),
         pystray.MenuItem('打开保存文件夹', open_folder),
         pystray.MenuItem('检查更新', check_update_action),
         pystray.MenuItem('退出', exit_program)
     )
 
     icon = pystray.Icon("GameShadowSnap", image, "GameShadowSnap", menu)
+    config.subscribe(lambda old, new, changed: icon.update_menu(), keys=('hotkey',))
+
+    # 悬停文字 = 更新进度 (Updater 传入) + 截图耗时摘要 (开启 metrics_enabled 时)
+    status = {"progress": None}
+
+    def refresh_tooltip():
+        lines = [text for text in (status["progress"], metrics.summary_text()) if text]
+        if not lines:
+            # 没有内容时，恢复干净的默认状态
+            icon.title = "GameShadowSnap"
+        else:
+            # Windows 托盘提示最多 127 个字符
+            icon.title = "\n".join([f"GameShadowSnap-{APP_VERSION}"] + lines)[:127]
 
     # 定义一个内部函数，用来更新图标的 Tooltip (悬停文字)
     def update_tray_tooltip(text):
-        # 这里的 text 就是 Updater 传过来的 "正在更新: 45%..."
-        # 我们把它拼接到软件名后面
+        # 这里的 text 就是 Updater 传过来的 "正在更新: 45%..."，传入 None 表示更新结束
+        status["progress"] = text
         if icon:
-            if text is None:
-                # 传入 None 时，恢复干净的默认状态
-                icon.title = f"GameShadowSnap"
-            else:
-                # 有内容时，显示状态
-                icon.title = f"GameShadowSnap-{APP_VERSION}\n{text}"
+            refresh_tooltip()
     # 将这个函数注册给 UpdateManager
     # 这样当 updater 里的进度变化时，就会自动调用上面这个函数
     update_mgr.set_progress_callback(update_tray_tooltip)
-    icon.run()
+    # 截图完成后刷新耗时摘要 (metrics 内部限制为每秒最多一次)
+    metrics.add_listener(refresh_tooltip)
+    config.subscribe(lambda old, new, changed: refresh_tooltip(), keys=('metrics_enabled',))
+
+    # 图标开始运行后才登记，保证 stop_tray() 调用 icon.stop() 时消息循环已经存在
+    def on_ready(icon):
+        global _icon
+        with _icon_lock:
+            if _stopped:
+                icon.stop()
+                return
+            _icon = icon
+        icon.visible = True
+
+    icon.run(setup=on_ready)
+
+
+def stop_tray():
+    """移除托盘图标 (托盘菜单的“退出”和命令行 --shutdown 共用)，否则进程退出后任务栏会残留幽灵图标"""
+    global _stopped
+    with _icon_lock:
+        _stopped = True
+        icon = _icon
+    if icon is not None:
+        try:
+            icon.stop()
+        except Exception as e:
+            print(f"[Tray] 移除托盘图标失败: {e}")
@@ -1,20 +1,58 @@
 import os
-import shutil
 import subprocess
 import sys
 import threading
 import time
-import zipfile
 from tkinter import messagebox
 
-import requests
-from packaging import version
+from .config import APP_VERSION, BASE_DIR, config
+from .logger import log, DEBUG, WARNING, ERROR
+from .release_info import ReleaseChecker, RateLimited, ReleaseHTTPError, CACHE_FILENAME
 
-from .config import APP_VERSION, config
+# requests / packaging / zipfile 等较重的依赖在真正检查或下载更新时才导入，不拖慢启动
 
 REPO_OWNER = "StreLitziaYc"
 REPO_NAME = "game_shadow_snap"
 UPDATE_TEMP_FILE = "update_temp.zip"
+DELTA_TEMP_FILE = "update_temp.delta"
+
+
+class _ProgressReporter:
+    """下载进度：每秒最多刷新一次托盘提示和控制台进度行"""
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.last_time = time.time()
+        self.last_size = None
+
+    def __call__(self, downloaded_size, total_size):
+        current_time = time.time()
+        if self.last_size is None:
+            # 续传时从已下载的位置开始计算速度
+            self.last_size = downloaded_size
+            print(f"[Updater] 开始下载... 总大小: {total_size / 1024 / 1024:.2f} MB")
+            return
+        # 每隔 1 秒打印一次，避免刷屏太快看不清
+        if current_time - self.last_time < 1.0:
+            return
+
+        # 计算速度 (Bytes/s -> KB/s -> MB/s)
+        speed = (downloaded_size - self.last_size) / (current_time - self.last_time)
+        speed_str = f"{speed / 1024:.2f} KB/s"
+        if speed > 1024 * 1024:
+            speed_str = f"{speed / 1024 / 1024:.2f} MB/s"
+
+        percent = (downloaded_size / total_size) * 100 if total_size > 0 else 0
+        # 调用托盘更新回调，格式示例: "正在更新: 45% (2.5 MB/s)"
+        if self.callback:
+            self.callback(f"正在更新: {percent:.1f}% ({speed_str})")
+
+        # 打印进度 (使用 \r 可以让光标回到行首，实现单行刷新效果)
+        print(f"\r[下载中] 进度: {percent:.1f}% | 速度: {speed_str} | 已下载: {downloaded_size / 1024 / 1024:.2f} MB",
+              end="", flush=True)
+
+        self.last_time = current_time
+        self.last_size = downloaded_size
 
 
 class UpdateManager:
@@ -24,6 +62,13 @@ class UpdateManager:
         self.current_exe = sys.executable
         self.app_dir = os.path.dirname(self.current_exe)
         self.on_progress_change = None
+        # release 信息缓存 (ETag + 精简后的 JSON)，放在 config.json 旁边
+        self.release_checker = ReleaseChecker(
+            self.api_url,
+            request=lambda url, **kwargs: self._request_with_fallback(url, **kwargs),
+            cache_path=os.path.join(BASE_DIR, CACHE_FILENAME),
+            min_interval=config.get("update_check_interval_minutes", 60) * 60,
+        )
 
         # 初始化时自动清理旧备份
         self._clean_old_backups()
@@ -36,38 +81,41 @@ class UpdateManager:
         port = config.get("proxy_port", "")
         if port and str(port).strip():
             proxy_url = f"http://127.0.0.1:{port}"
-            print(f"[Updater] 使用代理: {proxy_url}")
+            log(f"[Updater] 使用代理: {proxy_url}", DEBUG)
             return {
                 "http": proxy_url,
                 "https": proxy_url
             }
         return None
 
-    def _request_with_fallback(self, url, stream=False, timeout=10):
+    def _request_with_fallback(self, url, stream=False, timeout=10, headers=None):
         """
         尝试使用代理请求，如果代理连接失败，则自动回退到直连
         """
+        import requests
+
         proxies = self._get_proxies()
+        headers = headers or {}
 
         try:
             # 1. 尝试使用配置的代理 (如果有)
             if proxies:
-                print(f"[Updater] 尝试使用代理连接: {url}")
-                return requests.get(url, headers={}, proxies=proxies, stream=stream, timeout=timeout)
+                log(f"[Updater] 尝试使用代理连接: {url}", DEBUG)
+                return requests.get(url, headers=headers, proxies=proxies, stream=stream, timeout=timeout)
 
             # 2. 如果没配置代理，直接直连
             else:
-                print(f"[Updater] 代理连接不可用，尝试直连: {url}")
-                return requests.get(url, headers={}, stream=stream, timeout=timeout)
+                log(f"[Updater] 代理连接不可用，尝试直连: {url}", DEBUG)
+                return requests.get(url, headers=headers, stream=stream, timeout=timeout)
 
         except (
                 requests.exceptions.ProxyError, requests.exceptions.ConnectTimeout,
                 requests.exceptions.ConnectionError) as e:
             # 3. 捕获代理相关的错误
             if proxies:
-                print(f"[Updater] ⚠️ 代理连接失败 ({e})，正在尝试直连...")
+                log(f"[Updater] ⚠️ 代理连接失败 ({e})，正在尝试直连...", WARNING)
                 # 代理挂了，尝试去掉代理再请求一次 (Fallback)
-                return requests.get(url, headers={}, proxies=None, stream=stream, timeout=timeout)
+                return requests.get(url, headers=headers, proxies=None, stream=stream, timeout=timeout)
             else:
                 # 如果本来就是直连出错，那就真没办法了，抛出异常
                 raise e
@@ -85,13 +133,13 @@ class UpdateManager:
                     os.remove(old_exe)
                     print(f"[Updater] 已清理旧版本备份: {old_exe}")
                 except Exception as e:
-                    print(f"[Updater] 清理旧版本失败: {e}")
+                    log(f"[Updater] 清理旧版本失败: {e}", WARNING)
             if os.path.exists(UPDATE_TEMP_FILE):
                 try:
                     os.remove(UPDATE_TEMP_FILE)
                     print(f"[Updater] 已清理更新临时文件: {UPDATE_TEMP_FILE}")
                 except Exception as e:
-                    print(f"[Updater] 清理更新临时文件失败: {e}")
+                    log(f"[Updater] 清理更新临时文件失败: {e}", WARNING)
 
     def check_for_updates(self, silent=False):
         """检查更新主入口"""
@@ -99,15 +147,24 @@ class UpdateManager:
         t.start()
 
     def _do_check(self, silent):
+        from packaging import version
+        from .delta import delta_asset_name
+
         print(f"[Updater] 正在检查更新 (当前版本: {APP_VERSION})")
         try:
             if APP_VERSION == "dev":
                 print("[Updater] 当前为开发模式 (dev)，已跳过自动更新检查。")
                 print("          (提示: 如需测试更新，请设置环境变量 GSS_VERSION=0.0.0)")
                 return  # 直接结束，不发起任何网络请求！
-            print(f"[Updater] 正在请求: {self.api_url}")
-            response = self._request_with_fallback(self.api_url, timeout=10)
-            if response.status_code != 200:
+            log(f"[Updater] 正在请求: {self.api_url}", DEBUG)
+            self.release_checker.min_interval = config.get("update_check_interval_minutes", 60) * 60
+            try:
+                # 手动检查忽略最小间隔；静默检查在间隔内直接使用缓存
+                data, source = self.release_checker.fetch(force=not silent)
+            except RateLimited:
+                data, source = self.release_checker.cache.release, "rate_limited"
+            except ReleaseHTTPError as e:
+                response = e.response
                 # 尝试解析 GitHub 返回的详细错误 JSON
                 try:
                     error_json = response.json()
@@ -120,29 +177,35 @@ class UpdateManager:
                     documentation_url = ""
 
                 # 【核心】打印到控制台，这就是你要的调试信息！
-                print(f"\n[Updater Error] 请求失败 (Code: {response.status_code})")
-                print(f"[Updater Error] 原因: {error_msg}")
+                log(f"\n[Updater Error] 请求失败 (Code: {response.status_code})", ERROR)
+                log(f"[Updater Error] 原因: {error_msg}", ERROR)
                 if documentation_url:
-                    print(f"[Updater Error] 文档: {documentation_url}\n")
-
-                # 特殊处理 403 限流
-                if response.status_code == 403:
-                    if not silent:
-                        # 在弹窗里也稍微提示一下
-                        self._notify("检查受限", "GitHub API 请求频率过高，请稍后再试。")
-                    return  # 结束方法，不抛出异常
+                    log(f"[Updater Error] 文档: {documentation_url}\n", ERROR)
 
                 # 其他错误则抛出，进入下方的 except 流程
                 raise Exception(f"HTTP {response.status_code}: {error_msg}")
 
-            data = response.json()
+            if source == "rate_limited":
+                retry_at = time.strftime("%H:%M", time.localtime(self.release_checker.cache.retry_after))
+                print(f"[Updater] GitHub API 限流中，{retry_at} 之前不再请求"
+                      + ("，使用缓存的发布信息" if data else ""))
+                if not silent:
+                    # 在弹窗里也稍微提示一下
+                    self._notify("检查受限", f"GitHub API 请求频率过高，请在 {retry_at} 之后再试。")
+                if not data:
+                    return  # 结束方法，不抛出异常
+            elif source == "throttled":
+                print("[Updater] 距上次检查时间过短，使用缓存的发布信息")
+
             latest_tag = data.get("tag_name", "v0.0.0")
 
             # 查找 zip 下载链接
             download_url = ""
+            zip_asset = None
             for asset in data.get("assets", []):
                 if asset["name"].endswith(".zip"):
                     download_url = asset["browser_download_url"]
+                    zip_asset = asset
                     break
 
             if not download_url:
@@ -157,12 +220,16 @@ class UpdateManager:
             v_remote = version.parse(latest_tag.lstrip("v"))
 
             if v_remote > v_local:
+                sha256 = self._find_sha256(data.get("assets", []), zip_asset)
+                # 发布中带有从当前版本升级的补丁时，优先只下载补丁
+                delta_asset = next((a for a in data.get("assets", [])
+                                    if a["name"] == delta_asset_name(APP_VERSION)), None)
                 if silent:
                     # 静默模式：直接开始下载安装流程，下载完再弹窗确认重启
-                    self._download_and_install(download_url, latest_tag)
+                    self._download_and_install(download_url, latest_tag, sha256, delta_asset)
                 else:
                     # 手动模式：先询问
-                    self.root.after(0, lambda: self._ask_to_update(download_url, latest_tag))
+                    self.root.after(0, lambda: self._ask_to_update(download_url, latest_tag, sha256, delta_asset))
             else:
                 if not silent:
                     self._notify("检查更新", f"当前已是最新版本 ({APP_VERSION})")
@@ -171,99 +238,126 @@ class UpdateManager:
             print(f"更新检查出错: {e}")
             if not silent: self._notify("检查失败", str(e))
 
-    def _ask_to_update(self, url, version):
+    def _find_sha256(self, assets, zip_asset):
+        """
+        查找随发布附带的 SHA-256：
+        优先使用 GitHub 为每个附件计算的 digest 字段，其次是 CI 上传的 <zip名>.sha256 文件。
+        """
+        from .download import parse_sha256
+
+        digest = parse_sha256(zip_asset.get("digest"))
+        if digest:
+            return digest
+        checksum_name = zip_asset["name"] + ".sha256"
+        for asset in assets:
+            if asset["name"] == checksum_name:
+                try:
+                    response = self._request_with_fallback(asset["browser_download_url"], timeout=10)
+                    if response.status_code == 200:
+                        return parse_sha256(response.text)
+                except Exception as e:
+                    log(f"[Updater] 获取校验文件失败: {e}", WARNING)
+        log("[Updater] ⚠️ 该版本未发布 SHA-256 摘要，将跳过完整性校验", WARNING)
+        return None
+
+    def _ask_to_update(self, url, version, sha256=None, delta_asset=None):
         print(f"[Updater] 发现新版本 {version}，正在下载...")
         if messagebox.askyesno("发现新版本", f"发现新版本 {version}！\n是否立即更新？"):
-            t = threading.Thread(target=self._download_and_install, args=(url, version), daemon=True)
+            t = threading.Thread(target=self._download_and_install, args=(url, version, sha256, delta_asset),
+                                 daemon=True)
             t.start()
 
-    def _download_and_install(self, url, version_tag):
-        temp_zip = os.path.join(self.app_dir, UPDATE_TEMP_FILE)
-        temp_new_exe = os.path.join(self.app_dir, "GameShadowSnap.new")
+    def _install_delta(self, delta_asset, temp_new_exe):
+        """
+        下载补丁并应用到当前 EXE，结果直接写入 GameShadowSnap.new。
+        apply_patch 会先确认当前 EXE 与补丁的基准版本一致，写完后校验新文件的 SHA-256。
+        成功返回 True；任何失败都返回 False，由调用方回退到完整 zip。
+        """
+        from .delta import apply_patch
+        from .download import ResumableDownload, parse_sha256
 
+        if not getattr(sys, 'frozen', False):
+            return False  # 开发环境下 sys.executable 是 python.exe，没有可打补丁的 EXE
+        temp_delta = os.path.join(self.app_dir, DELTA_TEMP_FILE)
         try:
-            # 1. 下载
-            print(f"[Updater] 正在下载更新文件: {url}")
-            r = self._request_with_fallback(url, stream=True, timeout=30)
-            total_size = int(r.headers.get('content-length', 0))
-            downloaded_size = 0
-
-            # 用于计算网速的变量
-            start_time = time.time()
-            last_time = start_time
-            last_downloaded_size = 0
+            print(f"[Updater] 发现增量补丁 {delta_asset['name']}，仅下载补丁")
+            downloader = ResumableDownload(
+                delta_asset["browser_download_url"], temp_delta,
+                request=lambda u, **kwargs: self._request_with_fallback(u, **kwargs),
+                expected_sha256=parse_sha256(delta_asset.get("digest")),
+                progress=_ProgressReporter(self.on_progress_change),
+            )
+            downloader.run()
+            digest = apply_patch(self.current_exe, temp_delta, temp_new_exe)
+            print(f"\n[Updater] 补丁应用完成，新文件 SHA-256: {digest} (校验通过)")
+            return True
+        except Exception as e:
+            log(f"\n[Updater] 增量更新失败，改为下载完整更新包: {e}", WARNING)
+            return False
+        finally:
+            for path in (temp_delta, temp_delta + ".part", temp_delta + ".part.json"):
+                if os.path.exists(path):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
 
-            print(f"[Updater] 开始下载... 总大小: {total_size / 1024 / 1024:.2f} MB")
+    def _download_and_install(self, url, version_tag, sha256=None, delta_asset=None):
+        from .download import ResumableDownload, IntegrityError
+        from .zipstream import ZipMemberStream
 
-            with open(temp_zip, 'wb') as f:
-                for chunk in r.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded_size += len(chunk)
-
-                        # 获取当前时间
-                        current_time = time.time()
-                        # 每隔 1 秒打印一次，避免刷屏太快看不清
-                        if current_time - last_time >= 1.0:
-                            # 计算这一秒内下载了多少字节
-                            delta_bytes = downloaded_size - last_downloaded_size
-                            delta_time = current_time - last_time
-
-                            # 计算速度 (Bytes/s -> KB/s -> MB/s)
-                            speed = delta_bytes / delta_time
-                            speed_str = f"{speed / 1024:.2f} KB/s"
-                            if speed > 1024 * 1024:
-                                speed_str = f"{speed / 1024 / 1024:.2f} MB/s"
-
-                            # 计算百分比
-                            percent = 0
-                            if total_size > 0:
-                                percent = (downloaded_size / total_size) * 100
-                            # 调用托盘更新回调
-                            # 格式示例: "下载中: 45% (2.5 MB/s)"
-                            status_text = f"正在更新: {percent:.1f}% ({speed_str})"
-                            if self.on_progress_change:
-                                self.on_progress_change(status_text)
-
-                            # 打印进度 (使用 \r 可以让光标回到行首，实现单行刷新效果)
-                            # 如果在某些 IDE 终端里 \r 无效，可以改成普通的 print(...)
-                            print(
-                                f"\r[下载中] 进度: {percent:.1f}% | 速度: {speed_str} | 已下载: {downloaded_size / 1024 / 1024:.2f} MB",
-                                end="", flush=True)
-
-                            # 更新变量，为下一秒做准备
-                            last_time = current_time
-                            last_downloaded_size = downloaded_size
+        temp_new_exe = os.path.join(self.app_dir, "GameShadowSnap.new")
 
-            # 下载循环结束后，换个行，确保下一条日志不跟在进度条后面
-            print("\n[Updater] 下载完成！")
+        if delta_asset and self._install_delta(delta_asset, temp_new_exe):
+            self.root.after(0, lambda: self._perform_replace_and_restart(temp_new_exe))
+            return
 
-            # 2. 解压 (只提取 exe，不覆盖用户的 config.json)
-            with zipfile.ZipFile(temp_zip, 'r') as zf:
-                exe_name = "GameShadowSnap.exe"
-                if exe_name not in zf.namelist():
-                    raise Exception("更新包中未找到 EXE 文件")
+        self._remove_legacy_temp()
+        try:
+            # 1. 边下载边解压：只把 EXE 写入 .new (不覆盖用户的 config.json)；
+            #    zip 同时顺序写入 .new.part，程序重启后从断点继续
+            #    对整个 zip 计算 SHA-256，校验失败会删除 .new
+            print(f"[Updater] 正在下载更新文件: {url}")
+            progress = _ProgressReporter(self.on_progress_change)
+            extractor = ZipMemberStream("GameShadowSnap.exe", temp_new_exe)
+            downloader = ResumableDownload(
+                url, temp_new_exe,
+                request=lambda u, **kwargs: self._request_with_fallback(u, **kwargs),
+                expected_sha256=sha256,
+                progress=progress,
+                sink=extractor,
+            )
+            downloader.run()
 
-                with zf.open(exe_name) as source, open(temp_new_exe, "wb") as target:
-                    shutil.copyfileobj(source, target)
-            print(f"[Updater] 解压完成，正在准备替换...")
+            # 下载循环结束后，换个行，确保下一条日志不跟在进度条后面
+            print(f"\n[Updater] 下载并解压完成！SHA-256: {downloader.sha256}" + (" (校验通过)" if sha256 else ""))
 
-            # 3. 准备替换
+            # 2. 准备替换
             self.root.after(0, lambda: self._perform_replace_and_restart(temp_new_exe))
 
+        except IntegrityError as e:
+            print(f"更新失败: {e}")
+            self._notify("更新失败", "更新包校验失败，文件可能已损坏，请稍后重试。")
         except Exception as e:
             print(f"更新失败: {e}")
             self._notify("更新失败", f"下载或安装出错: {e}")
-        finally:
-            if os.path.exists(temp_zip):
-                os.remove(temp_zip)
+
+    def _remove_legacy_temp(self):
+        """旧版本先下载 zip 再解压，清理它可能留下的临时文件"""
+        temp_zip = os.path.join(self.app_dir, UPDATE_TEMP_FILE)
+        for path in (temp_zip, temp_zip + ".part", temp_zip + ".part.json"):
+            if os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
 
     def _perform_replace_and_restart(self, new_exe_path):
         # ================= 开发环境熔断保护 =================
         # 如果不是打包后的 EXE，绝对不能执行替换，否则会破坏 Python 环境
         if not getattr(sys, 'frozen', False):
-            print(f"[Updater] 警告: 检测到开发环境！停止文件替换。")
-            print(f"[Updater] 新文件已下载至: {new_exe_path}")
+            log("[Updater] 警告: 检测到开发环境！停止文件替换。", WARNING)
+            log(f"[Updater] 新文件已下载至: {new_exe_path}", WARNING)
             messagebox.showinfo("开发模式保护",
                                 "更新包下载成功！\n\n"
                                 "但为了保护你的 Python 环境，开发模式下**不会执行**文件替换操作。\n"
@@ -1,4 +1,27 @@
 # 从子模块导入所有功能，暴露给包的外部
-from .files import get_unique_filepath
-from .system import set_dpi_awareness, get_current_monitor_bbox
-from .instance import enforce_single_instance
+# 子模块在第一次访问对应名字时才导入：启动时只需要 instance (单实例锁)，
+# 不必在热键就绪前加载显示器布局、窗口几何等模块
+_EXPORTS = {
+    "files": ("get_unique_filepath", "raw_frame_header", "read_raw_frame", "read_raw_frame_info", "RAW_EXTENSION",
+              "write_raw_temp", "write_temp_file", "Chunks", "atomic_write", "clean_temp_files", "FilenameAllocator",
+              "claim_unique_filepath"),
+    "system": ("set_dpi_awareness", "get_current_monitor_bbox", "get_idle_seconds", "lower_process_priority",
+               "get_foreground_window_info", "wait_for_composition"),
+    "monitors": ("MonitorTopology", "Win32MonitorSource", "FakeMonitorSource", "get_topology", "set_topology"),
+    "geometry": ("CapturePlan", "GeometryProvider", "Win32WindowSource", "FakeWindowSource", "get_geometry",
+                 "set_geometry", "CAPTURE_MODES"),
+    "instance": ("enforce_single_instance", "start_instance_server", "on_instance_command", "InstanceGuard",
+                 "COMMANDS"),
+}
+_MODULE_OF = {name: module for module, names in _EXPORTS.items() for name in names}
+__all__ = list(_MODULE_OF)
+
+
+def __getattr__(name):
+    module = _MODULE_OF.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
@@ -1,4 +1,21 @@
 import os
+import struct
+import threading
+import time
+import uuid
+from datetime import datetime
+
+# 写入中的临时文件前缀 (写完后再原子重命名为正式文件名)
+TEMP_PREFIX = ".gss_"
+TEMP_SUFFIX = ".tmp"
+
+# 原始帧文件格式 (.gssraw)：魔数 + 宽 + 高 + 模式名长度 + 模式名 + 像素数据
+RAW_EXTENSION = ".gssraw"
+RAW_MAGIC = b"GSSRAW1\0"
+_RAW_HEADER = struct.Struct("<IIH")
+
+# 默认文件名模板，与旧版本的 screenshot_2024-01-01_12-00-00.png 保持一致
+DEFAULT_FILENAME_TEMPLATE = "{prefix}_{date}_{time}"
 
 
 def get_unique_filepath(directory, filename_base, extension):
@@ -11,3 +28,206 @@ def get_unique_filepath(directory, filename_base, extension):
         filepath = os.path.join(directory, filename)
         counter += 1
     return filepath, filename
+
+
+def raw_frame_header(image):
+    """生成 .gssraw 文件头"""
+    mode = image.mode.encode("ascii")
+    return RAW_MAGIC + _RAW_HEADER.pack(image.width, image.height, len(mode)) + mode
+
+
+class Chunks:
+    """分段的文件内容 (例如 文件头 + 像素)：len() 为总字节数，写盘时逐段写入，省掉拼接时的整帧复制"""
+
+    def __init__(self, *parts):
+        self.parts = parts
+
+    def __len__(self):
+        return sum(len(part) for part in self.parts)
+
+
+def _temp_path(directory):
+    return os.path.join(directory or ".", f"{TEMP_PREFIX}{uuid.uuid4().hex}{TEMP_SUFFIX}")
+
+
+def write_raw_temp(directory, image):
+    """把 PIL 图像的原始像素写入同目录临时文件，返回临时文件路径"""
+    return write_temp_file(directory, Chunks(raw_frame_header(image), image.tobytes()))
+
+
+def _read_raw_header(f, filepath):
+    if f.read(len(RAW_MAGIC)) != RAW_MAGIC:
+        raise ValueError(f"不是有效的原始帧文件: {filepath}")
+    width, height, mode_len = _RAW_HEADER.unpack(f.read(_RAW_HEADER.size))
+    mode = f.read(mode_len).decode("ascii")
+    return width, height, mode
+
+
+def read_raw_frame_info(filepath):
+    """只读取 .gssraw 文件头，返回 (宽, 高, 模式)"""
+    with open(filepath, "rb") as f:
+        return _read_raw_header(f, filepath)
+
+
+def read_raw_frame(filepath):
+    """读取 .gssraw 文件，返回 PIL 图像"""
+    from PIL import Image
+
+    with open(filepath, "rb") as f:
+        width, height, mode = _read_raw_header(f, filepath)
+        data = f.read()
+    return Image.frombytes(mode, (width, height), data)
+
+
+def write_temp_file(directory, data):
+    """把数据 (bytes 类对象或 Chunks) 写入同目录下的临时文件，返回临时文件路径"""
+    temp_path = _temp_path(directory)
+    with open(temp_path, "wb") as f:
+        if isinstance(data, Chunks):
+            f.writelines(data.parts)
+        else:
+            f.write(data)
+    return temp_path
+
+
+def atomic_write(filepath, data):
+    """先写临时文件再重命名，保证目标路径上永远不会出现写了一半的文件"""
+    temp_path = write_temp_file(os.path.dirname(filepath) or ".", data)
+    try:
+        os.replace(temp_path, filepath)
+    except Exception:
+        os.remove(temp_path)
+        raise
+
+
+def clean_temp_files(directory, older_than=60):
+    """清理上次异常退出残留的临时文件"""
+    now = time.time()
+    removed = 0
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return 0
+    for entry in entries:
+        if entry.name.startswith(TEMP_PREFIX) and entry.name.endswith(TEMP_SUFFIX):
+            try:
+                if now - entry.stat().st_mtime > older_than:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+def _claim_path(source_path, filepath, move=True):
+    """
+    原子地把 source_path 放到 filepath 上：目标已存在时返回 False (不会覆盖)。
+    用硬链接占用文件名；文件系统不支持硬链接 (如 FAT32) 时用独占创建占位，再原子替换。
+    """
+    try:
+        os.link(source_path, filepath)
+    except FileExistsError:
+        return False
+    except OSError:
+        if not move:
+            raise
+        try:
+            open(filepath, "xb").close()
+        except FileExistsError:
+            return False
+        os.replace(source_path, filepath)
+        return True
+    if move:
+        os.remove(source_path)
+    return True
+
+
+def claim_unique_filepath(source_path, directory, stem, extension):
+    """把 source_path 移动到 stem + extension，重名时依次尝试 _1、_2 …，返回最终路径 (不会覆盖已有文件)"""
+    counter = 0
+    while True:
+        name = f"{stem}{extension}" if counter == 0 else f"{stem}_{counter}{extension}"
+        filepath = os.path.join(directory, name)
+        if _claim_path(source_path, filepath):
+            return filepath
+        counter += 1
+
+
+class FilenameAllocator:
+    """
+    O(1) 的不重名文件名分配器：
+    每个目录只在第一次使用时扫描一次，之后用内存中的计数器直接算出下一个可用的名字，
+    不再对 _1、_2 … 逐个调用 os.path.exists。
+    落盘时用硬链接 (目标已存在会失败) 原子地占用文件名，与其他写入方并发也不会互相覆盖。
+
+    模板可用字段: {prefix} {date} {time} {ms} {seq}
+    模板中没有 {seq} 时，重名的文件追加 _1、_2 …；有 {seq} 时始终带序号 (从 0 开始)。
+    """
+
+    def __init__(self, template=DEFAULT_FILENAME_TEMPLATE):
+        self.template = template or DEFAULT_FILENAME_TEMPLATE
+        self._explicit_seq = "{seq" in self.template
+        self._lock = threading.Lock()
+        self._taken = {}  # 目录 -> 已存在的文件名 (不含扩展名，小写)
+        self._counters = {}  # (目录, 文件名主体) -> 下一个序号
+
+    def _taken_names(self, directory):
+        """第一次遇到某个目录时扫描一次，之后只在内存中维护"""
+        taken = self._taken.get(directory)
+        if taken is None:
+            taken = set()
+            try:
+                for entry in os.scandir(directory):
+                    taken.add(os.path.splitext(entry.name)[0].lower())
+            except FileNotFoundError:
+                pass
+            self._taken[directory] = taken
+        return taken
+
+    def prime(self, directory):
+        """启动时预先扫描目录，避免第一次截图时才付出扫描的开销"""
+        with self._lock:
+            return len(self._taken_names(directory))
+
+    def _format(self, prefix, when, seq):
+        fields = {
+            "prefix": prefix,
+            "date": when.strftime("%Y-%m-%d"),
+            "time": when.strftime("%H-%M-%S"),
+            "ms": f"{when.microsecond // 1000:03d}",
+            "seq": seq,
+        }
+        return self.template.format(**fields)
+
+    def _next_stem(self, directory, prefix, when):
+        """在锁内调用：计算下一个未被占用的文件名主体"""
+        taken = self._taken_names(directory)
+        base = self._format(prefix, when, 0)
+        key = (directory, base)
+        seq = self._counters.get(key, 0)
+        while True:
+            if self._explicit_seq:
+                stem = self._format(prefix, when, seq)
+            else:
+                stem = base if seq == 0 else f"{base}_{seq}"
+            seq += 1
+            # 正常情况下第一次就命中；只有目录里已有同名文件时才会继续
+            if stem.lower() not in taken:
+                self._counters[key] = seq
+                taken.add(stem.lower())
+                return stem
+
+    def claim(self, source_path, directory, extension, prefix="screenshot", when=None, move=True):
+        """
+        把 source_path (通常是写好的临时文件) 放到一个新分配的文件名上，返回 (路径, 文件名)。
+        move=True 时移动源文件，否则只创建硬链接 (源文件保留)。
+        """
+        when = when or datetime.now()
+        while True:
+            with self._lock:
+                stem = self._next_stem(directory, prefix, when)
+            filename = f"{stem}{extension}"
+            filepath = os.path.join(directory, filename)
+            if _claim_path(source_path, filepath, move):
+                return filepath, filename
+            # 被程序外的写入方抢先，换下一个序号
@@ -0,0 +1,198 @@
+import ctypes
+import threading
+
+from .monitors import get_topology
+
+# 截图范围模式
+MODE_MONITOR = "monitor"  # 前台窗口所在的整个显示器 (默认)
+MODE_WINDOW = "window"  # 前台窗口的客户区 (或按游戏保存的区域)
+MODE_ALL_MONITORS = "all_monitors"  # 所有显示器拼成一张
+CAPTURE_MODES = (MODE_MONITOR, MODE_WINDOW, MODE_ALL_MONITORS)
+
+
+def rect_size(rect):
+    return max(0, rect[2] - rect[0]), max(0, rect[3] - rect[1])
+
+
+def rect_empty(rect):
+    width, height = rect_size(rect)
+    return width == 0 or height == 0
+
+
+def clip_rect(rect, bounds):
+    """rect 与 bounds 的交集，不相交时宽或高为 0"""
+    left, top = max(rect[0], bounds[0]), max(rect[1], bounds[1])
+    return left, top, max(left, min(rect[2], bounds[2])), max(top, min(rect[3], bounds[3]))
+
+
+def union_rect(rects):
+    rects = list(rects)
+    if not rects:
+        return None
+    return (min(r[0] for r in rects), min(r[1] for r in rects),
+            max(r[2] for r in rects), max(r[3] for r in rects))
+
+
+class CapturePlan:
+    """
+    一次截图要抓取的范围：tiles 为各块的屏幕坐标 (多显示器拼接时每个显示器一块)，
+    bounds 为最终图像对应的屏幕范围，各块按相对 bounds 左上角的偏移拼到画布上。
+    """
+
+    def __init__(self, tiles, mode=MODE_MONITOR, bounds=None):
+        self.tiles = [tuple(t) for t in tiles]
+        self.mode = mode
+        self.bounds = tuple(bounds) if bounds else union_rect(self.tiles)
+
+    @property
+    def size(self):
+        return rect_size(self.bounds)
+
+    @property
+    def pixels(self):
+        width, height = self.size
+        return width * height
+
+    def offsets(self):
+        return [(t[0] - self.bounds[0], t[1] - self.bounds[1]) for t in self.tiles]
+
+    def __repr__(self):
+        return f"CapturePlan({self.mode}, bounds={self.bounds}, tiles={len(self.tiles)})"
+
+
+class Win32WindowSource:
+    """通过 Win32 API 查询前台窗口的客户区 (屏幕坐标，已开启 DPI 感知时为物理像素)"""
+
+    class RECT(ctypes.Structure):
+        _fields_ = [('left', ctypes.c_long), ('top', ctypes.c_long),
+                    ('right', ctypes.c_long), ('bottom', ctypes.c_long)]
+
+    class POINT(ctypes.Structure):
+        _fields_ = [('x', ctypes.c_long), ('y', ctypes.c_long)]
+
+    def __init__(self):
+        self.user32 = ctypes.WinDLL("user32")  # 私有句柄，函数原型只在这里生效
+        self.user32.GetForegroundWindow.restype = ctypes.c_void_p
+        self.user32.GetClientRect.argtypes = [ctypes.c_void_p, ctypes.POINTER(self.RECT)]
+        self.user32.ClientToScreen.argtypes = [ctypes.c_void_p, ctypes.POINTER(self.POINT)]
+        self.user32.IsIconic.argtypes = [ctypes.c_void_p]
+
+    def client_rect(self):
+        """前台窗口客户区的屏幕坐标；没有前台窗口或窗口已最小化时返回 None"""
+        hwnd = self.user32.GetForegroundWindow()
+        if not hwnd or self.user32.IsIconic(hwnd):
+            return None
+        rect = self.RECT()
+        if not self.user32.GetClientRect(hwnd, ctypes.byref(rect)):
+            return None
+        origin = self.POINT(0, 0)
+        if not self.user32.ClientToScreen(hwnd, ctypes.byref(origin)):
+            return None
+        return origin.x, origin.y, origin.x + rect.right, origin.y + rect.bottom
+
+    def process_name(self):
+        from .system import get_foreground_window_info
+        return get_foreground_window_info()[1]
+
+
+class FakeWindowSource:
+    """测试用的假前台窗口 (可在 Linux 上使用)"""
+
+    def __init__(self, rect=None, process=""):
+        self.rect = rect
+        self.process = process
+
+    def client_rect(self):
+        return self.rect
+
+    def process_name(self):
+        return self.process
+
+
+class GeometryProvider:
+    """
+    根据截图模式计算 CapturePlan：显示器布局来自 MonitorTopology，前台窗口来自窗口源，
+    两者都可以注入假实现，裁剪和拼接的计算可以在 Linux 上测试。
+    """
+
+    def __init__(self, topology=None, windows=None):
+        self._topology = topology
+        self._windows = windows
+
+    @property
+    def windows(self):
+        # 只有 window 模式用到，首次使用时才创建 (非 Windows 平台上创建会失败，由调用方回退)
+        if self._windows is None:
+            self._windows = Win32WindowSource()
+        return self._windows
+
+    @property
+    def topology(self):
+        # 未指定时每次取进程内共享的布局缓存 (基准/测试可能用 set_topology 替换)
+        return self._topology or get_topology()
+
+    def plan(self, mode=MODE_MONITOR, regions=None, process=None):
+        """
+        regions: {进程名: [left, top, right, bottom]}，相对前台窗口客户区左上角的坐标，
+        仅 window 模式使用；process 为已知的前台进程名 (例如分类时已查过)，不传时自行查询。
+        窗口不可用 (最小化、完全在屏幕外、非 Windows 平台) 时回退为整个显示器。
+        """
+        if mode == MODE_ALL_MONITORS:
+            bboxes = sorted(self.topology.all_bboxes())
+            if bboxes:
+                return CapturePlan(bboxes, MODE_ALL_MONITORS)
+        elif mode == MODE_WINDOW:
+            try:
+                plan = self._plan_window(regions, process)
+            except (AttributeError, OSError) as e:
+                print(f"[Capture] 无法获取前台窗口范围 ({e})，改为截取整个显示器")
+                plan = None
+            if plan is not None:
+                return plan
+        return CapturePlan([self.topology.current_bbox()], MODE_MONITOR)
+
+    def _plan_window(self, regions, process=None):
+        client = self.windows.client_rect()
+        if client is None or rect_empty(client):
+            return None
+        rect = client
+        if regions:
+            region = self._region_for(regions, process)
+            if region is not None:
+                rect = clip_rect((client[0] + region[0], client[1] + region[1],
+                                  client[0] + region[2], client[1] + region[3]), client)
+        # 窗口可能有一部分在屏幕外，只截显示器范围内的部分 (跨显示器时取重叠面积最大的那个)
+        rect = clip_rect(rect, self.topology.monitor_for_rect(rect) or rect)
+        if rect_empty(rect):
+            return None
+        return CapturePlan([rect], MODE_WINDOW)
+
+    def _region_for(self, regions, process=None):
+        # 进程名只在配置了区域时才查询 (需要打开进程句柄)
+        if process is None:
+            process = self.windows.process_name()
+        process = (process or "").lower()
+        for name, region in regions.items():
+            if name.lower() == process and len(region) == 4:
+                return tuple(int(v) for v in region)
+        return None
+
+
+_default_geometry = None
+_default_lock = threading.Lock()
+
+
+def get_geometry():
+    """进程内共享的截图范围计算器 (首次调用时创建)"""
+    global _default_geometry
+    with _default_lock:
+        if _default_geometry is None:
+            _default_geometry = GeometryProvider()
+        return _default_geometry
+
+
+def set_geometry(provider):
+    """注入自定义的计算器 (例如测试或基准中使用 FakeWindowSource)"""
+    global _default_geometry
+    with _default_lock:
+        _default_geometry = provider
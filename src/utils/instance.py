@@ -1,9 +1,24 @@
 import ctypes
+import json
 import os
+import signal
 import sys
+import tempfile
+import threading
 import time
 import subprocess
 
+APP_NAME = "GameShadowSnap"
+# 第二个实例可以转发给已运行实例的命令
+COMMANDS = ("capture", "open_folder", "reload_config", "shutdown")
+# 连接已运行实例并收到回复的最长时间，超过视为无响应
+CONNECT_TIMEOUT = 2.0
+# 请求旧实例退出后最多等多久 (旧实例退出前会等待在途截图写盘，最长 10 秒)
+SHUTDOWN_WAIT = 15.0
+# 强制结束旧实例后等待锁释放的时间
+KILL_WAIT = 3.0
+POLL_INTERVAL = 0.02
+
 
 class SingleInstanceChecker:
     def __init__(self, app_name="Global\\GameShadowSnap_Mutex"):
@@ -18,6 +33,8 @@ class SingleInstanceChecker:
         self.last_error = self.kernel32.GetLastError()
         # ERROR_ALREADY_EXISTS = 183
         if self.last_error == 183:
+            # 必须关闭句柄，否则旧实例退出后 Mutex 仍被我们的句柄保留，永远无法接管
+            self.release()
             return False
         return True
 
@@ -27,12 +44,11 @@ class SingleInstanceChecker:
         # 注意：这里必须和你打包后的 exe 名字完全一致
         target_name = "GameShadowSnap.exe"
 
-        print(f"[Startup] 发现旧实例，正在执行清理... (排除当前PID: {my_pid})")
+        print(f"[Startup] 旧实例无响应，正在强制结束... (排除当前PID: {my_pid})")
         try:
             # /F:强制 /FI:过滤器排除自己 /IM:镜像名
             cmd = f'taskkill /F /FI "PID ne {my_pid}" /IM {target_name}'
             subprocess.run(cmd, shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            time.sleep(0.5)
         except Exception as e:
             print(f"[Startup] 清理旧进程失败: {e}")
 
@@ -43,25 +59,281 @@ class SingleInstanceChecker:
             self.mutex_handle = None
 
 
-# 全局变量引用
-_global_checker = None
+class FileInstanceLock:
+    """非 Windows 平台 (开发和测试) 的单实例锁：对锁文件加 flock，进程退出时由系统自动释放"""
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    def try_acquire(self):
+        import fcntl
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
 
 
-def enforce_single_instance():
+class InstanceServer:
     """
-    [主入口] 强制单实例运行
+    已运行实例的命令通道 (Windows 命名管道 / Unix 域套接字，multiprocessing.connection + 随机密钥认证)。
+    处理函数尚未注册 (程序还在启动) 时收到的命令会暂存，注册后立即执行。
     """
-    if not getattr(sys, 'frozen', False):
-        return
 
-    global _global_checker
-    _global_checker = SingleInstanceChecker()
+    def __init__(self, address, family, authkey):
+        # multiprocessing.connection 导入较慢，放到热键就绪之后 (start_instance_server) 才加载
+        from multiprocessing.connection import Listener
+        self.listener = Listener(address, family, authkey=authkey)
+        self.handlers = {}
+        self._pending = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def start(self):
+        threading.Thread(target=self._loop, name="instance-ipc", daemon=True).start()
+        return self
+
+    def on(self, command, handler):
+        with self._lock:
+            self.handlers[command] = handler
+            pending = [c for c in self._pending if c == command]
+            self._pending = [c for c in self._pending if c != command]
+        for _ in pending:
+            self._run(command, handler)
+
+    def close(self):
+        self._closed = True
+        self.listener.close()
+
+    def _loop(self):
+        while not self._closed:
+            try:
+                conn = self.listener.accept()
+            except Exception as e:
+                if self._closed:
+                    return
+                print(f"[Instance] 拒绝连接: {e}")
+                continue
+            try:
+                self._handle(conn)
+            except Exception as e:
+                print(f"[Instance] 处理命令失败: {e}")
+
+    def _handle(self, conn):
+        with conn:
+            if not conn.poll(CONNECT_TIMEOUT):
+                return
+            message = conn.recv()
+            command = message.get("command") if isinstance(message, dict) else None
+            if command not in COMMANDS:
+                conn.send({"ok": False, "error": f"未知命令: {command}"})
+                return
+            with self._lock:
+                handler = self.handlers.get(command)
+                if handler is None:
+                    self._pending.append(command)
+            # 先回复再执行，发送方 (第二个实例) 不必等待命令完成即可退出
+            conn.send({"ok": True, "pending": handler is None})
+        print(f"[Instance] 收到来自新实例的命令: {command}")
+        if handler is not None:
+            threading.Thread(target=self._run, args=(command, handler), daemon=True).start()
+
+    @staticmethod
+    def _run(command, handler):
+        try:
+            handler()
+        except Exception as e:
+            print(f"[Instance] 执行命令 {command} 失败: {e}")
+
+
+class InstanceGuard:
+    """
+    单实例 + 命令转发：
+    - 拿到锁：当前进程是唯一实例；serve() 打开命令通道，把地址/PID/密钥写入信息文件
+    - 没拿到锁：把命令转发给已运行的实例后退出；不带命令的普通启动会请求旧实例正常退出，再接管
+    - 旧实例无响应 (连接或回复超时) 时才强制结束它
+    """
+
+    def __init__(self, name=APP_NAME, directory=None):
+        self.name = name
+        self.directory = directory or tempfile.gettempdir()
+        self.info_path = os.path.join(self.directory, f"{name}.instance.json")
+        if sys.platform == "win32":
+            self.lock = SingleInstanceChecker(f"Global\\{name}_Mutex")
+        else:
+            self.lock = FileInstanceLock(os.path.join(self.directory, f"{name}.lock"))
+        self.server = None
+
+    def enforce(self, command=None):
+        """返回 True 表示当前进程继续启动；False 表示命令已交给已运行的实例，当前进程应直接退出"""
+        if self.lock.try_acquire():
+            if command == "shutdown":
+                self.lock.release()
+                print("[Instance] 没有正在运行的实例")
+                return False
+            self._remove_stale_info()
+            return True
+
+        info = self._wait_info(CONNECT_TIMEOUT)
+        reply = self.send(command or "shutdown", info=info)
+        if reply is not None:
+            if not reply.get("ok"):
+                print(f"[Instance] 已运行的实例拒绝了命令: {reply.get('error')}")
+            elif command and command != "shutdown":
+                print(f"[Instance] 已把命令 {command} 转发给正在运行的实例")
+                return False
+            else:
+                print("[Instance] 已请求旧实例退出，等待其保存完在途截图...")
+                if self._wait_acquire(SHUTDOWN_WAIT):
+                    return self._took_over(command, "旧实例已退出")
+                print("[Instance] 旧实例退出超时")
+
+        # 旧实例无响应，才强制结束
+        if self._kill_old(info) and self._wait_acquire(KILL_WAIT):
+            return self._took_over(command, "旧实例已强制结束")
+        print("[Instance] 无法接管单实例锁，继续启动")
+        return command != "shutdown"
+
+    def send(self, command, info=None, timeout=CONNECT_TIMEOUT):
+        """把命令发给已运行的实例，返回回复 dict；没有实例或实例无响应时返回 None"""
+        info = info or self._read_info()
+        if not info:
+            return None
+        from multiprocessing.connection import Client
+        result = {}
+
+        def talk():
+            try:
+                with Client(info["address"], info["family"], authkey=bytes.fromhex(info["authkey"])) as conn:
+                    conn.send({"command": command, "pid": os.getpid()})
+                    if conn.poll(timeout):
+                        result["reply"] = conn.recv()
+            except Exception as e:
+                result["error"] = e
+
+        # 连接时的认证握手没有超时参数，放在线程里等待，旧实例卡死时不会拖住新实例
+        worker = threading.Thread(target=talk, daemon=True)
+        worker.start()
+        worker.join(timeout)
+        if "error" in result:
+            print(f"[Instance] 无法连接已运行的实例: {result['error']}")
+        return result.get("reply")
+
+    def on(self, command, handler):
+        """注册命令处理函数 (当前进程是唯一实例时才有效)"""
+        if self.server is not None:
+            self.server.on(command, handler)
+
+    def _took_over(self, command, reason):
+        print(f"[Instance] {reason}，当前进程已接管")
+        if command == "shutdown":
+            self.lock.release()
+            return False
+        self._remove_stale_info()
+        return True
+
+    def _wait_acquire(self, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.lock.try_acquire():
+                return True
+            time.sleep(POLL_INTERVAL)
+        return False
+
+    def _kill_old(self, info):
+        if sys.platform == "win32":
+            # 只在打包环境下按进程名结束，开发环境下 python.exe 可能是别的程序
+            if not getattr(sys, 'frozen', False):
+                return False
+            self.lock.kill_old_instances()
+            return True
+        pid = info.get("pid") if info else None
+        if not pid or pid == os.getpid():
+            return False
+        print(f"[Instance] 旧实例无响应，正在强制结束 (PID {pid})")
+        try:
+            os.kill(pid, signal.SIGKILL)
+            return True
+        except OSError:
+            return False
+
+    def serve(self):
+        """打开命令通道并写入实例信息文件 (拿到锁之后调用)"""
+        import secrets
+        authkey = secrets.token_bytes(32)
+        if sys.platform == "win32":
+            address, family = f"\\\\.\\pipe\\{self.name}-{os.getpid()}", "AF_PIPE"
+        else:
+            address, family = os.path.join(self.directory, f"{self.name}-{os.getpid()}.sock"), "AF_UNIX"
+        try:
+            self.server = InstanceServer(address, family, authkey).start()
+        except OSError as e:
+            print(f"[Instance] 命令通道启动失败: {e}")
+            return
+        info = {"pid": os.getpid(), "address": address, "family": family, "authkey": authkey.hex()}
+        temp_path = f"{self.info_path}.{os.getpid()}.tmp"
+        try:
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(info, f)
+            os.replace(temp_path, self.info_path)
+        except OSError as e:
+            print(f"[Instance] 写入实例信息失败: {e}")
+
+    def _remove_stale_info(self):
+        """删除上一个实例留下的信息文件：命令通道打开之前，新实例不会连到已经不存在的地址"""
+        try:
+            os.remove(self.info_path)
+        except OSError:
+            pass
+
+    def _wait_info(self, timeout):
+        """持有锁的实例可能刚启动、还没打开命令通道，稍等它写入信息文件"""
+        deadline = time.monotonic() + timeout
+        info = self._read_info()
+        while info is None and time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            info = self._read_info()
+        return info
+
+    def _read_info(self):
+        try:
+            with open(self.info_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+
+# 全局实例
+_guard = None
+
+
+def enforce_single_instance(command=None):
+    """
+    [主入口] 强制单实例运行。
+    command 为 COMMANDS 之一时转发给已运行的实例；返回 False 表示当前进程应直接退出。
+    """
+    global _guard
+    _guard = InstanceGuard()
+    return _guard.enforce(command)
+
+
+def start_instance_server():
+    """打开命令通道 (enforce_single_instance 返回 True 之后调用；放在热键就绪之后，不拖慢启动)"""
+    if _guard is not None:
+        _guard.serve()
 
-    if not _global_checker.try_acquire():
-        _global_checker.kill_old_instances()
-        _global_checker.release()
 
-        # 重新初始化并再次占坑
-        _global_checker = SingleInstanceChecker()
-        if _global_checker.try_acquire():
-            print("[Startup] 旧实例已清理，当前进程已接管 Mutex")
\ No newline at end of file
+def on_instance_command(command, handler):
+    """注册第二个实例转发过来的命令的处理函数"""
+    if _guard is not None:
+        _guard.on(command, handler)
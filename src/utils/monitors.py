@@ -0,0 +1,181 @@
+import ctypes
+import threading
+
+MONITOR_DEFAULTTONEAREST = 2
+# GetSystemMetrics 索引：显示器数量、虚拟桌面范围、主屏分辨率
+SM_CXSCREEN, SM_CYSCREEN = 0, 1
+SM_XVIRTUALSCREEN, SM_YVIRTUALSCREEN, SM_CXVIRTUALSCREEN, SM_CYVIRTUALSCREEN = 76, 77, 78, 79
+SM_CMONITORS = 80
+
+
+class Win32MonitorSource:
+    """通过 Win32 API 查询显示器布局 (ctypes 结构体只在这里定义一次)"""
+
+    class RECT(ctypes.Structure):
+        _fields_ = [('left', ctypes.c_long), ('top', ctypes.c_long),
+                    ('right', ctypes.c_long), ('bottom', ctypes.c_long)]
+
+    def __init__(self):
+        # 私有的 user32 句柄：下面修改的函数原型不会影响 ctypes.windll.user32 的其他调用方
+        self.user32 = ctypes.WinDLL("user32")
+        # 句柄按指针宽度返回，避免 64 位系统上被截断为 int
+        self.user32.GetForegroundWindow.restype = ctypes.c_void_p
+        self.user32.MonitorFromWindow.argtypes = [ctypes.c_void_p, ctypes.c_ulong]
+        self.user32.MonitorFromWindow.restype = ctypes.c_void_p
+        self._metrics = (SM_CMONITORS, SM_XVIRTUALSCREEN, SM_YVIRTUALSCREEN,
+                         SM_CXVIRTUALSCREEN, SM_CYVIRTUALSCREEN, SM_CXSCREEN, SM_CYSCREEN)
+
+    def generation(self):
+        """廉价的布局指纹：显示器数量、虚拟桌面范围或主屏分辨率变化时都会改变"""
+        metrics = self.user32.GetSystemMetrics
+        return tuple(metrics(i) for i in self._metrics)
+
+    def enumerate(self):
+        """枚举所有显示器，返回 {显示器句柄: (left, top, right, bottom)}"""
+        result = {}
+        proc_type = ctypes.WINFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p,
+                                       ctypes.POINTER(self.RECT), ctypes.c_void_p)
+
+        def callback(hmonitor, hdc, rect, data):
+            r = rect.contents
+            result[hmonitor] = (r.left, r.top, r.right, r.bottom)
+            return 1
+
+        self.user32.EnumDisplayMonitors(None, None, proc_type(callback), 0)
+        return result
+
+    def foreground_monitor(self):
+        """前台窗口所在显示器的句柄"""
+        hwnd = self.user32.GetForegroundWindow()
+        return self.user32.MonitorFromWindow(hwnd, MONITOR_DEFAULTTONEAREST)
+
+    def primary_bbox(self):
+        """主屏范围 (主屏左上角总在虚拟桌面原点)"""
+        return 0, 0, self.user32.GetSystemMetrics(SM_CXSCREEN), self.user32.GetSystemMetrics(SM_CYSCREEN)
+
+
+class FakeMonitorSource:
+    """测试用的假显示器布局 (可在 Linux 上使用)"""
+
+    def __init__(self, monitors, foreground=None):
+        self.monitors = dict(monitors)
+        self.foreground = foreground if foreground is not None else next(iter(self.monitors))
+        self._generation = 0
+        self.enumerate_calls = 0
+
+    def set_monitors(self, monitors):
+        """模拟插拔显示器/修改分辨率"""
+        self.monitors = dict(monitors)
+        self._generation += 1
+
+    def generation(self):
+        return self._generation
+
+    def enumerate(self):
+        self.enumerate_calls += 1
+        return dict(self.monitors)
+
+    def foreground_monitor(self):
+        return self.foreground
+
+    def primary_bbox(self):
+        return next(iter(self.monitors.values()), (0, 0, 0, 0))
+
+
+def intersection_area(a, b):
+    width = min(a[2], b[2]) - max(a[0], b[0])
+    height = min(a[3], b[3]) - max(a[1], b[1])
+    return width * height if width > 0 and height > 0 else 0
+
+
+class MonitorTopology:
+    """
+    显示器布局缓存：
+    只在启动和布局变化时枚举一次显示器，热键路径上只剩 "前台显示器句柄 -> 坐标" 的字典查找。
+    布局变化靠 source.generation() 的指纹和查不到的句柄发现，不需要额外监听显示设置通知。
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self._lock = threading.Lock()
+        self._bboxes = {}
+        self._generation = None
+        self.refreshes = 0
+        self.refresh()
+
+    def refresh(self):
+        with self._lock:
+            self._generation = self.source.generation()
+            self._bboxes = self.source.enumerate()
+            self.refreshes += 1
+
+    def _ensure_fresh(self):
+        if self.source.generation() != self._generation:
+            self.refresh()
+
+    def bbox_for(self, handle):
+        """
+        按显示器句柄查坐标；句柄未知时说明布局已变，重新枚举一次。
+        仍然查不到 (例如显示器刚被拔掉) 时回退为主屏，保证总能返回一个范围。
+        """
+        self._ensure_fresh()
+        bbox = self._bboxes.get(handle)
+        if bbox is None:
+            self.refresh()
+            bbox = self._bboxes.get(handle) or self._fallback_bbox()
+        return bbox
+
+    def _fallback_bbox(self):
+        """包含原点的显示器 (即主屏)；没有时取所有显示器的外接矩形 (虚拟桌面)"""
+        bboxes = list(self._bboxes.values())
+        for bbox in bboxes:
+            if bbox[0] <= 0 < bbox[2] and bbox[1] <= 0 < bbox[3]:
+                return bbox
+        if bboxes:
+            return (min(b[0] for b in bboxes), min(b[1] for b in bboxes),
+                    max(b[2] for b in bboxes), max(b[3] for b in bboxes))
+        return self.source.primary_bbox()
+
+    def current_bbox(self):
+        """前台窗口所在显示器的坐标范围"""
+        return self.bbox_for(self.source.foreground_monitor())
+
+    def all_bboxes(self):
+        self._ensure_fresh()
+        return list(self._bboxes.values())
+
+    def monitor_for_rect(self, rect):
+        """纯 Python 计算：与 rect 重叠面积最大的显示器；都不重叠时取中心点最近的"""
+        bboxes = self.all_bboxes()
+        if not bboxes:
+            return None
+        best = max(bboxes, key=lambda b: intersection_area(rect, b))
+        if intersection_area(rect, best):
+            return best
+        cx, cy = (rect[0] + rect[2]) / 2, (rect[1] + rect[3]) / 2
+
+        def distance(b):
+            dx = max(b[0] - cx, 0, cx - b[2])
+            dy = max(b[1] - cy, 0, cy - b[3])
+            return dx * dx + dy * dy
+        return min(bboxes, key=distance)
+
+
+_default_topology = None
+_default_lock = threading.Lock()
+
+
+def get_topology():
+    """进程内共享的显示器布局缓存 (首次调用时创建)"""
+    global _default_topology
+    with _default_lock:
+        if _default_topology is None:
+            _default_topology = MonitorTopology(Win32MonitorSource())
+        return _default_topology
+
+
+def set_topology(topology):
+    """注入自定义的布局 (例如测试或基准中使用 FakeMonitorSource)"""
+    global _default_topology
+    with _default_lock:
+        _default_topology = topology
@@ -1,4 +1,11 @@
 import ctypes
+import os
+
+from .monitors import get_topology
+
+
+class _LASTINPUTINFO(ctypes.Structure):
+    _fields_ = [('cbSize', ctypes.c_uint), ('dwTime', ctypes.c_uint)]
 
 
 def set_dpi_awareness():
@@ -10,20 +17,72 @@ def set_dpi_awareness():
 
 
 def get_current_monitor_bbox():
-    """获取当前活动窗口所在显示器的坐标范围"""
-    user32 = ctypes.windll.user32
+    """获取当前活动窗口所在显示器的坐标范围 (使用缓存的显示器布局)"""
+    return get_topology().current_bbox()
+
+
+def get_foreground_window_info():
+    """返回前台窗口的 (标题, 进程名)；非 Windows 平台或查询失败时返回空字符串"""
+    try:
+        user32 = ctypes.windll.user32
+        kernel32 = ctypes.windll.kernel32
+    except AttributeError:
+        return "", ""
+
     hwnd = user32.GetForegroundWindow()
-    hmonitor = user32.MonitorFromWindow(hwnd, 2)
+    length = user32.GetWindowTextLengthW(hwnd)
+    title_buf = ctypes.create_unicode_buffer(length + 1)
+    user32.GetWindowTextW(hwnd, title_buf, length + 1)
 
-    class RECT(ctypes.Structure):
-        _fields_ = [('left', ctypes.c_long), ('top', ctypes.c_long),
-                    ('right', ctypes.c_long), ('bottom', ctypes.c_long)]
+    pid = ctypes.c_ulong()
+    user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+    process_name = ""
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid.value)
+    if handle:
+        try:
+            size = ctypes.c_ulong(1024)
+            path_buf = ctypes.create_unicode_buffer(size.value)
+            if kernel32.QueryFullProcessImageNameW(handle, 0, path_buf, ctypes.byref(size)):
+                process_name = os.path.basename(path_buf.value)
+        finally:
+            kernel32.CloseHandle(handle)
+    return title_buf.value, process_name
 
-    class MONITORINFO(ctypes.Structure):
-        _fields_ = [('cbSize', ctypes.c_long), ('rcMonitor', RECT),
-                    ('rcWork', RECT), ('dwFlags', ctypes.c_long)]
 
-    mi = MONITORINFO()
-    mi.cbSize = ctypes.sizeof(MONITORINFO)
-    user32.GetMonitorInfoW(hmonitor, ctypes.byref(mi))
-    return (mi.rcMonitor.left, mi.rcMonitor.top, mi.rcMonitor.right, mi.rcMonitor.bottom)
+def wait_for_composition():
+    """
+    等待桌面合成器 (DWM) 完成下一次合成：刚隐藏的窗口要等这一帧合成后才会从屏幕画面中消失。
+    非 Windows 平台或未开启合成时立即返回。
+    """
+    try:
+        ctypes.windll.dwmapi.DwmFlush()
+    except (AttributeError, OSError):
+        pass
+
+
+def get_idle_seconds():
+    """距离用户最后一次键盘/鼠标输入的秒数；非 Windows 平台返回 None"""
+    try:
+        user32 = ctypes.windll.user32
+        kernel32 = ctypes.windll.kernel32
+    except AttributeError:
+        return None
+
+    info = _LASTINPUTINFO()
+    info.cbSize = ctypes.sizeof(_LASTINPUTINFO)
+    if not user32.GetLastInputInfo(ctypes.byref(info)):
+        return None
+    # GetTickCount 约 49.7 天回绕一次，用无符号减法处理
+    elapsed_ms = (kernel32.GetTickCount() - info.dwTime) & 0xFFFFFFFF
+    return elapsed_ms / 1000.0
+
+
+def lower_process_priority():
+    """把当前进程调到最低优先级 (后台任务使用，避免和游戏抢 CPU)"""
+    try:
+        kernel32 = ctypes.windll.kernel32
+        IDLE_PRIORITY_CLASS = 0x00000040
+        kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), IDLE_PRIORITY_CLASS)
+    except AttributeError:
+        os.nice(19)
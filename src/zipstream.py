@@ -0,0 +1,305 @@
+import os
+import shutil
+import struct
+import zipfile
+import zlib
+
+from .download import DownloadError
+
+# zip 本地文件头：签名 | 版本 | 标志 | 压缩方式 | 时间 | 日期 | CRC32 | 压缩后大小 | 原始大小 | 文件名长度 | 扩展字段长度
+LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+LOCAL_SIG = 0x04034B50
+DESCRIPTOR_SIG = b"PK\x07\x08"
+ZIP64_EXTRA_ID = 0x0001
+FLAG_ENCRYPTED = 0x01
+FLAG_DESCRIPTOR = 0x08  # 大小和 CRC 不在本地头里，而在数据之后的描述符中
+FLAG_UTF8 = 0x800
+STORED, DEFLATED = 0, 8
+
+
+class ZipStreamError(DownloadError):
+    """更新包格式错误、找不到目标文件或解压结果 CRC 不一致"""
+
+
+class _Entry:
+    def __init__(self, name, flags, method, crc, compress_size, file_size, zip64):
+        self.name = name
+        self.flags = flags
+        self.method = method
+        self.crc = crc
+        self.compress_size = compress_size
+        self.file_size = file_size
+        self.zip64 = zip64
+
+
+def _zip64_sizes(extra, file_size, compress_size):
+    """本地头中的大小为 0xFFFFFFFF 时，真实值在 ZIP64 扩展字段里 (按原始大小、压缩后大小的顺序)"""
+    position = 0
+    while position + 4 <= len(extra):
+        field_id, length = struct.unpack_from("<HH", extra, position)
+        if field_id == ZIP64_EXTRA_ID:
+            values = list(struct.unpack_from(f"<{length // 8}Q", extra, position + 4))
+            if file_size == 0xFFFFFFFF and values:
+                file_size = values.pop(0)
+            if compress_size == 0xFFFFFFFF and values:
+                compress_size = values.pop(0)
+            return file_size, compress_size, True
+        position += 4 + length
+    return file_size, compress_size, False
+
+
+class _ShiftedFile:
+    """
+    只保存了归档后半段 (从 shift 开始) 的落盘文件，对 zipfile 伪装成完整归档：
+    偏移按原归档计算，shift 之前的部分读出来是 0 (zipfile 只会读中央目录和目标条目，用不到)。
+    """
+
+    def __init__(self, f, shift):
+        self._f = f
+        self._shift = shift
+        self._pos = 0
+        self._size = shift + os.fstat(f.fileno()).st_size
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self._pos
+        elif whence == 2:
+            offset += self._size
+        self._pos = max(0, offset)
+        return self._pos
+
+    def read(self, n=-1):
+        if n is None or n < 0:
+            n = self._size - self._pos
+        n = max(0, min(n, self._size - self._pos))
+        padding = b""
+        if self._pos < self._shift:
+            padding = bytes(min(n, self._shift - self._pos))
+            self._pos += len(padding)
+            n -= len(padding)
+        self._f.seek(self._pos - self._shift)
+        data = self._f.read(n)
+        self._pos += len(data)
+        return padding + data
+
+
+class ZipMemberStream:
+    """
+    边下载边解压：按顺序解析下载中的 zip，只把 member 解压写入 out_path，其余条目直接跳过。
+    作为 ResumableDownload 的 sink 使用：归档只顺序写入 .part (供程序重启后续传)，
+    不需要下载完再重新读取整个 zip 解压。
+
+    个别条目无法在流中确定边界时 (未压缩 + 数据描述符、加密、不支持的压缩方式)，
+    从该条目起把剩余数据写入 spill_path，下载完成后借助中央目录用 zipfile 解压。
+    """
+
+    def __init__(self, member, out_path, spill_path=None):
+        self.member = member
+        self.out_path = out_path
+        self.spill_path = spill_path or out_path + ".spill"
+        self._out = None
+        self._spill = None
+        self.reset()
+
+    # ---------- sink 接口 ----------
+    def reset(self):
+        """下载从头开始 (服务器不支持续传或文件已变化) 时调用，丢弃已解压的内容"""
+        self._close_files()
+        self._remove_files()
+        self._buf = b""
+        self._state = "header"
+        self._position = 0  # 已解析的归档字节数
+        self._entry = None
+        self._target = False
+        self._remaining = None
+        self._decompressor = None
+        self._crc = 0
+        self._written = 0
+        self._spill_start = 0
+        self.done = False
+        self.spilled_bytes = 0
+
+    def write(self, data):
+        if self._spill is not None:
+            self._spill.write(data)
+            self.spilled_bytes += len(data)
+            return
+        data = self._buf + data if self._buf else bytes(data)
+        self._buf = b""
+        while data and self._spill is None:
+            data = getattr(self, "_feed_" + self._state)(data)
+        if data and self._spill is not None:
+            self._spill.write(data)
+            self.spilled_bytes += len(data)
+
+    def close(self):
+        """下载完成并校验通过后调用，返回 out_path"""
+        try:
+            if self._spill is not None:
+                self._spill.close()
+                self._spill = None
+                self._extract_from_spill()
+            if not self.done:
+                raise ZipStreamError(f"更新包中未找到 {self.member}")
+        except Exception:
+            self.abort()
+            raise
+        self._remove(self.spill_path)
+        return self.out_path
+
+    def abort(self):
+        """下载失败或校验失败时调用，删除解压了一半的文件"""
+        self._close_files()
+        self._remove_files()
+
+    # ---------- 流式解析 ----------
+    def _feed_header(self, data):
+        if len(data) < 4:
+            self._buf = data
+            return b""
+        if struct.unpack_from("<I", data)[0] != LOCAL_SIG:
+            # 到达中央目录，所有条目都已经过去
+            self._state = "tail"
+            return b""
+        if len(data) < LOCAL_HEADER.size:
+            self._buf = data
+            return b""
+        (_, _, flags, method, _, _, crc, compress_size, file_size,
+         name_len, extra_len) = LOCAL_HEADER.unpack_from(data)
+        header_len = LOCAL_HEADER.size + name_len + extra_len
+        if len(data) < header_len:
+            self._buf = data
+            return b""
+        name = data[LOCAL_HEADER.size:LOCAL_HEADER.size + name_len].decode(
+            "utf-8" if flags & FLAG_UTF8 else "cp437")
+        extra = data[LOCAL_HEADER.size + name_len:header_len]
+        file_size, compress_size, zip64 = _zip64_sizes(extra, file_size, compress_size)
+        entry = _Entry(name, flags, method, crc, compress_size, file_size, zip64)
+
+        if (flags & FLAG_ENCRYPTED or method not in (STORED, DEFLATED)
+                or (flags & FLAG_DESCRIPTOR and method == STORED)):
+            # 流中无法确定数据边界或无法解码，改为落盘
+            self._start_spill(data)
+            return b""
+
+        self._position += header_len
+        self._entry = entry
+        self._target = name == self.member
+        self._crc = 0
+        self._written = 0
+        self._remaining = None if flags & FLAG_DESCRIPTOR else compress_size
+        # 不知道压缩后大小时必须解压才能找到条目的结尾 (deflate 流自带结束标记)
+        needs_inflate = method == DEFLATED and (self._target or self._remaining is None)
+        self._decompressor = zlib.decompressobj(-15) if needs_inflate else None
+        if self._target:
+            self._out = open(self.out_path, "wb")
+        self._state = "data"
+        return data[header_len:]
+
+    def _feed_data(self, data):
+        if self._remaining is not None:
+            take, rest = data[:self._remaining], data[self._remaining:]
+            self._remaining -= len(take)
+            self._position += len(take)
+            if self._decompressor:
+                self._emit(self._decompressor.decompress(take))
+            else:
+                self._emit(take)
+            if self._remaining:
+                return b""
+            if self._decompressor:
+                self._emit(self._decompressor.flush())
+            self._end_entry()
+            return rest
+
+        self._emit(self._decompressor.decompress(data))
+        if not self._decompressor.eof:
+            self._position += len(data)
+            return b""
+        rest = self._decompressor.unused_data
+        self._position += len(data) - len(rest)
+        self._end_entry()
+        return rest
+
+    def _feed_descriptor(self, data):
+        size_len = 8 if self._entry.zip64 else 4
+        if len(data) < 4 + 4 + 2 * size_len:
+            self._buf = data
+            return b""
+        start = 4 if data[:4] == DESCRIPTOR_SIG else 0
+        crc = struct.unpack_from("<I", data, start)[0]
+        file_size = struct.unpack_from("<Q" if size_len == 8 else "<I", data, start + 4 + size_len)[0]
+        length = start + 4 + 2 * size_len
+        self._position += length
+        self._finish_entry(crc, file_size)
+        return data[length:]
+
+    def _feed_tail(self, data):
+        return b""  # 中央目录及之后的内容不需要
+
+    def _emit(self, data):
+        if self._target and data:
+            self._out.write(data)
+            self._crc = zlib.crc32(data, self._crc)
+            self._written += len(data)
+
+    def _end_entry(self):
+        if self._entry.flags & FLAG_DESCRIPTOR:
+            self._state = "descriptor"
+        else:
+            self._finish_entry(self._entry.crc, self._entry.file_size)
+
+    def _finish_entry(self, crc, file_size):
+        if self._target:
+            self._out.close()
+            self._out = None
+            if self._crc != crc or self._written != file_size:
+                raise ZipStreamError(f"{self.member} 解压结果校验失败 (CRC32 或大小不一致)")
+            self.done = True
+            self._state = "tail"
+        else:
+            self._state = "header"
+        self._decompressor = None
+
+    # ---------- 落盘回退 ----------
+    def _start_spill(self, data):
+        print("[Updater] 更新包中有无法流式解压的条目，剩余部分改为落盘后解压")
+        self._spill_start = self._position
+        self._spill = open(self.spill_path, "wb")
+        self._spill.write(data)
+        self.spilled_bytes += len(data)
+
+    def _extract_from_spill(self):
+        with open(self.spill_path, "rb") as f:
+            try:
+                with zipfile.ZipFile(_ShiftedFile(f, self._spill_start)) as zf:
+                    with zf.open(self.member) as source, open(self.out_path, "wb") as target:
+                        shutil.copyfileobj(source, target, 1024 * 1024)
+            except KeyError:
+                raise ZipStreamError(f"更新包中未找到 {self.member}")
+            except zipfile.BadZipFile as e:
+                raise ZipStreamError(f"更新包格式错误: {e}")
+        self.done = True
+
+    # ---------- 清理 ----------
+    def _close_files(self):
+        for f in (self._out, self._spill):
+            if f is not None:
+                f.close()
+        self._out = None
+        self._spill = None
+
+    def _remove_files(self):
+        self._remove(self.out_path)
+        self._remove(self.spill_path)
+
+    @staticmethod
+    def _remove(path):
+        if os.path.exists(path):
+            os.remove(path)
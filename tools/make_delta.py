@@ -0,0 +1,71 @@
+"""
+生成增量更新补丁：从上一个版本的 EXE 升级到新版本 EXE。
+
+用法 (在仓库根目录执行):
+    python -m tools.make_delta old/GameShadowSnap.exe dist/GameShadowSnap.exe --from-version v1.2.0 --verify
+    python -m tools.make_delta old.exe new.exe -o custom.delta
+
+输出文件默认命名为 GameShadowSnap_<旧版本>.delta，作为新版本 Release 的附件上传，
+客户端发现与自己版本匹配的补丁时只下载补丁，否则回退到完整的 zip。
+--verify 会把补丁应用到旧文件，确认结果与新文件逐字节一致 (CI 中必须开启)。
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from src.delta import make_patch, apply_patch, delta_asset_name
+
+
+def verify(old_path, patch_path, new_data):
+    """old + patch -> new 的往返校验"""
+    fd, out_path = tempfile.mkstemp(suffix=".new")
+    os.close(fd)
+    try:
+        apply_patch(old_path, patch_path, out_path)
+        with open(out_path, "rb") as f:
+            return f.read() == new_data
+    finally:
+        if os.path.exists(out_path):
+            os.remove(out_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成 EXE 增量更新补丁")
+    parser.add_argument("old", help="旧版本 EXE")
+    parser.add_argument("new", help="新版本 EXE")
+    parser.add_argument("--from-version", help="旧版本号 (用于生成补丁文件名)")
+    parser.add_argument("-o", "--output", help="补丁输出路径")
+    parser.add_argument("--verify", action="store_true", help="生成后做往返校验")
+    args = parser.parse_args()
+
+    if not args.output and not args.from_version:
+        parser.error("需要指定 --from-version 或 -o")
+    output = args.output or delta_asset_name(args.from_version)
+
+    with open(args.old, "rb") as f:
+        old_data = f.read()
+    with open(args.new, "rb") as f:
+        new_data = f.read()
+
+    t0 = time.perf_counter()
+    patch, stats = make_patch(old_data, new_data)
+    stats["seconds"] = round(time.perf_counter() - t0, 2)
+    with open(output, "wb") as f:
+        f.write(patch)
+    stats["output"] = output
+    stats["ratio"] = round(stats["patch_size"] / max(1, stats["new_size"]), 4)
+
+    if args.verify:
+        stats["verified"] = verify(args.old, output, new_data)
+
+    print(json.dumps(stats, indent=2, ensure_ascii=False))
+    if args.verify and not stats["verified"]:
+        print("往返校验失败：补丁应用结果与新文件不一致", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()